@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional dependency, the in-process cache is used instead
+    redis = None
+
+from config import (
+    CACHE_BACKEND, REDIS_URL, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES, GENERATION_REFRESH_SECONDS, MONGO_DATABASE
+)
+
+# Paths that do not read scraped data
+UNCACHED_PATHS = {"/", "/docs", "/redoc", "/openapi.json"}
+
+# Cached entries are the rendered body and its media type
+Entry = Tuple[bytes, str]
+
+
+class MemoryCache:
+    """In-process LRU cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, Tuple[float, Entry]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Entry]:
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: Entry):
+        self.entries[key] = (time.monotonic() + self.ttl, entry)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def close(self):
+        self.entries.clear()
+
+
+class RedisCache:
+    """Cache shared by every API process through Redis, eviction is left to its maxmemory policy"""
+
+    prefix = "tech-prices-api:"
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = CACHE_TTL_SECONDS):
+        if redis is None:
+            raise ValueError("The redis cache backend requires the redis package")
+        self.client = redis.from_url(url)
+        self.ttl = int(ttl)
+
+    async def get(self, key: str) -> Optional[Entry]:
+        values = await self.client.hmget(self.prefix + key, "body", "media_type")
+        if values[0] is None:
+            return None
+        return values[0], values[1].decode()
+
+    async def set(self, key: str, entry: Entry):
+        body, media_type = entry
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.prefix + key, mapping={"body": body, "media_type": media_type})
+            pipe.expire(self.prefix + key, self.ttl)
+            await pipe.execute()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_cache(backend: str = CACHE_BACKEND):
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "redis":
+        return RedisCache()
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+class GenerationTracker:
+    """Version of the scraped data, from the cache_generation counter of every website
+
+    The scraper bumps a website's counter once a run has written its prices. The counters
+    are read at most every refresh_seconds, between runs this is the only database query
+    a cached or 304 response costs.
+    """
+
+    def __init__(self, refresh_seconds: float = GENERATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.version: Optional[str] = None
+        self.read_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def current(self, db) -> str:
+        if self.version is not None and time.monotonic() - self.read_at < self.refresh_seconds:
+            return self.version
+        async with self._lock:
+            # Another request may have refreshed it while this one waited
+            if self.version is None or time.monotonic() - self.read_at >= self.refresh_seconds:
+                websites = await db.websites.find({}, {"cache_generation": 1}).sort("_id", 1).to_list(length=None)
+                self.version = ",".join(f"{doc['_id']}:{doc.get('cache_generation', 0)}" for doc in websites)
+                self.read_at = time.monotonic()
+        return self.version
+
+
+def _cache_key(request: Request) -> str:
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def _etag(key: str, version: str) -> str:
+    return '"' + hashlib.blake2b(f"{version}|{key}".encode(), digest_size=16).hexdigest() + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def cache_responses(request: Request, call_next) -> Response:
+    """HTTP middleware serving GET responses from the cache until the scraped data changes
+
+    The ETag derives from the request and the data version alone, so a matching
+    If-None-Match is answered 304 without looking the response up or querying MongoDB.
+    """
+    app = request.app
+    if request.method != "GET" or request.url.path in UNCACHED_PATHS:
+        return await call_next(request)
+
+    key = _cache_key(request)
+    version = await app.state.generations.current(app.state.mongo_client[MONGO_DATABASE])
+    etag = _etag(key, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    cache = app.state.cache
+    entry = await cache.get(f"{version}|{key}") if cache is not None else None
+    if entry is not None:
+        body, media_type = entry
+        return Response(body, media_type=media_type, headers={**headers, "X-Cache": "HIT"})
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    media_type = response.headers.get("content-type", "application/json")
+    if cache is not None:
+        await cache.set(f"{version}|{key}", (body, media_type))
+    return Response(body, media_type=media_type, headers={**headers, "X-Cache": "MISS"})
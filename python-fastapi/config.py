@@ -0,0 +1,26 @@
+import os
+
+# MongoDB, the database written by tech_price_scraper
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DATABASE = os.getenv("MONGO_DATABASE", "tech_prices")
+# prices for the documents backend, price_series for the timeseries backend
+PRICE_COLLECTION = os.getenv("PRICE_COLLECTION", "prices")
+
+# Motor connection pool
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = 300000
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 5000
+
+# Pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+DEFAULT_HISTORY_DAYS = 30
+
+# Response cache, memory, redis or none
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+# How often the website generation counters are read, the only query a cached response costs
+GENERATION_REFRESH_SECONDS = float(os.getenv("GENERATION_REFRESH_SECONDS", "5"))
@@ -0,0 +1,26 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from fastapi import Request
+
+from config import (
+    MONGO_URL, MONGO_DATABASE, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS
+)
+
+
+def create_client(url: str = MONGO_URL) -> AsyncIOMotorClient:
+    """One pooled client per process, shared by every request"""
+    return AsyncIOMotorClient(
+        url,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        # Dates are stored in UTC, aware datetimes serialize with their offset
+        tz_aware=True,
+        appname="tech-prices-api",
+    )
+
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    """Request dependency returning the scraper database"""
+    return request.app.state.mongo_client[MONGO_DATABASE]
@@ -1,8 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-app = FastAPI()
+from cache import GenerationTracker, cache_responses, create_cache
+from database import create_client
+from responses import MongoJSONResponse
+from routers import products, gpu_ram
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.mongo_client = create_client()
+    app.state.cache = create_cache()
+    app.state.generations = GenerationTracker()
+    try:
+        yield
+    finally:
+        if app.state.cache is not None:
+            await app.state.cache.close()
+        app.state.mongo_client.close()
+
+
+app = FastAPI(title="Tech Prices API", lifespan=lifespan, default_response_class=MongoJSONResponse)
+app.middleware("http")(cache_responses)
+app.include_router(products.router)
+app.include_router(gpu_ram.router)
 
 
 @app.get("/")
 async def root():
-    return {"message": "Test FastAPI 111"}
+    return {"message": "Tech Prices API", "endpoints": ["/products", "/gpu-ram/{gpu_ram}/cheapest", "/docs"]}
@@ -0,0 +1,71 @@
+import base64
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+
+# (field, direction) pairs, the last one must be _id so that positions are unique
+SortSpec = Sequence[Tuple[str, int]]
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque cursor holding the sort values of the last item of a page"""
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: SortSpec) -> List[Any]:
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort) or not isinstance(values[-1], ObjectId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def after_cursor(sort: SortSpec, values: List[Any]) -> Dict:
+    """Filter matching the documents sorted after the cursor position (keyset pagination)"""
+    clauses = []
+    for index, (field, direction) in enumerate(sort):
+        clause = {previous: value for (previous, _), value in zip(sort[:index], values)}
+        clause[field] = {"$gt" if direction > 0 else "$lt": values[index]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def _sort_value(doc: Dict, field: str) -> Any:
+    for key in field.split("."):
+        doc = doc.get(key) if isinstance(doc, dict) else None
+    return doc
+
+
+async def paginate(collection, query: Dict, sort: SortSpec, limit: int, cursor: Optional[str] = None,
+                   projection: Optional[Dict] = None) -> Tuple[List[Dict], Optional[str]]:
+    """A page of documents and the cursor of the next page, None on the last page"""
+    return await paginate_segments(collection, [query], sort, limit, cursor, projection)
+
+
+async def paginate_segments(collection, queries: Sequence[Dict], sort: SortSpec, limit: int,
+                            cursor: Optional[str] = None,
+                            projection: Optional[Dict] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Paginate the concatenation of queries, every document of a query sorts before the next query's
+
+    Each query is read on its own index in sort order, where a single $or over them would
+    need an in-memory sort. The keyset cursor applies to every query unchanged.
+    """
+    after = after_cursor(sort, decode_cursor(cursor, sort)) if cursor else None
+    docs: List[Dict] = []
+    for query in queries:
+        if after is not None:
+            query = {"$and": [query, after]}
+        # One extra document tells whether there is a next page
+        remaining = limit + 1 - len(docs)
+        cursor_docs = collection.find(query, projection).sort(list(sort)).limit(remaining)
+        docs.extend(await cursor_docs.to_list(length=remaining))
+        if len(docs) > limit:
+            break
+
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor([_sort_value(docs[-1], field) for field, _ in sort])
@@ -0,0 +1,35 @@
+from typing import Any, Dict, Optional
+
+import orjson
+from bson import ObjectId, Decimal128
+from starlette.responses import Response
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class MongoJSONResponse(Response):
+    """JSON response rendered by orjson, ObjectIds become strings
+
+    Routes return it directly so documents skip FastAPI's jsonable_encoder pass.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def document(doc: Dict) -> Dict:
+    """A MongoDB document with its _id exposed as id"""
+    doc["id"] = doc.pop("_id")
+    return doc
+
+
+def page(items, next_cursor: Optional[str]) -> MongoJSONResponse:
+    return MongoJSONResponse({"items": [document(item) for item in items], "next_cursor": next_cursor})
@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from database import get_db
+from pagination import paginate
+from responses import page
+from routers.products import PRODUCT_FIELDS
+
+router = APIRouter(prefix="/gpu-ram", tags=["gpu_ram"])
+
+
+@router.get("/{gpu_ram}/cheapest")
+async def cheapest_by_gpu_ram(
+    gpu_ram: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """Products with a memory size ordered by their current best price, cheapest first
+
+    Reads the best price the scraper keeps on each product instead of grouping the
+    whole price history, the (gpu_ram, best price, _id) index serves every page.
+    """
+    query = {"specifications.gpu_ram": gpu_ram.upper(), "current_best_price.price": {"$type": "number"}}
+    items, next_cursor = await paginate(
+        db.products, query, [("current_best_price.price", 1), ("_id", 1)], limit, cursor, PRODUCT_FIELDS
+    )
+    return page(items, next_cursor)
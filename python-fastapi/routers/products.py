@@ -0,0 +1,98 @@
+import re
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, DEFAULT_HISTORY_DAYS, PRICE_COLLECTION
+from database import get_db
+from pagination import paginate, paginate_segments
+from responses import MongoJSONResponse, document, page
+
+router = APIRouter(prefix="/products", tags=["products"])
+
+# Listing fields, latest_prices and price_stats are only returned by the detail endpoints
+PRODUCT_FIELDS = {
+    "name": 1, "slug": 1, "category": 1, "brand": 1, "model": 1, "specifications": 1, "current_best_price": 1
+}
+
+
+def object_id(value: str, name: str = "id") -> ObjectId:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+
+
+@router.get("")
+async def search_products(
+    q: Optional[str] = Query(None, description="Case-insensitive substring of the product name"),
+    brand: Optional[str] = None,
+    model: Optional[str] = None,
+    gpu_ram: Optional[str] = Query(None, description="Memory size such as 16GB"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """Search products by name, brand, model and memory size"""
+    query = {}
+    if q:
+        query["name"] = {"$regex": re.escape(q), "$options": "i"}
+    if brand:
+        query["brand"] = brand.lower()
+    if model:
+        query["model"] = model.lower()
+    if gpu_ram:
+        query["specifications.gpu_ram"] = gpu_ram.upper()
+
+    items, next_cursor = await paginate(db.products, query, [("_id", 1)], limit, cursor, PRODUCT_FIELDS)
+    return page(items, next_cursor)
+
+
+@router.get("/{product_id}/prices")
+async def price_history(
+    product_id: str,
+    days: int = Query(DEFAULT_HISTORY_DAYS, ge=1, le=3650),
+    website_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """Price records of the product within the last days, newest first
+
+    Same records as DatabaseOperations.get_recent_prices in the scraper: a change-only record
+    that started before the window but was still seen inside it is included.
+    """
+    since = datetime.now(UTC) - timedelta(days=days)
+    query = {"product_id": object_id(product_id, "product_id")}
+    if website_id is not None:
+        query["website_id"] = object_id(website_id, "website_id")
+
+    # Records of the window come first on (product_id, scraped_at, _id), then the few change-only
+    # records that started before it on (product_id, last_seen_at), see price backend migration 3
+    items, next_cursor = await paginate_segments(
+        db[PRICE_COLLECTION],
+        [
+            {**query, "scraped_at": {"$gte": since}},
+            {**query, "scraped_at": {"$lt": since}, "last_seen_at": {"$gte": since}},
+        ],
+        [("scraped_at", -1), ("_id", -1)], limit, cursor
+    )
+    return page(items, next_cursor)
+
+
+@router.get("/{product_id}/best-price")
+async def best_price(product_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Current best price of the product and the latest price of every website"""
+    product = await db.products.find_one(
+        {"_id": object_id(product_id, "product_id")},
+        {"name": 1, "slug": 1, "current_best_price": 1, "latest_prices": 1}
+    )
+    if product is None:
+        raise HTTPException(status_code=404, detail=f"Product not found: {product_id}")
+
+    product["latest_prices"] = sorted((product.get("latest_prices") or {}).values(), key=lambda entry: entry["price"])
+    return MongoJSONResponse(document(product))
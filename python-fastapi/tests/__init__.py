@@ -0,0 +1 @@
+# Tests package, run from python-fastapi with pytest
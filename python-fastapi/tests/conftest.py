@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from cache import GenerationTracker, MemoryCache
+from config import MONGO_DATABASE
+
+
+@pytest.fixture
+def mongo_client():
+    """Motor-shaped mongomock client, tz_aware like the API's client"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    return mongomock_motor.AsyncMongoMockClient(tz_aware=True)
+
+
+@pytest.fixture
+def db(mongo_client):
+    return mongo_client[MONGO_DATABASE]
+
+
+@pytest.fixture
+def api(mongo_client):
+    """TestClient of the app on the mongomock client, with an empty memory cache"""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    # The lifespan would connect to MongoDB, the client is not entered so it does not run
+    app.state.mongo_client = mongo_client
+    app.state.cache = MemoryCache()
+    app.state.generations = GenerationTracker(refresh_seconds=0)
+    return TestClient(app)
+
+
+def insert(collection, docs):
+    """Insert documents through the async collection, returns their ids"""
+    return asyncio.run(collection.insert_many(docs)).inserted_ids
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from bson import ObjectId
+
+from cache import MemoryCache, _etag, _matches
+from tests.conftest import insert
+
+
+def test_memory_cache_evicts_least_recently_used():
+    async def run():
+        cache = MemoryCache(max_entries=2, ttl=60)
+        await cache.set("a", (b"a", "application/json"))
+        await cache.set("b", (b"b", "application/json"))
+        assert await cache.get("a") == (b"a", "application/json")
+        await cache.set("c", (b"c", "application/json"))
+        return [await cache.get(key) for key in ("a", "b", "c")]
+
+    assert [entry and entry[0] for entry in asyncio.run(run())] == [b"a", None, b"c"]
+
+
+def test_memory_cache_entries_expire():
+    async def run():
+        cache = MemoryCache(max_entries=10, ttl=0.05)
+        await cache.set("a", (b"a", "application/json"))
+        time.sleep(0.1)
+        return await cache.get("a"), len(cache.entries)
+
+    assert asyncio.run(run()) == (None, 0)
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = _etag("/products?", "1:0")
+    assert _matches(etag, etag)
+    assert _matches(f'"other", W/{etag}', etag)
+    assert _matches("*", etag)
+    assert not _matches(None, etag)
+    assert not _matches(_etag("/products?", "1:1"), etag)
+    assert _etag("/products?limit=1", "1:0") != etag
+
+
+def test_responses_are_cached_until_a_website_generation_changes(api, db):
+    [website_id] = insert(db.websites, [{"name": "topachat", "cache_generation": 0}])
+    insert(db.products, [{"name": "RTX 4070", "slug": "rtx-4070"}])
+
+    first = api.get("/products")
+    assert first.headers["X-Cache"] == "MISS"
+    second = api.get("/products")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content and second.headers["ETag"] == first.headers["ETag"]
+
+    not_modified = api.get("/products", headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+
+    # The scraper bumps the generation once a run has written its prices
+    asyncio.run(db.websites.update_one({"_id": website_id}, {"$inc": {"cache_generation": 1}}))
+    third = api.get("/products", headers={"If-None-Match": first.headers["ETag"]})
+    assert third.status_code == 200 and third.headers["X-Cache"] == "MISS"
+    assert third.headers["ETag"] != first.headers["ETag"]
+
+
+def test_errors_and_uncached_paths_are_not_cached(api, db):
+    assert api.get("/").headers.get("X-Cache") is None
+    missing = api.get(f"/products/{ObjectId()}/best-price")
+    assert missing.status_code == 404
+    assert api.get(f"/products/{ObjectId()}/best-price").headers.get("X-Cache") is None
@@ -0,0 +1,56 @@
+from datetime import datetime, UTC
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from pagination import after_cursor, decode_cursor, encode_cursor
+from tests.conftest import insert
+
+SORT = [("current_best_price.price", 1), ("_id", 1)]
+
+
+def test_cursor_round_trip():
+    values = [datetime(2025, 6, 1, tzinfo=UTC), ObjectId()]
+    sort = [("scraped_at", -1), ("_id", -1)]
+    decoded = decode_cursor(encode_cursor(values), sort)
+    assert decoded[1] == values[1]
+    assert decoded[0].replace(tzinfo=UTC) == values[0]
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor([1.0]), encode_cursor([1.0, "not an id"])])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, SORT)
+    assert error.value.status_code == 400
+
+
+def test_after_cursor_breaks_ties_on_id():
+    last_id = ObjectId()
+    assert after_cursor(SORT, [549.0, last_id]) == {"$or": [
+        {"current_best_price.price": {"$gt": 549.0}},
+        {"current_best_price.price": 549.0, "_id": {"$gt": last_id}},
+    ]}
+    assert after_cursor([("_id", -1)], [last_id]) == {"_id": {"$lt": last_id}}
+
+
+def test_cheapest_pages_cover_every_product_once(api, db):
+    prices = [549.0, 549.0, 549.0, 579.0, 599.0, 599.0, 649.0]
+    ids = insert(db.products, [
+        {"name": f"RTX {index}", "specifications": {"gpu_ram": "12GB"}, "current_best_price": {"price": price}}
+        for index, price in enumerate(prices)
+    ])
+    insert(db.products, [{"name": "RTX 4060", "specifications": {"gpu_ram": "8GB"}, "current_best_price": None}])
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = api.get("/gpu-ram/12gb/cheapest", params=params).json()
+        seen.extend(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [item["id"] for item in seen] == [str(product_id) for product_id in ids]
+    assert [item["current_best_price"]["price"] for item in seen] == prices
+    assert api.get("/gpu-ram/12gb/cheapest", params={"cursor": "garbage"}).status_code == 400
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, UTC
+
+from bson import ObjectId
+
+from tests.conftest import insert
+
+
+def test_price_history_pages_through_window_then_carried_records(api, db):
+    now = datetime.now(UTC)
+    product_id, website_id = ObjectId(), ObjectId()
+    price = {"product_id": product_id, "website_id": website_id, "currency": "EUR"}
+    insert(db.prices, [
+        # Started before the window and still seen inside it
+        {**price, "price": 649.0, "scraped_at": now - timedelta(days=40), "last_seen_at": now - timedelta(days=25)},
+        # Before the window
+        {**price, "price": 699.0, "scraped_at": now - timedelta(days=60), "last_seen_at": now - timedelta(days=41)},
+        *({**price, "price": 600.0 + day, "scraped_at": now - timedelta(days=day)} for day in range(1, 6)),
+    ])
+
+    prices, cursor = [], None
+    while True:
+        params = {"days": 30, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = api.get(f"/products/{product_id}/prices", params=params).json()
+        prices.extend(item["price"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert prices == [601.0, 602.0, 603.0, 604.0, 605.0, 649.0]
+
+    # A page ending with the window still links to the carried records
+    first = api.get(f"/products/{product_id}/prices", params={"days": 30, "limit": 5}).json()
+    assert len(first["items"]) == 5 and first["next_cursor"] is not None
+
+    other_website = api.get(f"/products/{product_id}/prices", params={"days": 30, "website_id": str(ObjectId())})
+    assert other_website.json() == {"items": [], "next_cursor": None}
@@ -0,0 +1,10 @@
+"""Benchmarks of the scrape pipeline stages
+
+Run from the tech_price_scraper directory with pytest-benchmark installed:
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:15%
+
+Saved runs carry items_per_second in each benchmark's extra_info. The storage and full
+scrape benchmarks against a real server use the local mongod of tests.TEST_MONGO_CONNECTION
+and are skipped when none is running.
+"""
@@ -0,0 +1,73 @@
+"""Microbenchmark of building storage documents with pydantic models vs slotted records
+
+Run from the tech_price_scraper directory:
+    python -m benchmarks.bench_records
+"""
+
+import timeit
+import tracemalloc
+import warnings
+from datetime import datetime, UTC
+
+from bson import ObjectId
+
+from models import Product, Price, ProductRecord, PriceRecord
+
+PRODUCT_ID = str(ObjectId())
+WEBSITE_ID = str(ObjectId())
+SCRAPED_AT = datetime.now(UTC)
+
+
+def pydantic_documents():
+    product = Product(
+        name='MSI GeForce RTX 4070 VENTUS 2X E 12G OC',
+        slug='msi-geforce-rtx-4070-ventus-2x-e-12g-oc-12gb',
+        category='gpu', brand='nvidia', model='4070',
+        specifications={'gpu_ram': '12GB'}
+    )
+    product_doc = product.dict(by_alias=True, exclude_unset=True)
+    price = Price(
+        product_id=PRODUCT_ID, website_id=WEBSITE_ID, price=599.9, currency='EUR',
+        product_url='https://www.topachat.com/p', availability='in_stock', scraped_at=SCRAPED_AT
+    )
+    price_doc = price.dict(by_alias=True, exclude_unset=True)
+    price_doc['product_id'] = ObjectId(price.product_id)
+    price_doc['website_id'] = ObjectId(price.website_id)
+    return product, price, product_doc, price_doc
+
+
+def record_documents():
+    product = ProductRecord(
+        name='MSI GeForce RTX 4070 VENTUS 2X E 12G OC',
+        slug='msi-geforce-rtx-4070-ventus-2x-e-12g-oc-12gb',
+        category='gpu', brand='nvidia', model='4070',
+        specifications={'gpu_ram': '12GB'}
+    )
+    price = PriceRecord(
+        product_id=PRODUCT_ID, website_id=WEBSITE_ID, price=599.9, currency='EUR',
+        product_url='https://www.topachat.com/p', availability='in_stock', scraped_at=SCRAPED_AT
+    )
+    return product, price, product.to_document(), price.to_document()
+
+
+def peak_allocation(func, count: int = 1000) -> int:
+    """Peak traced bytes per product while keeping count products' objects and documents alive"""
+    tracemalloc.start()
+    kept = [func() for _ in range(count)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return peak // count
+
+
+def main(number: int = 20000):
+    # Product.dict() is the deprecated v1 API the storage path used to call
+    warnings.simplefilter("ignore", DeprecationWarning)
+    for label, func in (("pydantic", pydantic_documents), ("records", record_documents)):
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{label:>9}: {best / number * 1e6:7.2f} us/product, "
+              f"{peak_allocation(func):7d} B/product")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import http.server
+import importlib.util
+import threading
+from datetime import datetime, UTC
+
+import pytest
+
+from benchmarks.fixtures import listing_page
+from tests.conftest import mongomock_db_manager  # noqa: F401 shared fixture
+from tests import TEST_DATABASE_NAME, TEST_MONGO_CONNECTION
+
+# The suite needs pytest-benchmark, without it the benchmark modules are not collected
+if importlib.util.find_spec("pytest_benchmark") is None:
+    collect_ignore_glob = ["test_*.py"]
+
+LISTING_PAGES = 5
+PRODUCTS_PER_PAGE = 60
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    """Store items per second next to the timings so throughput can be compared between runs"""
+    for bench in output_json["benchmarks"]:
+        items = bench["extra_info"].get("items")
+        if items:
+            bench["extra_info"]["items_per_second"] = items / bench["stats"]["mean"]
+
+
+@pytest.fixture(scope="session")
+def listing_html():
+    return listing_page(PRODUCTS_PER_PAGE)
+
+
+@pytest.fixture
+def mongod_db_manager():
+    """DatabaseManager on a scratch database of a local mongod, skipped when none is running"""
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    probe = MongoClient(TEST_MONGO_CONNECTION, serverSelectionTimeoutMS=500)
+    try:
+        probe.admin.command("ping")
+        probe.drop_database(TEST_DATABASE_NAME)
+    except PyMongoError:
+        pytest.skip(f"no mongod at {TEST_MONGO_CONNECTION}")
+    finally:
+        probe.close()
+
+    from database import DatabaseManager, apply_migrations
+    manager = DatabaseManager(TEST_MONGO_CONNECTION, TEST_DATABASE_NAME)
+    # Migrations only run once per process, the database was dropped since
+    apply_migrations(manager)
+    yield manager
+    manager.client.drop_database(TEST_DATABASE_NAME)
+
+
+def insert_test_website(db_ops) -> str:
+    from models import Website
+    return db_ops.insert_website(Website(
+        name="benchmark", display_name="Benchmark", base_url="http://127.0.0.1", created_at=datetime.now(UTC)
+    ))
+
+
+class _FixtureHandler(http.server.BaseHTTPRequestHandler):
+    pages = {}
+
+    def do_GET(self):
+        body = self.pages.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="session")
+def fixture_server():
+    """Local HTTP server serving LISTING_PAGES listing pages, yields their URLs"""
+    paths = [f"/pages/listing_page_{page}.html" for page in range(1, LISTING_PAGES + 1)]
+    _FixtureHandler.pages = {
+        path: listing_page(PRODUCTS_PER_PAGE, seed=page).encode("utf-8") for page, path in enumerate(paths)
+    }
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield [f"http://{host}:{port}{path}" for path in paths]
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,100 @@
+"""Deterministic benchmark inputs shaped like real TopAchat listings"""
+
+import random
+from typing import List
+
+BRANDS = ['ASUS', 'MSI', 'Gigabyte', 'Zotac', 'PNY', 'Sapphire', 'PowerColor', 'XFX', 'ASRock', 'Inno3D',
+          'Palit', 'Gainward', 'KFA2', 'Intel']
+CHIPS = [
+    ('GeForce RTX', ['3050', '3060', '4060', '4060 Ti', '4070', '4070 SUPER', '4070 Ti SUPER', '4080 SUPER', '4090',
+                     '5070', '5080', '5090']),
+    ('GeForce GTX', ['1650', '1660 SUPER', '1660 Ti']),
+    ('Radeon RX', ['6600', '7600', '7600 XT', '7700 XT', '7800 XT', '7900 GRE', '7900 XTX', '9070 XT']),
+    ('Arc', ['A580', 'A750', 'A770', 'B580']),
+]
+SERIES = ['VENTUS 2X', 'GAMING X TRIO', 'TUF Gaming OC', 'ROG STRIX', 'EAGLE', 'AERO OC', 'Trinity', 'Dual',
+          'PULSE', 'NITRO+', 'Hellhound', 'Challenger', 'Phantom', 'Windforce']
+MEMORY = ['8', '12', '16', '20', '24', '32']
+AVAILABILITY = ['En stock', 'Rupture de stock', 'Précommande', 'Sur commande', 'Épuisé']
+OTHER_PRODUCTS = ["Câble d'alimentation 12VHPWR 600W", 'Support de carte graphique ARGB',
+                  "Kit de refroidissement pour GPU", 'Riser PCI-Express 4.0 x16 20 cm']
+
+
+def product_names(count: int, seed: int = 0) -> List[str]:
+    """Product names of a realistic mix of GPUs and accessories"""
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        if rng.random() < 0.08:
+            names.append(rng.choice(OTHER_PRODUCTS))
+            continue
+        family, models = rng.choice(CHIPS)
+        names.append(f"{rng.choice(BRANDS)} {family} {rng.choice(models)} {rng.choice(SERIES)} "
+                     f"{rng.choice(MEMORY)}G{rng.choice(['', ' OC', ' LHR'])}")
+    return names
+
+
+def memory_labels(count: int, seed: int = 0) -> List[str]:
+    """Product sublabels carrying the memory size in the formats seen on listings"""
+    rng = random.Random(seed)
+    formats = ['{} Go GDDR6X - PCI-Express 4.0 - DLSS 3', '{}GB GDDR6 - PCI-Express 4.0', 'Carte graphique {} Go GDDR6',
+               '{} gb GDDR7 - PCI-Express 5.0']
+    return [rng.choice(formats).format(rng.choice(MEMORY)) for _ in range(count)]
+
+
+def _card(index: int, name: str, sublabel: str, rng: random.Random) -> str:
+    price = f"{rng.randint(150, 2500)},{rng.randint(0, 99):02d}&nbsp;€"
+    if rng.random() < 0.03:
+        price = 'Prix indisponible'
+    return f"""
+    <section class="product-list__product-wrapper">
+        <article class="product grille-produit" data-position="{index}">
+            <a class="product__link" href="/pages/detail2_cat_est_micro_puis_rubrique_est_wgfx_pcie_puis_ref_est_in2{index:07d}.html">
+                <picture class="product__picture"><img src="/boutique/img/in2{index:07d}.jpg" alt="{name}" loading="lazy"></picture>
+                <div class="product__label">{name}</div>
+                <div class="product__sublabel">{sublabel}</div>
+            </a>
+            <ul class="product__rating"><li class="star"></li><li class="star"></li><li class="star"></li></ul>
+            <div class="product__price">{price}</div>
+            <div class="product__dispo dispo">{rng.choice(AVAILABILITY)}</div>
+            <button class="product__basket" data-ref="in2{index:07d}">Ajouter au panier</button>
+            <script>trackProduct("in2{index:07d}");</script>
+        </article>
+    </section>"""
+
+
+def listing_page(products: int = 60, seed: int = 0) -> str:
+    """A listing page with the product count, navigation and scripts of a real TopAchat page"""
+    rng = random.Random(seed)
+    names = product_names(products, seed)
+    sublabels = [
+        'Longueur 30 cm' if name in OTHER_PRODUCTS else label
+        for name, label in zip(names, memory_labels(products, seed))
+    ]
+    menu = "\n".join(
+        f'<li class="menu__item"><a href="/pages/produits_cat_est_micro_puis_rubrique_est_{i}.html">Rubrique {i}</a></li>'
+        for i in range(400)
+    )
+    filters = "\n".join(
+        f'<label class="filter"><input type="checkbox" name="f{i}">Filtre {i} ({rng.randint(1, 200)})</label>'
+        for i in range(300)
+    )
+    inline_script = "var catalog = {" + ",".join(f'"k{i}": {i}' for i in range(3000)) + "};"
+    cards = "".join(_card(index, name, sublabel, rng) for index, (name, sublabel) in enumerate(zip(names, sublabels)))
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="utf-8">
+    <title>Cartes graphiques PCI-Express | TopAchat</title>
+    <style>.product{{display:block}} .menu__item{{display:inline}}</style>
+    <script>{inline_script}</script>
+</head>
+<body>
+<header class="header"><a href="/">TopAchat</a><nav><ul class="menu">{menu}</ul></nav></header>
+<aside class="filters">{filters}</aside>
+<main class="product-list">{cards}
+</main>
+<footer class="footer"><a href="/pages/cgv.html">CGV</a></footer>
+</body>
+</html>
+"""
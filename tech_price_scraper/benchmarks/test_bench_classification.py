@@ -0,0 +1,43 @@
+import pytest
+
+from benchmarks.fixtures import memory_labels, product_names
+from scrapers.parser import ProductParser
+
+CORPUS_SIZE = 20000
+
+
+@pytest.fixture(scope="module")
+def names():
+    return product_names(CORPUS_SIZE)
+
+
+@pytest.fixture(scope="module")
+def labels():
+    return memory_labels(CORPUS_SIZE)
+
+
+def test_parse_brand_model(benchmark, names):
+    parser = ProductParser()
+    benchmark.group = "classification"
+    benchmark.extra_info["items"] = len(names)
+
+    results = benchmark(lambda: [parser.parse_brand_model(name) for name in names])
+    assert len(results) == len(names)
+
+
+def test_extract_memory(benchmark, labels):
+    parser = ProductParser()
+    benchmark.group = "classification"
+    benchmark.extra_info["items"] = len(labels)
+
+    results = benchmark(lambda: [parser.extract_memory(label) for label in labels])
+    assert any(results)
+
+
+def test_classify_many(benchmark, names):
+    classifier = ProductParser().classifier
+    benchmark.group = "classification"
+    benchmark.extra_info["items"] = len(names)
+
+    results = benchmark(classifier.classify_many, names)
+    assert len(results) == len(names)
@@ -0,0 +1,44 @@
+import asyncio
+
+from scrapers.async_web_client import AsyncWebClient
+from scrapers.parser import ProductParser
+from scrapers.topachat import TopAchatScraper
+from database.operations import DatabaseOperations
+from benchmarks.conftest import LISTING_PAGES
+
+
+def test_fetch_and_parse(benchmark, fixture_server):
+    """Concurrent fetch of every listing page from the local server, then parsing"""
+    parser = ProductParser()
+    benchmark.group = "end to end"
+    benchmark.extra_info["items"] = LISTING_PAGES
+
+    async def fetch_and_parse():
+        client = AsyncWebClient(rate_limit_ms=0, max_retries=1, max_concurrency=LISTING_PAGES)
+        try:
+            responses = await client.get_many(fixture_server)
+        finally:
+            await client.close()
+        return [parser.parse_topachat_listings(response.text, response.url) for response in responses]
+
+    pages = benchmark(lambda: asyncio.run(fetch_and_parse()))
+    assert all(pages)
+
+
+def test_scrape_listings_mongod(benchmark, fixture_server, mongod_db_manager, tmp_path, monkeypatch):
+    """Full TopAchat scrape of the local server into a local mongod"""
+    # The validator cache and page archive use paths relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    db_ops = DatabaseOperations(mongod_db_manager)
+    benchmark.group = "end to end"
+    benchmark.extra_info["items"] = LISTING_PAGES
+
+    def scrape():
+        scraper = TopAchatScraper(db_ops)
+        scraper.validator_cache.entries.clear()
+        scraper._build_page_url = lambda page: fixture_server[page - 1]
+        scraper.async_web_client = AsyncWebClient(rate_limit_ms=0, max_retries=1, max_concurrency=LISTING_PAGES)
+        return asyncio.run(scraper.scrape_listings_async(max_pages=LISTING_PAGES))
+
+    result = benchmark.pedantic(scrape, rounds=5)
+    assert result.success and result.products_processed
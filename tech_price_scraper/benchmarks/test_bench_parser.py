@@ -0,0 +1,15 @@
+import pytest
+
+from scrapers.parser import ProductParser
+
+PAGE_URL = "https://www.topachat.com/pages/produits_cat_est_micro_puis_rubrique_est_wgfx_pcie.html"
+
+
+@pytest.mark.parametrize("engine", ["lxml", "soup"])
+def test_parse_topachat_listings(benchmark, listing_html, engine):
+    parser = ProductParser(engine=engine)
+    benchmark.group = "parse page"
+    benchmark.extra_info["items"] = 1
+
+    products = benchmark(parser.parse_topachat_listings, listing_html, PAGE_URL)
+    assert products
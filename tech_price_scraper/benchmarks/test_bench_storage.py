@@ -0,0 +1,61 @@
+from datetime import datetime, UTC
+
+from scrapers.parser import ProductParser
+from scrapers.storage import DataStorage
+from database.operations import DatabaseOperations
+from benchmarks.conftest import insert_test_website
+
+PAGE_URL = "https://www.topachat.com/pages/produits_cat_est_micro_puis_rubrique_est_wgfx_pcie.html"
+
+
+def parsed_page(listing_html):
+    parser = ProductParser()
+    # Accessories matching a GPU keyword have no memory size and cannot be slugged, the scraper
+    # records them as errors, keep them out of the timed storage path
+    products = [product for product in parser.parse_topachat_listings(listing_html, PAGE_URL) if product["gpu_ram"]]
+    return parser, products
+
+
+def test_prepare_page(benchmark, listing_html, mongomock_db_manager):
+    parser, products = parsed_page(listing_html)
+    storage = DataStorage(DatabaseOperations(mongomock_db_manager))
+    benchmark.group = "storage"
+    benchmark.extra_info["items"] = len(products)
+
+    prepared = benchmark(lambda: [storage.prepare_product_data(product, parser) for product in products])
+    assert all(prepared)
+
+
+def test_upsert_and_insert_page_mongomock(benchmark, listing_html, mongomock_db_manager):
+    """Products bulk upsert and prices insert, the latest-price pipeline update needs a real mongod"""
+    parser, products = parsed_page(listing_html)
+    db_ops = DatabaseOperations(mongomock_db_manager)
+    storage = DataStorage(db_ops)
+    website_id = insert_test_website(db_ops)
+    prepared = [storage.prepare_product_data(product, parser) for product in products]
+    benchmark.group = "storage"
+    benchmark.extra_info["items"] = len(prepared)
+
+    def store():
+        upserted = db_ops.bulk_upsert_products([product for product, _ in prepared])
+        prices = [
+            storage._build_price(product, product_data, product_id, website_id, scraped_at)
+            for (product, product_data), (product_id, _) in zip(prepared, upserted)
+        ]
+        return db_ops.insert_prices(prices)
+
+    scraped_at = datetime.now(UTC)
+    price_ids = benchmark(store)
+    assert len(price_ids) == len(prepared)
+
+
+def test_store_page_mongod(benchmark, listing_html, mongod_db_manager):
+    parser, products = parsed_page(listing_html)
+    db_ops = DatabaseOperations(mongod_db_manager)
+    storage = DataStorage(db_ops)
+    website_id = insert_test_website(db_ops)
+    benchmark.group = "storage"
+    benchmark.extra_info["items"] = len(products)
+
+    stored = benchmark(storage.store_products_batch, products, website_id, parser)
+    assert stored
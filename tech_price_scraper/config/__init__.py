@@ -4,12 +4,64 @@
 # Database configuration
 DEFAULT_MONGO_CONNECTION = "mongodb://localhost:27017/"
 DEFAULT_DATABASE_NAME = "tech_prices"
+DEFAULT_PRICE_BACKEND = "documents"  # documents or timeseries, see database.price_backends
+DEFAULT_CHANGE_ONLY_PRICES = False  # store a price only when price or availability changes
+DEFAULT_SLUG_CACHE_SIZE = 50000  # slug -> product id entries kept in memory
+
+# MongoClient pool shared by the whole process, see database.connection.get_client
+MONGO_MAX_POOL_SIZE = 50
+MONGO_MIN_POOL_SIZE = 0
+MONGO_MAX_IDLE_TIME_MS = 300000
+MONGO_CONNECT_TIMEOUT_MS = 5000
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 5000
+MONGO_SOCKET_TIMEOUT_MS = 30000
+MONGO_WRITE_CONCERN = 1  # w option, "majority" for replica sets
+MONGO_JOURNAL = False
+MONGO_COMPRESSORS = ["zstd", "snappy", "zlib"]  # in preference order, unavailable ones are skipped
 
 # Scraping configuration
 DEFAULT_RATE_LIMIT_MS = 5000
+# Adaptive rate control bounds, websites override them in scraping_config
+DEFAULT_MIN_RATE_LIMIT_MS = 1000
+DEFAULT_MAX_RATE_LIMIT_MS = 60000
+DEFAULT_FAST_RESPONSE_MS = 1000  # responses faster than this count as healthy
+DEFAULT_SLOW_RESPONSE_MS = 5000  # responses slower than this mean the site is struggling
+DEFAULT_MAX_RETRY_AFTER_SECONDS = 300
 DEFAULT_MAX_RETRIES = 3
-DEFAULT_MAX_PAGES = 3
+DEFAULT_MAX_PAGES = 3  # pages walked when the listing has no pagination links
+DEFAULT_MAX_LISTING_PAGES = 50  # cap on the last page read from the pagination links
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_SITE_TIMEOUT_SECONDS = 900
+DEFAULT_PARSE_WORKERS = 2
+DEFAULT_PIPELINE_QUEUE_SIZE = 16
+DEFAULT_HTTP_CACHE_PATH = "cache/http_validators.json"
+DEFAULT_ARCHIVE_PATH = "archive"
+
+# Metrics configuration, see utils.metrics
+DEFAULT_METRICS_PATH = "metrics/scraper.prom"
+DEFAULT_SPANS_PATH = "metrics/spans.jsonl"
+METRICS_RECORD_SPANS = True  # per URL/page/operation spans in addition to the aggregated histograms
+
+# Price rollup configuration, see database.rollups
+DEFAULT_ROLLUP_LAG_SECONDS = 60  # records inserted more recently wait for the next rollup
+
+# Retention configuration, see database.retention
+DEFAULT_RETENTION_DAYS = None  # days of raw prices kept, None keeps everything; trimmed after each run when set
+DEFAULT_RETENTION_DOWNSAMPLE = True  # keep the daily min/max/last of deleted prices in price_daily
+DEFAULT_RETENTION_BATCH_SIZE = 1000  # prices deleted per _id-range chunk
+DEFAULT_RETENTION_PAUSE_SECONDS = 0.5  # pause between chunks
+
+# Export configuration, see database.export
+DEFAULT_EXPORT_DIR = "exports"
+DEFAULT_EXPORT_BATCH_SIZE = 5000  # prices per cursor batch, CSV write and Parquet row group
+DEFAULT_EXPORT_LAG_SECONDS = 60  # incremental exports leave records younger than this to the next one
 
-# Logging configuration
+# Logging configuration, see utils.logging
 DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_LOG_FILE = "logs/scraper.log"
+DEFAULT_LOG_FORMAT = "text"  # text or json (one object per line)
+DEFAULT_LOG_ROTATION = "size"  # size or time
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_ROTATE_WHEN = "midnight"
+DEFAULT_LOG_BACKUP_COUNT = 10
 
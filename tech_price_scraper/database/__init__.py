@@ -1,5 +1,22 @@
-from database.connection import DatabaseManager
+from database.connection import DatabaseManager, get_client, close_clients
+from database.migrations import apply_migrations
 from database.operations import DatabaseOperations
+from database.rollups import PriceRollup
+from database.export import PriceExporter
+from database.retention import PriceRetention
+from database.price_backends import DocumentPriceBackend, TimeSeriesPriceBackend, get_price_backend, migrate_prices
 
-__all__ = ['DatabaseManager', 'DatabaseOperations']
-
+__all__ = [
+    'DatabaseManager',
+    'get_client',
+    'close_clients',
+    'apply_migrations',
+    'DatabaseOperations',
+    'PriceRollup',
+    'PriceExporter',
+    'PriceRetention',
+    'DocumentPriceBackend',
+    'TimeSeriesPriceBackend',
+    'get_price_backend',
+    'migrate_prices'
+]
@@ -1,47 +1,93 @@
 from pymongo import MongoClient
+from typing import Dict, List
+import atexit
+import importlib.util
 import logging
+import threading
+
+from config import (
+    DEFAULT_MONGO_CONNECTION, DEFAULT_DATABASE_NAME, DEFAULT_PRICE_BACKEND,
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS, MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS, MONGO_WRITE_CONCERN, MONGO_JOURNAL,
+    MONGO_COMPRESSORS
+)
+from database.migrations import ensure_schema
+from database.price_backends import get_price_backend
 
 logger = logging.getLogger(__name__)
 
+_clients: Dict[str, MongoClient] = {}
+_clients_lock = threading.Lock()
+
+
+def available_compressors(preferred: List[str] = MONGO_COMPRESSORS) -> List[str]:
+    """Wire compressors from preferred whose Python package is installed"""
+    # zlib ships with Python, the others need their optional package
+    modules = {"zstd": "zstandard", "snappy": "snappy"}
+    return [
+        compressor for compressor in preferred
+        if compressor not in modules or importlib.util.find_spec(modules[compressor]) is not None
+    ]
+
+
+def client_options() -> Dict:
+    """MongoClient keyword arguments built from config"""
+    options = {
+        "appname": "tech_price_scraper",
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "w": MONGO_WRITE_CONCERN,
+        "journal": MONGO_JOURNAL,
+    }
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+def get_client(connection_string: str = DEFAULT_MONGO_CONNECTION) -> MongoClient:
+    """Process-wide MongoClient for a connection string, every caller shares its pool"""
+    client = _clients.get(connection_string)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(connection_string)
+            if client is None:
+                client = MongoClient(connection_string, **client_options())
+                _clients[connection_string] = client
+                logger.info("MongoClient created with pool size %s", MONGO_MAX_POOL_SIZE)
+    return client
+
+
+def close_clients():
+    """Close every shared MongoClient, called at interpreter exit"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+atexit.register(close_clients)
+
 
 class DatabaseManager:
     """Manages MongoDB connection and basic setup"""
     
-    def __init__(self, connection_string: str = "mongodb://localhost:27017/", database_name: str = "tech_prices"):
-        self.client = MongoClient(connection_string)
+    def __init__(self, connection_string: str = DEFAULT_MONGO_CONNECTION, database_name: str = DEFAULT_DATABASE_NAME,
+                 price_backend: str = DEFAULT_PRICE_BACKEND):
+        self.client = get_client(connection_string)
         self.db = self.client[database_name]
         self.products = self.db.products
-        self.prices = self.db.prices
+        self.price_backend = get_price_backend(price_backend, self.db)
+        self.prices = self.price_backend.collection
         self.websites = self.db.websites
         
-        # Create indexes on initialization
-        self._create_indexes()
-    
-    def _create_indexes(self):
-        """Create necessary indexes for optimal performance"""
-        try:
-            # Products collection indexes
-            self.products.create_index([("category", 1), ("brand", 1)])
-            self.products.create_index([("slug", 1)], unique=True)
-            self.products.create_index([("current_best_price.price", 1)])
-            self.products.create_index([("name", "text"), ("brand", "text"), ("model", "text")])
-            
-            # Prices collection indexes
-            self.prices.create_index([("product_id", 1), ("scraped_at", -1)])
-            self.prices.create_index([("website_id", 1), ("scraped_at", -1)])
-            self.prices.create_index([("scraped_at", -1)])
-            self.prices.create_index([("product_id", 1), ("website_id", 1), ("scraped_at", -1)])
-            self.prices.create_index([("price", 1), ("currency", 1), ("scraped_at", -1)])
-            
-            # Websites collection indexes
-            self.websites.create_index([("name", 1)], unique=True)
-            self.websites.create_index([("active", 1)])
-            
-            logger.info("Database indexes created successfully")
-        except Exception as e:
-            logger.exception(f"Error creating indexes: {e}")
+        # Collections and indexes are created by versioned migrations, once per process
+        ensure_schema(self)
     
     def close(self):
-        """Close database connection"""
-        self.client.close()
-
+        """Release the manager, the shared client stays open for other managers until exit"""
+        self.client = None
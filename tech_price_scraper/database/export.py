@@ -0,0 +1,257 @@
+import csv
+import gzip
+import logging
+import os
+from datetime import datetime, timedelta, UTC
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from config import DEFAULT_EXPORT_BATCH_SIZE, DEFAULT_EXPORT_LAG_SECONDS
+from database.operations import _as_utc
+from database.rollups import _batched
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency, only CSV exports are available
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+# Columns of every export, prices joined with their product and website
+COLUMNS = (
+    "price_id", "product_id", "product_name", "slug", "brand", "model", "gpu_ram",
+    "website_id", "website", "price", "currency", "availability", "product_url",
+    "scraped_at", "last_seen_at"
+)
+
+
+def _parquet_schema():
+    timestamp = pyarrow.timestamp("us", tz="UTC")
+    types = {"price": pyarrow.float64(), "scraped_at": timestamp, "last_seen_at": timestamp}
+    return pyarrow.schema([(column, types.get(column, pyarrow.string())) for column in COLUMNS])
+
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        opener = gzip.open if path.endswith(".gz") else open
+        self.file = opener(path, "wt", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, rows: List[Dict]):
+        self.writer.writerows(
+            [_csv_value(row[column]) for column in COLUMNS] for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return _as_utc(value).isoformat()
+    return value
+
+
+class _ParquetWriter:
+    """One row group per batch, so memory stays bounded by the batch size"""
+
+    def __init__(self, path: str):
+        self.schema = _parquet_schema()
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows: List[Dict]):
+        columns = {column: [row[column] for row in rows] for column in COLUMNS}
+        self.writer.write_table(pyarrow.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class PriceExporter:
+    """Stream the price history joined with product metadata into CSV or Parquet files
+
+    Prices are read through a server-side cursor and written batch by batch, products of a
+    batch are fetched with one query, so memory does not grow with the history.
+
+    Incremental exports follow insertion order rather than observation time: each one reads
+    the records with an _id above the largest one exported with the same website filter, so
+    records stored late with older timestamps, like replayed pages, are not missed. A
+    change-only record seen again since the previous export is exported again with its new
+    last_seen_at and is identified by price_id. Records inserted or seen again within the last
+    lag_seconds are left to the next export, so writes still in flight are not skipped.
+    """
+
+    state_collection = "export_state"
+
+    def __init__(self, db_manager, batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+                 lag_seconds: int = DEFAULT_EXPORT_LAG_SECONDS):
+        self.db = db_manager.db
+        self.products = db_manager.products
+        self.prices = db_manager.prices
+        self.websites = db_manager.websites
+        self.state = self.db[self.state_collection]
+        self.batch_size = batch_size
+        self.lag_seconds = lag_seconds
+
+    @staticmethod
+    def _state_id(website: Optional[str]) -> str:
+        return f"prices:{website or 'all'}"
+
+    def get_watermark(self, website: Optional[str] = None) -> Optional[datetime]:
+        """Records seen again after this time are exported again by the next incremental export"""
+        state = self.state.find_one({"_id": self._state_id(website)})
+        return _as_utc(state["watermark"]) if state and state.get("watermark") else None
+
+    def get_last_id(self, website: Optional[str] = None) -> Optional[ObjectId]:
+        """Largest _id exported incrementally, every record with a smaller _id has been exported"""
+        state = self.state.find_one({"_id": self._state_id(website)}) or {}
+        if state.get("last_id") is None and state.get("watermark") is not None:
+            # State written before incremental exports followed insertion order
+            return ObjectId.from_datetime(state["watermark"])
+        return state.get("last_id")
+
+    @staticmethod
+    def _query(since: Optional[datetime], until: Optional[datetime], website_id) -> Dict:
+        query = {}
+        window = {}
+        if since is not None:
+            window["$gte"] = since
+        if until is not None:
+            window["$lt"] = until
+        if window:
+            query["scraped_at"] = window
+        if website_id is not None:
+            query["website_id"] = website_id
+        return query
+
+    @staticmethod
+    def _incremental_query(since: Optional[datetime], last_id: Optional[ObjectId], watermark: Optional[datetime],
+                           observed_before: datetime, website_id) -> Dict:
+        # ObjectIds hold whole seconds, ids of the second observed_before falls in wait too
+        inserted = {"_id": {"$lt": ObjectId.from_datetime(observed_before)}}
+        if last_id is not None:
+            inserted["_id"]["$gt"] = last_id
+        elif since is not None:
+            # The first export starts at since
+            inserted["scraped_at"] = {"$gte": since}
+
+        query = inserted
+        if last_id is not None and watermark is not None:
+            query = {"$or": [
+                inserted,
+                {"_id": {"$lte": last_id}, "last_seen_at": {"$gt": watermark, "$lte": observed_before}}
+            ]}
+        if website_id is not None:
+            query = {**query, "website_id": website_id}
+        return query
+
+    def export(self, path: str, export_format: Optional[str] = None, since: Optional[datetime] = None,
+               until: Optional[datetime] = None, website: Optional[str] = None,
+               incremental: bool = False) -> Dict:
+        """Write the prices matching the filters to path, returns counters of the export
+
+        since is inclusive and until exclusive. An incremental export covers the records
+        inserted or seen again since the previous one, or since since for the first export,
+        its state is only stored once the file is complete. It has no until, it always runs
+        up to lag_seconds before its start.
+        """
+        export_format = export_format or ("parquet" if path.endswith(".parquet") else "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        if export_format == "parquet" and pyarrow is None:
+            raise ValueError("Parquet exports require the pyarrow package")
+
+        website_id = None
+        if website is not None:
+            doc = self.websites.find_one({"name": website}, {"_id": 1})
+            if doc is None:
+                raise ValueError(f"Unknown website: {website}")
+            website_id = doc["_id"]
+
+        last_id = None
+        if incremental:
+            if until is not None:
+                raise ValueError("Incremental exports run up to the latest stored prices, until is not supported")
+            last_id = self.get_last_id(website)
+            watermark = self.get_watermark(website)
+            until = datetime.now(UTC) - timedelta(seconds=self.lag_seconds)
+            logger.info("Exporting prices inserted after %s or seen again after %s", last_id, watermark)
+            query = self._incremental_query(since, last_id, watermark, until, website_id)
+            since = watermark or since
+        else:
+            query = self._query(since, until, website_id)
+
+        cursor = self.prices.find(query).batch_size(self.batch_size)
+        website_names = {doc["_id"]: doc["name"] for doc in self.websites.find({}, {"name": 1})}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        writer = _ParquetWriter(tmp_path) if export_format == "parquet" else _CsvWriter(tmp_path)
+        rows = 0
+        completed = False
+        try:
+            for batch in _batched(cursor, self.batch_size):
+                writer.write(self._rows(batch, website_names))
+                rows += len(batch)
+                batch_last_id = max(price["_id"] for price in batch)
+                if last_id is None or batch_last_id > last_id:
+                    last_id = batch_last_id
+                logger.debug("Exported %s prices to %s", rows, path)
+            completed = True
+        finally:
+            cursor.close()
+            writer.close()
+            if not completed:
+                os.remove(tmp_path)
+        os.replace(tmp_path, path)
+
+        if incremental:
+            self.state.update_one(
+                {"_id": self._state_id(website)},
+                {"$set": {"watermark": until, "last_id": last_id, "path": path, "rows": rows,
+                          "updated_at": datetime.now(UTC)}},
+                upsert=True
+            )
+        logger.info("Exported %s prices to %s", rows, path)
+        return {"rows": rows, "since": since, "until": until}
+
+    def _rows(self, prices: List[Dict], website_names: Dict) -> List[Dict]:
+        products = {
+            doc["_id"]: doc
+            for doc in self.products.find(
+                {"_id": {"$in": list({price["product_id"] for price in prices})}},
+                {"name": 1, "slug": 1, "brand": 1, "model": 1, "specifications.gpu_ram": 1}
+            )
+        }
+
+        rows = []
+        for price in prices:
+            product = products.get(price["product_id"], {})
+            rows.append({
+                "price_id": str(price["_id"]),
+                "product_id": str(price["product_id"]),
+                "product_name": product.get("name"),
+                "slug": product.get("slug"),
+                # Records written before denormalization fall back to the product
+                "brand": price.get("brand", product.get("brand")),
+                "model": price.get("model", product.get("model")),
+                "gpu_ram": price.get("gpu_ram", product.get("specifications", {}).get("gpu_ram")),
+                "website_id": str(price["website_id"]),
+                "website": website_names.get(price["website_id"]),
+                "price": price["price"],
+                "currency": price.get("currency"),
+                "availability": price.get("availability"),
+                "product_url": price.get("product_url"),
+                "scraped_at": price.get("scraped_at"),
+                "last_seen_at": price.get("last_seen_at"),
+            })
+        return rows
@@ -0,0 +1,127 @@
+from datetime import datetime, UTC
+from typing import Callable, List, Tuple
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+Migration = Tuple[int, str, Callable]
+
+
+def _create_core_indexes(db_manager):
+    # Products collection indexes
+    db_manager.products.create_index([("category", 1), ("brand", 1)])
+    db_manager.products.create_index([("slug", 1)], unique=True)
+    db_manager.products.create_index([("current_best_price.price", 1)])
+    db_manager.products.create_index([("name", "text"), ("brand", "text"), ("model", "text")])
+
+    # Websites collection indexes
+    db_manager.websites.create_index([("name", 1)], unique=True)
+    db_manager.websites.create_index([("active", 1)])
+
+
+def _create_rollup_indexes(db_manager):
+    db_manager.db.price_daily.create_index([("product_id", 1), ("day", -1)])
+    db_manager.db.price_daily.create_index([("gpu_ram", 1), ("day", -1)])
+
+
+def _create_read_api_indexes(db_manager):
+    # Cheapest products by memory size with keyset pagination, see python-fastapi
+    db_manager.products.create_index([("specifications.gpu_ram", 1), ("current_best_price.price", 1), ("_id", 1)])
+
+
+def _create_facet_indexes(db_manager):
+    # One document per (gpu_ram, model, brand), see DatabaseOperations.record_price_facets
+    db_manager.db.price_facets.create_index([("gpu_ram", 1), ("model", 1), ("brand", 1)], unique=True)
+    db_manager.db.price_facets.create_index([("brand", 1), ("model", 1)])
+
+
+def _create_product_facet_indexes(db_manager):
+    # Products counted per facet after retention, see DatabaseOperations.refresh_price_facets
+    db_manager.products.create_index([("specifications.gpu_ram", 1), ("model", 1), ("brand", 1)])
+
+
+def _create_recent_products_index(db_manager):
+    # Most recently updated products first, see SlugCache.warm
+    db_manager.products.create_index([("updated_at", -1)])
+
+
+# Append new migrations with the next version, never edit an applied one
+CORE_MIGRATIONS: List[Migration] = [
+    (1, "products and websites indexes", _create_core_indexes),
+    (2, "price rollup indexes", _create_rollup_indexes),
+    (3, "read API indexes", _create_read_api_indexes),
+    (4, "price facet indexes", _create_facet_indexes),
+    (5, "product facet indexes", _create_product_facet_indexes),
+    (6, "recently updated products index", _create_recent_products_index),
+]
+
+
+def _price_backend_migrations(backend) -> List[Migration]:
+    def create_price_history(db_manager):
+        backend.create_collection()
+        backend.create_indexes()
+
+    def create_facet_indexes(db_manager):
+        backend.create_facet_indexes()
+
+    def create_history_indexes(db_manager):
+        backend.create_history_indexes()
+
+    return [
+        (1, f"{backend.collection_name} collection and indexes", create_price_history),
+        (2, f"{backend.collection_name} facet indexes", create_facet_indexes),
+        (3, f"{backend.collection_name} price history indexes", create_history_indexes),
+    ]
+
+
+def apply_migrations(db_manager) -> int:
+    """Apply pending migrations of every scope in version order, returns the number applied"""
+    state = db_manager.db.schema_migrations
+    backend = db_manager.price_backend
+    scopes = [
+        ("core", CORE_MIGRATIONS),
+        (f"prices:{backend.name}", _price_backend_migrations(backend)),
+    ]
+
+    applied = 0
+    for scope, migrations in scopes:
+        current = (state.find_one({"_id": scope}) or {}).get("version", 0)
+        for version, description, migrate in migrations:
+            if version <= current:
+                continue
+            logger.info("Applying %s migration %s: %s", scope, version, description)
+            migrate(db_manager)
+            state.update_one(
+                {"_id": scope},
+                {
+                    "$set": {"version": version},
+                    "$push": {"applied": {"version": version, "description": description,
+                                          "applied_at": datetime.now(UTC)}}
+                },
+                upsert=True
+            )
+            applied += 1
+    return applied
+
+
+_ready = set()
+_ready_lock = threading.Lock()
+
+
+def ensure_schema(db_manager):
+    """Apply pending migrations once per process and database"""
+    key = (id(db_manager.client), db_manager.db.name, db_manager.price_backend.name)
+    if key in _ready:
+        return
+
+    with _ready_lock:
+        if key in _ready:
+            return
+        try:
+            applied = apply_migrations(db_manager)
+            if applied:
+                logger.info("Applied %s schema migrations to %s", applied, db_manager.db.name)
+            _ready.add(key)
+        except Exception as e:
+            logger.exception("Error applying schema migrations: %s", e)
@@ -1,40 +1,82 @@
 from bson import ObjectId
 from pymongo.errors import DuplicateKeyError
-from pymongo import ReturnDocument
-from typing import List, Dict, Optional
+from pymongo import DeleteOne, ReturnDocument, UpdateMany, UpdateOne
+from typing import Iterable, List, Dict, Optional, Set, Tuple, Union
 from datetime import datetime, timedelta, UTC
 import logging
 
-from models import Website, Product, Price
+from config import DEFAULT_SLUG_CACHE_SIZE
+from database.slug_cache import SlugCache
+from models import Website, Product, Price, ProductRecord, PriceRecord
+from utils.metrics import timed
 
 logger = logging.getLogger(__name__)
 
+# Storage methods accept validated models or the lightweight records of the ingestion path
+ProductLike = Union[Product, ProductRecord]
+PriceLike = Union[Price, PriceRecord]
+
+
+def _as_utc(value: datetime) -> datetime:
+    # pymongo returns naive UTC datetimes unless the client is tz_aware
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
+def bump_cache_generations(websites) -> int:
+    """Invalidate read caches over every website's prices, returns the websites bumped
+
+    For writes that are not a scrape run of one website, see DatabaseOperations.bump_cache_generation.
+    """
+    return websites.update_many({}, {"$inc": {"cache_generation": 1}}).modified_count
+
 
 class DatabaseOperations:
     """Database operations for CRUD and data management"""
 
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, slug_cache_size: int = DEFAULT_SLUG_CACHE_SIZE):
         self.db_manager = db_manager
         self.products = db_manager.products
         self.prices = db_manager.prices
+        self.price_backend = db_manager.price_backend
         self.websites = db_manager.websites
+        self.price_facets = db_manager.db.price_facets
+        self._website_names: Dict[str, str] = {}
+        self.slug_cache = SlugCache(slug_cache_size)
 
     # --- Website operations ---
     def insert_website(self, website: Website) -> str:
+        return self.ensure_website(website).id
+
+    @timed("db")
+    def ensure_website(self, website: Website) -> Website:
+        """Insert a website with its default configuration and return the stored document
+
+        The defaults only seed a new website and the scraping_config keys missing from a
+        stored one, so configuration edited in the database is kept.
+        """
+        website_dict = website.dict(by_alias=True, exclude={"id"}, exclude_unset=True)
         try:
-            website_dict = website.dict(by_alias=True, exclude_unset=True)
-            result = self.websites.insert_one(website_dict)
-            return str(result.inserted_id)
+            doc = self.websites.find_one_and_update(
+                {"name": website.name}, {"$setOnInsert": website_dict},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
         except DuplicateKeyError:
-            existing = self.websites.find_one({"name": website.name})
-            if existing:
-                self.websites.update_one(
-                    {"name": website.name},
-                    {"$set": website.dict(exclude={"_id", "created_at"}, exclude_unset=True)}
-                )
-                return str(existing["_id"])
-            raise
+            # Another process inserted the website first
+            doc = self.websites.find_one({"name": website.name})
+
+        stored_config = doc.get("scraping_config") or {}
+        missing = {
+            f"scraping_config.{key}": value
+            for key, value in website.scraping_config.items() if key not in stored_config
+        }
+        if missing:
+            doc = self.websites.find_one_and_update(
+                {"_id": doc["_id"]}, {"$set": missing}, return_document=ReturnDocument.AFTER
+            )
+        doc["_id"] = str(doc["_id"])
+        return Website(**doc)
 
+    @timed("db")
     def get_website_by_name(self, name: str) -> Optional[Website]:
         doc = self.websites.find_one({"name": name})
         if doc:
@@ -42,32 +84,139 @@ class DatabaseOperations:
             return Website(**doc)
         return None
 
+    @timed("db")
+    def get_active_websites(self) -> List[Website]:
+        websites = []
+        for doc in self.websites.find({"active": True}):
+            doc["_id"] = str(doc["_id"])
+            websites.append(Website(**doc))
+        return websites
+
+    @timed("db")
+    def bump_cache_generation(self, website_id: str, last_scraped: Optional[datetime] = None) -> int:
+        """Invalidate read caches over the website's prices, returns the new generation
+
+        Called once a run has written all its prices, last_scraped is set in the same update.
+        """
+        update = {"$inc": {"cache_generation": 1}}
+        if last_scraped is not None:
+            update["$set"] = {"last_scraped": last_scraped}
+        website = self.websites.find_one_and_update(
+            {"_id": ObjectId(website_id)}, update, projection={"cache_generation": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return website["cache_generation"] if website else 0
+
+    def get_website_name(self, website_id: str) -> str:
+        """Return the website name for an id, cached for the lifetime of the operations object"""
+        name = self._website_names.get(str(website_id))
+        if name is None:
+            website = self.websites.find_one({"_id": ObjectId(website_id)}, {"name": 1})
+            name = website["name"] if website else "unknown"
+            self._website_names[str(website_id)] = name
+        return name
+
     # --- Product operations ---
-    def insert_or_update_product(self, product: Product) -> str:
+    def _product_upsert_update(self, product: ProductLike, now: datetime) -> Dict:
+        if isinstance(product, ProductRecord):
+            return {"$setOnInsert": {"created_at": now}, "$set": {**product.to_document(), "updated_at": now}}
+
+        product_dict = product.dict(by_alias=True, exclude_unset=True)
+        product_dict.pop("created_at", None)
+        product_dict.pop("updated_at", None)
+
+        return {
+            "$setOnInsert": {"created_at": now},
+            "$set": {**product_dict, "updated_at": now},
+        }
+
+    @timed("db")
+    def insert_or_update_product(self, product: ProductLike) -> str:
         try:
             now = datetime.now(UTC)
 
-            product_dict = product.dict(by_alias=True, exclude_unset=True)
-            product_dict.pop("created_at", None)
-            product_dict.pop("updated_at", None)
-
             doc = self.products.find_one_and_update(
                 {"slug": product.slug},
-                {
-                    "$setOnInsert": {"created_at": now},
-                    "$set": {**product_dict, "updated_at": now},
-                },
+                self._product_upsert_update(product, now),
                 upsert=True,
                 return_document=ReturnDocument.AFTER,
                 projection={"_id": 1}
             )
 
+            self.slug_cache.put(product.slug, doc["_id"])
             return str(doc["_id"])
 
         except Exception as e:
-            logger.exception(f"Error inserting/updating product {product.name}: {e}")
+            logger.exception("Error inserting/updating product %s: %s", product.name, e)
+            raise
+
+    @timed("db")
+    def bulk_upsert_products(self, products: List[ProductLike]) -> List[Tuple[str, bool]]:
+        """Upsert products with a single bulk_write, returns (product_id, is_new) in input order"""
+        if not products:
+            return []
+
+        try:
+            now = datetime.now(UTC)
+            operations = [
+                UpdateOne({"slug": product.slug}, self._product_upsert_update(product, now), upsert=True)
+                for product in products
+            ]
+            # Ordered so that a slug repeated within the batch is upserted once then matched
+            result = self.products.bulk_write(operations, ordered=True)
+            upserted_ids = result.upserted_ids
+
+            self.slug_cache.put_many({products[index].slug: product_id for index, product_id in upserted_ids.items()})
+
+            # Matched products are not reported by bulk_write, resolve uncached ids in one query
+            existing_ids = {}
+            missing_slugs = []
+            for index, product in enumerate(products):
+                if index in upserted_ids or product.slug in existing_ids:
+                    continue
+                product_id = self.slug_cache.get(product.slug)
+                if product_id is None:
+                    missing_slugs.append(product.slug)
+                else:
+                    existing_ids[product.slug] = product_id
+            if missing_slugs:
+                found = {
+                    doc["slug"]: doc["_id"]
+                    for doc in self.products.find({"slug": {"$in": missing_slugs}}, {"slug": 1})
+                }
+                self.slug_cache.put_many(found)
+                existing_ids.update(found)
+
+            return [
+                (str(upserted_ids[index]), True) if index in upserted_ids
+                else (str(existing_ids[product.slug]), False)
+                for index, product in enumerate(products)
+            ]
+
+        except Exception as e:
+            logger.exception("Error bulk upserting %s products: %s", len(products), e)
             raise
 
+    @timed("db")
+    def get_product_id_by_slug(self, slug: str) -> Optional[str]:
+        """Product id for a slug from the slug cache, or a projection-only query on a miss"""
+        product_id = self.slug_cache.get(slug)
+        if product_id is None:
+            doc = self.products.find_one({"slug": slug}, {"_id": 1})
+            if doc is None:
+                return None
+            product_id = doc["_id"]
+            self.slug_cache.put(slug, product_id)
+        return str(product_id)
+
+    def warm_slug_cache(self) -> int:
+        """Preload the slug cache at the start of a run"""
+        try:
+            return self.slug_cache.warm(self.products)
+        except Exception as e:
+            logger.exception("Error warming slug cache: %s", e)
+            return 0
+
     def get_product_by_slug(self, slug: str) -> Optional[Product]:
         doc = self.products.find_one({"slug": slug})
         if doc:
@@ -76,27 +225,183 @@ class DatabaseOperations:
         return None
 
     # --- Price operations ---
-    def insert_price(self, price: Price) -> str:
-        try:
-            price_dict = price.dict(by_alias=True, exclude_unset=True)
-            # Convert str IDs -> ObjectId for storage
-            price_dict["product_id"] = ObjectId(price.product_id)
-            price_dict["website_id"] = ObjectId(price.website_id)
+    def _price_document(self, price: PriceLike) -> Dict:
+        if isinstance(price, PriceRecord):
+            return price.to_document()
+
+        price_dict = price.dict(by_alias=True, exclude_unset=True)
+        # Convert str IDs -> ObjectId for storage
+        price_dict["product_id"] = ObjectId(price.product_id)
+        price_dict["website_id"] = ObjectId(price.website_id)
+        return price_dict
 
-            result = self.prices.insert_one(price_dict)
+    @timed("db")
+    def insert_price(self, price: PriceLike) -> str:
+        try:
+            result = self.prices.insert_one(self._price_document(price))
             return str(result.inserted_id)
         except Exception as e:
-            logger.exception(f"Error inserting price: {e}")
+            logger.exception("Error inserting price: %s", e)
+            raise
+
+    @timed("db")
+    def insert_prices(self, prices: List[PriceLike]) -> List[str]:
+        """Insert several prices with a single insert_many, returns ids in input order"""
+        if not prices:
+            return []
+
+        try:
+            result = self.prices.insert_many([self._price_document(price) for price in prices])
+            return [str(price_id) for price_id in result.inserted_ids]
+        except Exception as e:
+            logger.exception("Error inserting %s prices: %s", len(prices), e)
+            raise
+
+    @staticmethod
+    def _same_observation(price: PriceLike, latest: Optional[Dict]) -> bool:
+        return (
+            latest is not None
+            and latest["price"] == price.price
+            and latest["currency"] == price.currency
+            and latest.get("availability", "unknown") == price.availability
+            and latest.get("price_id") is not None
+            and _as_utc(price.scraped_at) >= _as_utc(latest["last_updated"])
+        )
+
+    @timed("db")
+    def record_price_changes(self, prices: List[PriceLike]) -> List[str]:
+        """Insert only prices that changed since the product's latest price on the website
+
+        Unchanged observations extend last_seen_at on the latest record instead, so each
+        record covers [scraped_at, last_seen_at]. A latest record deleted by retention is
+        replaced by a new one. Returns price ids in input order.
+        """
+        if not prices:
+            return []
+
+        fields = {f"latest_prices.{price.website_id}": 1 for price in prices}
+        latest_prices = {
+            str(doc["_id"]): doc.get("latest_prices", {})
+            for doc in self.products.find(
+                {"_id": {"$in": list({ObjectId(price.product_id) for price in prices})}},
+                fields
+            )
+        }
+
+        price_ids: List[Optional[str]] = []
+        changed = []
+        extended = []
+        for price in prices:
+            latest = latest_prices.get(str(price.product_id), {}).get(str(price.website_id))
+            if self._same_observation(price, latest):
+                price_ids.append(latest["price_id"])
+                extended.append((len(price_ids) - 1, price))
+            else:
+                price.last_seen_at = price.scraped_at
+                price_ids.append(None)
+                changed.append((len(price_ids) - 1, price))
+
+        try:
+            if extended:
+                # update_many because time-series collections reject single-document updates
+                result = self.prices.bulk_write([
+                    UpdateMany({"_id": ObjectId(price_ids[index])}, {"$max": {"last_seen_at": price.scraped_at}})
+                    for index, price in extended
+                ], ordered=False)
+                if result.matched_count < len(extended):
+                    # Retention deleted latest records of products absent for longer than it keeps
+                    existing = {str(doc["_id"]) for doc in self.prices.find(
+                        {"_id": {"$in": [ObjectId(price_ids[index]) for index, _ in extended]}}, {"_id": 1}
+                    )}
+                    for index, price in extended:
+                        if price_ids[index] not in existing:
+                            price.last_seen_at = price.scraped_at
+                            changed.append((index, price))
+        except Exception as e:
+            logger.exception("Error extending %s unchanged prices: %s", len(extended), e)
             raise
 
-    def get_recent_prices(self, product_id: str, days: int = 30) -> List[Dict]:
+        inserted_ids = self.insert_prices([price for _, price in changed])
+        for (index, _), price_id in zip(changed, inserted_ids):
+            price_ids[index] = price_id
+
+        logger.debug("Recorded %s new and %s extended prices", len(changed), len(price_ids) - len(changed))
+        return price_ids
+
+    @timed("db")
+    def record_unchanged_prices(self, product_ids: List[str], website_id: str, scraped_at: datetime,
+                                change_only: bool = False) -> List[str]:
+        """Record a new observation of each product's latest price on the website at scraped_at"""
+        field = f"latest_prices.{website_id}"
+        unique_ids = list(dict.fromkeys(product_ids))
+        if not unique_ids:
+            return []
+
+        prices = []
+        for doc in self.products.find(
+            {"_id": {"$in": [ObjectId(pid) for pid in unique_ids]}, field: {"$exists": True}},
+            {field: 1, "brand": 1, "model": 1, "specifications.gpu_ram": 1}
+        ):
+            latest = doc["latest_prices"][str(website_id)]
+            prices.append(PriceRecord(
+                product_id=str(doc["_id"]),
+                website_id=str(website_id),
+                price=latest["price"],
+                currency=latest["currency"],
+                product_url=latest.get("product_url", ""),
+                availability=latest.get("availability", "unknown"),
+                scraped_at=scraped_at,
+                gpu_ram=doc.get("specifications", {}).get("gpu_ram"),
+                brand=doc.get("brand"),
+                model=doc.get("model")
+            ))
+
+        price_ids = self.record_price_changes(prices) if change_only else self.insert_prices(prices)
+        self.record_latest_prices(prices, price_ids)
+        return price_ids
+
+    @timed("db")
+    def get_recorded_product_ids(self, product_ids: List[str], website_id: str, scraped_at: datetime) -> Set[str]:
+        """Products of the list already having a price of the website observed at scraped_at
+
+        A change-only record covers every observation between its scraped_at and last_seen_at.
+        """
+        unique_ids = list(dict.fromkeys(product_ids))
+        if not unique_ids:
+            return set()
+
+        query = {
+            "product_id": {"$in": [ObjectId(pid) for pid in unique_ids]},
+            "website_id": ObjectId(website_id),
+            "$or": [
+                {"scraped_at": scraped_at},
+                {"scraped_at": {"$lte": scraped_at}, "last_seen_at": {"$gte": scraped_at}}
+            ]
+        }
+        return {str(doc["product_id"]) for doc in self.prices.find(query, {"product_id": 1})}
+
+    @timed("db")
+    def get_recent_prices(self, product_id: str, days: int = 30, website_id: Optional[str] = None) -> List[Dict]:
+        """Price records of the product within the last days, newest first
+
+        Records are the steps of the price history: each one holds from its scraped_at until the
+        next record of the same website. A change-only record that started before the window but
+        was still seen inside it is included, so the history is correct from the window start.
+        """
         cutoff_date = datetime.now(UTC) - timedelta(days=days)
-        prices = list(self.prices.find(
-            {
-                "product_id": ObjectId(product_id),
-                "scraped_at": {"$gte": cutoff_date}
-            }
-        ).sort("scraped_at", -1))
+        # Each branch has its index, product_id + scraped_at and product_id + last_seen_at
+        # (price backend migration 3), a time-series collection only opens the product's
+        # buckets overlapping the range
+        query = {
+            "product_id": ObjectId(product_id),
+            "$or": [
+                {"scraped_at": {"$gte": cutoff_date}},
+                {"last_seen_at": {"$gte": cutoff_date}}
+            ]
+        }
+        if website_id is not None:
+            query["website_id"] = ObjectId(website_id)
+        prices = list(self.prices.find(query).sort("scraped_at", -1))
 
         for p in prices:
             p["_id"] = str(p["_id"])
@@ -105,42 +410,294 @@ class DatabaseOperations:
         return prices
 
     # --- Cache operations ---
-    def update_product_best_price(self, product_id: str):
+    def _latest_price_entry(self, price: PriceLike, price_id: str) -> Dict:
+        return {
+            "price": price.price,
+            "currency": price.currency,
+            "website_id": str(price.website_id),
+            "website_name": self.get_website_name(price.website_id),
+            "availability": price.availability,
+            "product_url": price.product_url,
+            "price_id": price_id,
+            "last_updated": price.scraped_at
+        }
+
+    def _latest_price_pipeline(self, price: PriceLike, price_id: str) -> List[Dict]:
+        """Update pipeline setting latest_prices.<website_id> and deriving current_best_price from the map"""
+        field = f"latest_prices.{price.website_id}"
+        entry = self._latest_price_entry(price, price_id)
+
+        return [
+            # Only replace the website's entry with a more recent observation
+            {"$set": {field: {"$cond": [
+                {"$gte": [entry["last_updated"], {"$ifNull": [f"${field}.last_updated", datetime.min]}]},
+                {"$literal": entry},
+                f"${field}"
+            ]}}},
+            {"$set": {"current_best_price": {"$let": {
+                "vars": {"best": {"$reduce": {
+                    "input": {"$objectToArray": "$latest_prices"},
+                    "initialValue": None,
+                    "in": {"$cond": [
+                        {"$or": [{"$eq": ["$$value", None]}, {"$lt": ["$$this.v.price", "$$value.price"]}]},
+                        "$$this.v",
+                        "$$value"
+                    ]}
+                }}},
+                "in": {
+                    "price": "$$best.price",
+                    "currency": "$$best.currency",
+                    "website_id": "$$best.website_id",
+                    "website_name": "$$best.website_name",
+                    "last_updated": "$$best.last_updated"
+                }
+            }}, "updated_at": "$$NOW"}}
+        ]
+
+    @timed("db")
+    def record_latest_price(self, price: PriceLike, price_id: str):
+        """Atomically store a price as its website's latest for the product and refresh current_best_price"""
         try:
-            pipeline = [
-                {"$match": {"product_id": ObjectId(product_id)}},
-                {"$sort": {"scraped_at": -1}},
-                {"$group": {
-                    "_id": "$website_id",
-                    "latest_price": {"$first": "$$ROOT"}
-                }},
-                {"$replaceRoot": {"newRoot": "$latest_price"}},
-                {"$sort": {"price": 1}},
-                {"$limit": 1}
-            ]
+            self.products.update_one(
+                {"_id": ObjectId(price.product_id)},
+                self._latest_price_pipeline(price, price_id)
+            )
+        except Exception as e:
+            logger.exception("Error recording latest price for product %s: %s", price.product_id, e)
+            raise
+
+    @timed("db")
+    def record_latest_prices(self, prices: List[PriceLike], price_ids: List[str]):
+        """Bulk variant of record_latest_price, one bulk_write for a whole batch"""
+        if not prices:
+            return
+
+        try:
+            self.products.bulk_write([
+                UpdateOne({"_id": ObjectId(price.product_id)}, self._latest_price_pipeline(price, price_id))
+                for price, price_id in zip(prices, price_ids)
+            ], ordered=True)
+        except Exception as e:
+            logger.exception("Error recording latest prices for %s products: %s", len(prices), e)
+            raise
 
-            result = list(self.prices.aggregate(pipeline))
-            if result:
-                best_price = result[0]
-                website = self.websites.find_one({"_id": best_price["website_id"]})
-
-                current_best = {
-                    "price": best_price["price"],
-                    "currency": best_price["currency"],
-                    "website_id": str(best_price["website_id"]),
-                    "website_name": website["name"] if website else "unknown",
-                    "last_updated": best_price["scraped_at"]
+    @staticmethod
+    def _best_price(latest_prices: Dict[str, Dict]) -> Optional[Dict]:
+        if not latest_prices:
+            return None
+        best = min(latest_prices.values(), key=lambda entry: entry["price"])
+        return {
+            "price": best["price"],
+            "currency": best["currency"],
+            "website_id": best["website_id"],
+            "website_name": best["website_name"],
+            "last_updated": best["last_updated"]
+        }
+
+    @timed("db")
+    def recompute_best_prices(self, product_ids: Optional[List[str]] = None, batch_size: int = 500) -> int:
+        """Rebuild latest_prices and current_best_price from the price history, returns products updated"""
+        pipeline = []
+        if product_ids is not None:
+            pipeline.append({"$match": {"product_id": {"$in": [ObjectId(pid) for pid in product_ids]}}})
+        pipeline += [
+            {"$sort": {"product_id": 1, "website_id": 1, "scraped_at": -1}},
+            {"$group": {
+                "_id": {"product_id": "$product_id", "website_id": "$website_id"},
+                "latest_price": {"$first": "$$ROOT"}
+            }},
+            {"$group": {"_id": "$_id.product_id", "latest": {"$push": "$latest_price"}}}
+        ]
+
+        updated = 0
+        now = datetime.now(UTC)
+        operations = []
+        for doc in self.prices.aggregate(pipeline, allowDiskUse=True):
+            latest_prices = {
+                str(latest["website_id"]): {
+                    "price": latest["price"],
+                    "currency": latest["currency"],
+                    "website_id": str(latest["website_id"]),
+                    "website_name": self.get_website_name(latest["website_id"]),
+                    "availability": latest.get("availability", "unknown"),
+                    "product_url": latest.get("product_url", ""),
+                    "price_id": str(latest["_id"]),
+                    "last_updated": latest.get("last_seen_at") or latest["scraped_at"]
                 }
+                for latest in doc["latest"]
+            }
+            operations.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {
+                    "latest_prices": latest_prices,
+                    "current_best_price": self._best_price(latest_prices),
+                    "updated_at": now
+                }}
+            ))
+
+            if len(operations) >= batch_size:
+                updated += self.products.bulk_write(operations, ordered=False).modified_count
+                operations = []
+
+        if operations:
+            updated += self.products.bulk_write(operations, ordered=False).modified_count
+
+        if updated:
+            bump_cache_generations(self.websites)
+        logger.info("Recomputed best prices for %s products", updated)
+        return updated
+
+    def update_product_best_price(self, product_id: str):
+        try:
+            self.recompute_best_prices([product_id])
+        except Exception as e:
+            logger.exception("Error updating best price for product %s: %s", product_id, e)
+
+    # --- Facet operations ---
+    @staticmethod
+    def _facet_key(price: PriceLike) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        return price.gpu_ram, price.model, price.brand
+
+    def _facet_stats(self, key: Tuple[Optional[str], Optional[str], Optional[str]]) -> Dict:
+        gpu_ram, model, brand = key
+        # The first two are index seeks on (gpu_ram, model, brand, price), the count is index only
+        query = {"gpu_ram": gpu_ram, "model": model, "brand": brand}
+        cheapest = self.prices.find_one(query, {"price": 1}, sort=[("price", 1)])
+        dearest = self.prices.find_one(query, {"price": 1}, sort=[("price", -1)])
+        return {
+            "products": self.products.count_documents(
+                {"specifications.gpu_ram": gpu_ram, "model": model, "brand": brand}
+            ),
+            "min_price": cheapest["price"] if cheapest else None,
+            "max_price": dearest["price"] if dearest else None
+        }
+
+    @timed("db")
+    def refresh_price_facets(self, keys: Optional[Iterable[Tuple]] = None) -> int:
+        """Recompute (gpu_ram, model, brand) facets from products and prices, returns facets written
+
+        Without keys every stored facet is refreshed, after retention deleted prices. Facets
+        left without products or prices are removed. This reads each facet's prices and products,
+        maintenance jobs call it rather than the write path.
+        """
+        if keys is None:
+            keys = [(doc.get("gpu_ram"), doc.get("model"), doc.get("brand"))
+                    for doc in self.price_facets.find({}, {"gpu_ram": 1, "model": 1, "brand": 1})]
 
-                self.products.update_one(
-                    {"_id": ObjectId(product_id)},
-                    {"$set": {"current_best_price": current_best, "updated_at": datetime.now(UTC)}}
+        now = datetime.now(UTC)
+        operations = []
+        for gpu_ram, model, brand in set(keys):
+            facet = self._facet_stats((gpu_ram, model, brand))
+            key_filter = {"gpu_ram": gpu_ram, "model": model, "brand": brand}
+            if not facet["products"] and facet["min_price"] is None:
+                operations.append(DeleteOne(key_filter))
+            else:
+                operations.append(UpdateOne(key_filter, {"$set": {**facet, "updated_at": now}}, upsert=True))
+        if operations:
+            self.price_facets.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    @timed("db")
+    def record_price_facets(self, prices: List[PriceLike], new_product_ids: Iterable[str] = ()):
+        """Merge prices into the (gpu_ram, model, brand) facets, one bulk_write per batch
+
+        Each facet holds the number of products with its values and the min/max of the price
+        records stored with them. The write path only widens price ranges and counts products
+        when they are created, so new_product_ids lists the products created by this batch.
+        Ranges narrowed by retention and products moved by a classification change are
+        corrected by refresh_price_facets and rebuild_price_facets.
+        """
+        if not prices:
+            return
+
+        new_product_ids = {str(product_id) for product_id in new_product_ids}
+        facets: Dict[Tuple, Dict] = {}
+        for price in prices:
+            facet = facets.setdefault(self._facet_key(price), {"min": price.price, "max": price.price, "new": set()})
+            facet["min"] = min(facet["min"], price.price)
+            facet["max"] = max(facet["max"], price.price)
+            if str(price.product_id) in new_product_ids:
+                facet["new"].add(str(price.product_id))
+
+        now = datetime.now(UTC)
+        try:
+            self.price_facets.bulk_write([
+                UpdateOne(
+                    {"gpu_ram": gpu_ram, "model": model, "brand": brand},
+                    {
+                        "$set": {"updated_at": now},
+                        "$min": {"min_price": facet["min"]},
+                        "$max": {"max_price": facet["max"]},
+                        "$inc": {"products": len(facet["new"])}
+                    },
+                    upsert=True
                 )
+                for (gpu_ram, model, brand), facet in facets.items()
+            ], ordered=False)
         except Exception as e:
-            logger.exception(f"Error updating best price for product {product_id}: {e}")
+            logger.exception("Error recording price facets for %s prices: %s", len(prices), e)
+            raise
+
+    @timed("db")
+    def rebuild_price_facets(self, batch_size: int = 500) -> int:
+        """Copy gpu_ram, brand and model onto older price records and rebuild the facets, returns facets written
+
+        Only records without a brand are updated, so an interrupted rebuild can be run again.
+        Time-series collections only accept these updates on MongoDB 7.0+.
+        """
+        products = self.products.find({}, {"brand": 1, "model": 1, "specifications.gpu_ram": 1}).batch_size(batch_size)
+        facets: Dict[Tuple, Dict] = {}
+        operations = []
+        denormalized = 0
+        for doc in products:
+            fields = {
+                "gpu_ram": doc.get("specifications", {}).get("gpu_ram"),
+                "brand": doc.get("brand"),
+                "model": doc.get("model")
+            }
+            key = (fields["gpu_ram"], fields["model"], fields["brand"])
+            facets.setdefault(key, {"products": 0})["products"] += 1
+            operations.append(UpdateMany(
+                {"product_id": doc["_id"], "brand": {"$exists": False}},
+                {"$set": fields}
+            ))
+            if len(operations) >= batch_size:
+                denormalized += self.prices.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            denormalized += self.prices.bulk_write(operations, ordered=False).modified_count
+
+        # Every record carries the facet fields now, so the price range comes from the prices index
+        for group in self.prices.aggregate([
+            {"$group": {
+                "_id": {"gpu_ram": "$gpu_ram", "model": "$model", "brand": "$brand"},
+                "min_price": {"$min": "$price"},
+                "max_price": {"$max": "$price"}
+            }}
+        ], allowDiskUse=True):
+            key = (group["_id"].get("gpu_ram"), group["_id"].get("model"), group["_id"].get("brand"))
+            facets.setdefault(key, {"products": 0}).update(
+                min_price=group["min_price"], max_price=group["max_price"]
+            )
+
+        now = datetime.now(UTC)
+        self.price_facets.delete_many({})
+        if facets:
+            self.price_facets.insert_many([
+                {"gpu_ram": gpu_ram, "model": model, "brand": brand, **facet, "updated_at": now}
+                for (gpu_ram, model, brand), facet in facets.items()
+            ])
+        # Price records served by the read API now carry the facet fields
+        bump_cache_generations(self.websites)
+
+        logger.info("Denormalized %s price records and rebuilt %s price facets", denormalized, len(facets))
+        return len(facets)
 
     # --- Cleanup operations ---
-    def cleanup_old_prices(self, days_to_keep: int = 90):
-        cutoff_date = datetime.now(UTC) - timedelta(days=days_to_keep)
-        result = self.prices.delete_many({"scraped_at": {"$lt": cutoff_date}})
-        return result.deleted_count
+    @timed("db")
+    def cleanup_old_prices(self, days_to_keep: int = 90, downsample: bool = True) -> int:
+        """Delete prices older than days_to_keep in throttled chunks, see PriceRetention"""
+        # Imported here, the retention module builds on the rollups which import this module
+        from database.retention import PriceRetention
+
+        return PriceRetention(self.db_manager, downsample=downsample).run(days_to_keep)["deleted"]
@@ -0,0 +1,179 @@
+from datetime import datetime
+from typing import Optional
+import logging
+
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentPriceBackend:
+    """Price history as one standalone document per observation in the prices collection"""
+
+    name = "documents"
+    collection_name = "prices"
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db[self.collection_name]
+
+    def create_collection(self):
+        """Regular collections are created implicitly on first insert"""
+
+    def create_indexes(self):
+        self.collection.create_index([("product_id", ASCENDING), ("scraped_at", DESCENDING)])
+        self.collection.create_index([("website_id", ASCENDING), ("scraped_at", DESCENDING)])
+        self.collection.create_index([("scraped_at", DESCENDING)])
+        self.collection.create_index([("product_id", ASCENDING), ("website_id", ASCENDING), ("scraped_at", DESCENDING)])
+        self.collection.create_index([("price", ASCENDING), ("currency", ASCENDING), ("scraped_at", DESCENDING)])
+        # Only change-only records carry last_seen_at, the rollup job reads them by it
+        self.collection.create_index([("last_seen_at", DESCENDING)], sparse=True)
+
+    def create_facet_indexes(self):
+        # Filters and facets on the fields copied from products, the cheapest prices of a
+        # gpu_ram grouped by product are covered by the first index
+        self.collection.create_index([("gpu_ram", ASCENDING), ("price", ASCENDING), ("product_id", ASCENDING)])
+        self.collection.create_index([("gpu_ram", ASCENDING), ("model", ASCENDING), ("brand", ASCENDING),
+                                      ("price", ASCENDING)])
+
+    def create_history_indexes(self):
+        # A product's history newest first, _id breaks ties for keyset pagination in python-fastapi
+        self.collection.create_index([("product_id", ASCENDING), ("scraped_at", DESCENDING), ("_id", DESCENDING)])
+        # Change-only records that started before a history window but were seen inside it
+        self.collection.create_index([("product_id", ASCENDING), ("last_seen_at", DESCENDING)],
+                                     partialFilterExpression={"last_seen_at": {"$exists": True}})
+
+    def delete_before(self, cutoff: datetime) -> int:
+        """Delete records observed before cutoff, change-only records still seen after it are kept"""
+        return self.collection.delete_many(
+            {"scraped_at": {"$lt": cutoff}, "last_seen_at": {"$not": {"$gte": cutoff}}}
+        ).deleted_count
+
+    def set_expiry(self, days: Optional[int]):
+        """Turn the scraped_at index into a TTL index, needs MongoDB 5.1+"""
+        if days is None:
+            # collMod cannot remove expireAfterSeconds, the index is built again without it
+            self.collection.drop_index([("scraped_at", DESCENDING)])
+            self.collection.create_index([("scraped_at", DESCENDING)])
+            return
+        self.db.command("collMod", self.collection_name,
+                        index={"keyPattern": {"scraped_at": -1}, "expireAfterSeconds": days * 86400})
+
+
+class TimeSeriesPriceBackend:
+    """Price history in a MongoDB time-series collection bucketed by product
+
+    Observations keep the same document shape as the prices collection, product_id is the
+    metaField so MongoDB groups a product's observations into compressed hourly buckets and
+    indexes (product_id, scraped_at) itself. Deleting by scraped_at needs MongoDB 7.0+,
+    expire_after_days lets the server expire old buckets instead.
+    """
+
+    name = "timeseries"
+    collection_name = "price_series"
+
+    def __init__(self, db, expire_after_days: Optional[int] = None):
+        self.db = db
+        self.collection = db[self.collection_name]
+        self.expire_after_days = expire_after_days
+
+    def create_collection(self):
+        """Time-series collections must be created explicitly before the first insert"""
+        if self.collection_name in self.db.list_collection_names():
+            return
+
+        options = {
+            "timeseries": {"timeField": "scraped_at", "metaField": "product_id", "granularity": "hours"}
+        }
+        if self.expire_after_days is not None:
+            options["expireAfterSeconds"] = self.expire_after_days * 86400
+        self.db.create_collection(self.collection_name, **options)
+        logger.info("Created time-series collection %s", self.collection_name)
+
+    def create_indexes(self):
+        # MongoDB 6.3+ creates this index itself, older servers need it explicitly
+        self.collection.create_index([("product_id", ASCENDING), ("scraped_at", DESCENDING)])
+
+    def create_facet_indexes(self):
+        # Secondary indexes on measurements need MongoDB 6.0+
+        self.collection.create_index([("gpu_ram", ASCENDING), ("price", ASCENDING), ("product_id", ASCENDING)])
+        self.collection.create_index([("gpu_ram", ASCENDING), ("model", ASCENDING), ("brand", ASCENDING),
+                                      ("price", ASCENDING)])
+
+    def create_history_indexes(self):
+        # product_id + scraped_at is indexed with the collection, see create_indexes
+        self.collection.create_index([("product_id", ASCENDING), ("last_seen_at", DESCENDING)])
+
+    def delete_before(self, cutoff: datetime) -> int:
+        """Delete records observed before cutoff, change-only records still seen after it are kept"""
+        return self.collection.delete_many(
+            {"scraped_at": {"$lt": cutoff}, "last_seen_at": {"$not": {"$gte": cutoff}}}
+        ).deleted_count
+
+    def set_expiry(self, days: Optional[int]):
+        """Expire whole buckets once their newest observation is older than days"""
+        self.db.command("collMod", self.collection_name,
+                        expireAfterSeconds=days * 86400 if days is not None else "off")
+        self.expire_after_days = days
+
+
+PRICE_BACKENDS = {
+    DocumentPriceBackend.name: DocumentPriceBackend,
+    TimeSeriesPriceBackend.name: TimeSeriesPriceBackend,
+}
+
+
+def get_price_backend(name: str, db, **options):
+    """Build the price history backend registered under name"""
+    try:
+        backend_class = PRICE_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown price backend: {name}")
+    return backend_class(db, **options)
+
+
+def migrate_prices(source, target, batch_size: int = 1000) -> int:
+    """Copy price history from one backend to another, returns documents copied
+
+    Documents keep their _id so price_id references in products stay valid. Copying
+    resumes after the highest _id recorded in the migration checkpoint, so an
+    interrupted migration can simply be run again.
+    """
+    checkpoints = source.db.price_migrations
+    checkpoint_id = f"{source.collection_name}->{target.collection_name}"
+    checkpoint = checkpoints.find_one({"_id": checkpoint_id}) or {}
+
+    target.create_collection()
+    target.create_indexes()
+
+    query = {}
+    if checkpoint.get("last_id") is not None:
+        query["_id"] = {"$gt": checkpoint["last_id"]}
+        logger.info("Resuming price migration %s after %s", checkpoint_id, checkpoint['last_id'])
+
+    copied = 0
+    batch = []
+    for doc in source.collection.find(query).sort("_id", ASCENDING).batch_size(batch_size):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            copied += _copy_batch(batch, target, checkpoints, checkpoint_id, first=copied == 0)
+            batch = []
+    if batch:
+        copied += _copy_batch(batch, target, checkpoints, checkpoint_id, first=copied == 0)
+
+    logger.info("Price migration %s copied %s documents", checkpoint_id, copied)
+    return copied
+
+
+def _copy_batch(batch, target, checkpoints, checkpoint_id, first: bool = False) -> int:
+    if first:
+        # The batch interrupted before its checkpoint is copied again, time-series
+        # collections do not enforce unique _id so drop the earlier partial copy
+        target.collection.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+    target.collection.insert_many(batch, ordered=False)
+    checkpoints.update_one(
+        {"_id": checkpoint_id},
+        {"$set": {"last_id": batch[-1]["_id"]}, "$inc": {"copied": len(batch)}},
+        upsert=True
+    )
+    return len(batch)
@@ -0,0 +1,148 @@
+import logging
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Dict, Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+from config import DEFAULT_RETENTION_BATCH_SIZE, DEFAULT_RETENTION_PAUSE_SECONDS
+from database.operations import DatabaseOperations, _as_utc, bump_cache_generations
+from database.price_backends import TimeSeriesPriceBackend
+from database.rollups import PriceRollup, RETENTION_STATE_ID, _day
+
+logger = logging.getLogger(__name__)
+
+
+class PriceRetention:
+    """Delete price records older than the retention period in bounded _id-range chunks
+
+    Each chunk is the next batch_size expired records in _id order, deleted with one
+    delete_many on their _id range and followed by a pause, so a large cleanup never holds
+    the disk for long. Progress is stored in retention_state after every chunk and an
+    interrupted run resumes after the last deleted _id with the same cutoff.
+
+    The cutoff is aligned to midnight UTC. A change-only record is only expired once its
+    last_seen_at is before the cutoff too. With downsample the price rollup runs first and
+    only records it has read are deleted, so the daily min/max/last of every deleted day is
+    kept in price_daily, and a rollup rebuild keeps the summaries before the retention horizon.
+
+    Time-series collections have no _id index to walk in chunks, their expired records are
+    deleted with a single delete_many on scraped_at, which needs MongoDB 7.0+.
+    """
+
+    def __init__(self, db_manager, batch_size: int = DEFAULT_RETENTION_BATCH_SIZE,
+                 pause_seconds: float = DEFAULT_RETENTION_PAUSE_SECONDS, downsample: bool = True):
+        self.db_manager = db_manager
+        self.prices = db_manager.prices
+        self.price_backend = db_manager.price_backend
+        self.state = db_manager.db.retention_state
+        self.coverage = db_manager.db.rollup_coverage
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.downsample = downsample
+
+    @staticmethod
+    def _expired(cutoff: datetime) -> Dict:
+        return {"scraped_at": {"$lt": cutoff}, "last_seen_at": {"$not": {"$gte": cutoff}}}
+
+    def run(self, days_to_keep: int, now: Optional[datetime] = None) -> Dict:
+        """Delete records observed before the retention period, returns counters of the run"""
+        if self.price_backend.name == TimeSeriesPriceBackend.name:
+            cutoff = _day((now or datetime.now(UTC)) - timedelta(days=days_to_keep)).replace(tzinfo=UTC)
+            if self.downsample:
+                PriceRollup(self.db_manager).run(now=now)
+            return self._finish(cutoff, self.price_backend.delete_before(cutoff))
+
+        state = self.state.find_one({"_id": RETENTION_STATE_ID}) or {}
+        if state.get("status") == "running":
+            cutoff = _as_utc(state["cutoff"])
+            logger.info("Resuming price retention before %s after %s deleted records", cutoff, state["deleted"])
+        else:
+            cutoff = _day((now or datetime.now(UTC)) - timedelta(days=days_to_keep)).replace(tzinfo=UTC)
+            state = self._start(cutoff)
+
+        max_id = state["max_id"]
+        if self.downsample and max_id is not None:
+            # Every record about to be deleted is merged into its daily summary first, records
+            # the rollup has not read yet are left for the next run
+            rollup = PriceRollup(self.db_manager)
+            rollup.run()
+            last_inserted_id = rollup.get_last_inserted_id()
+            if last_inserted_id is None:
+                max_id = None
+            elif max_id > last_inserted_id:
+                max_id = self.prices.find_one(
+                    {**self._expired(cutoff), "_id": {"$lte": last_inserted_id}}, {"_id": 1},
+                    sort=[("_id", DESCENDING)]
+                )
+                max_id = max_id["_id"] if max_id else None
+
+        deleted = state["deleted"]
+        last_id = state.get("last_id")
+        while max_id is not None:
+            query = self._expired(cutoff)
+            query["_id"] = {"$lte": max_id} if last_id is None else {"$gt": last_id, "$lte": max_id}
+            chunk = list(
+                self.prices.find(query, {"_id": 1}).sort("_id", ASCENDING).hint([("_id", ASCENDING)])
+                .limit(self.batch_size)
+            )
+            if not chunk:
+                break
+
+            # The range holds exactly the chunk, it is the first batch_size expired ids after last_id
+            query["_id"] = {"$gte": chunk[0]["_id"], "$lte": chunk[-1]["_id"]}
+            deleted += self.prices.delete_many(query).deleted_count
+            self.coverage.delete_many({"_id": query["_id"]})
+            last_id = chunk[-1]["_id"]
+            self.state.update_one(
+                {"_id": RETENTION_STATE_ID},
+                {"$set": {"last_id": last_id, "deleted": deleted, "updated_at": datetime.now(UTC)}}
+            )
+            logger.info("Price retention deleted %s/%s records (%.0f%%)", deleted, state["total"],
+                        100 * deleted / max(state["total"], 1))
+
+            if len(chunk) < self.batch_size:
+                break
+            time.sleep(self.pause_seconds)
+
+        return self._finish(cutoff, deleted)
+
+    def _finish(self, cutoff: datetime, deleted: int) -> Dict:
+        self.state.update_one(
+            {"_id": RETENTION_STATE_ID},
+            {"$set": {"status": "done", "horizon": cutoff, "deleted": deleted, "finished_at": datetime.now(UTC)}},
+            upsert=True
+        )
+        if deleted:
+            # Price ranges of the facets shrink with the deleted records
+            DatabaseOperations(self.db_manager).refresh_price_facets()
+            bump_cache_generations(self.db_manager.websites)
+        logger.info("Price retention deleted %s records observed before %s", deleted, cutoff)
+        return {"deleted": deleted, "cutoff": cutoff}
+
+    def _start(self, cutoff: datetime) -> Dict:
+        expired = self._expired(cutoff)
+        last = self.prices.find_one(expired, {"_id": 1}, sort=[("_id", DESCENDING)])
+        state = {
+            "status": "running",
+            "cutoff": cutoff,
+            # Records inserted during the run cannot be expired, the scan stops at the newest expired _id
+            "max_id": last["_id"] if last else None,
+            "last_id": None,
+            "total": self.prices.count_documents(expired),
+            "deleted": 0,
+            "started_at": datetime.now(UTC)
+        }
+        self.state.update_one({"_id": RETENTION_STATE_ID}, {"$set": state}, upsert=True)
+        logger.info("Price retention of %s records observed before %s", state["total"], cutoff)
+        return state
+
+    def configure_ttl(self, days_to_keep: Optional[int]):
+        """Let the server expire raw records after days_to_keep, None turns expiry off
+
+        TTL expiry only looks at scraped_at, so it also removes change-only records still
+        seen after the period and never downsamples. Use it when prices are stored on every
+        scrape and raw-only retention is enough.
+        """
+        self.price_backend.set_expiry(days_to_keep)
+        logger.info("Price expiry set to %s days", days_to_keep)
@@ -0,0 +1,341 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta, UTC
+import logging
+
+from config import DEFAULT_ROLLUP_LAG_SECONDS
+from database.operations import _as_utc
+from database.price_backends import TimeSeriesPriceBackend
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_WINDOWS_DAYS = (7, 30, 90)
+
+# retention_state document of database.retention, records before its horizon were deleted
+RETENTION_STATE_ID = "prices"
+
+
+def _day(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+class PriceRollup:
+    """Incremental price statistics per product and per gpu_ram
+
+    Each run reads the price records inserted since the previous run, by _id, and the
+    change-only records seen again since then, merges them into one price_daily document per
+    product and day, then refreshes Product.price_stats and gpu_ram_stats from the daily
+    documents of the products it touched. Windows cover the last 7/30/90 days, averages are
+    over observations and a change-only record counts once for every day it was seen.
+
+    Reading by insertion order picks up records stored with older timestamps, like replayed
+    pages or late batches. Records whose _id is younger than lag_seconds wait for the next
+    run, so inserts still in flight are not skipped. The last day counted of every change-only
+    record is kept in rollup_coverage, so a record seen again is only counted for new days.
+
+    Time-series collections have no _id index, there new records are also bounded by
+    scraped_at from extension_lookback before the previous run. Records stored with an
+    older scraped_at than that are only rolled up by a rebuild.
+    """
+
+    state_id = "price_rollup"
+
+    # Change-only records are looked up by last_seen_at this long before the previous run,
+    # their observations are stamped with the start of the scrape that stored them
+    extension_lookback = timedelta(days=1)
+
+    def __init__(self, db_manager, batch_size: int = 500, lag_seconds: int = DEFAULT_ROLLUP_LAG_SECONDS):
+        self.db = db_manager.db
+        self.products = db_manager.products
+        self.prices = db_manager.prices
+        self.time_bounded = db_manager.price_backend.name == TimeSeriesPriceBackend.name
+        self.daily = self.db.price_daily
+        self.coverage = self.db.rollup_coverage
+        self.gpu_ram_stats = self.db.gpu_ram_stats
+        self.state = self.db.rollup_state
+        self.batch_size = batch_size
+        self.lag_seconds = lag_seconds
+
+    def get_watermark(self) -> Optional[datetime]:
+        state = self.state.find_one({"_id": self.state_id})
+        return _as_utc(state["watermark"]) if state and state.get("watermark") else None
+
+    def get_last_inserted_id(self) -> Optional[ObjectId]:
+        """Largest _id rolled up, every record with a smaller or equal _id has been read"""
+        state = self.state.find_one({"_id": self.state_id}) or {}
+        if "last_inserted_id" not in state and state.get("watermark") is not None:
+            # State written before the rollup tracked insertion order
+            return ObjectId.from_datetime(state["watermark"])
+        return state.get("last_inserted_id")
+
+    def get_retention_horizon(self) -> Optional[datetime]:
+        state = self.db.retention_state.find_one({"_id": RETENTION_STATE_ID})
+        return _as_utc(state["horizon"]) if state and state.get("horizon") else None
+
+    def run(self, rebuild: bool = False, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Roll up prices inserted or seen again since the previous run, returns counters of the run
+
+        A rebuild keeps the daily summaries before the retention horizon, their records
+        were deleted and only the summaries are left.
+        """
+        now = now or datetime.now(UTC)
+        watermark = None if rebuild else self.get_watermark()
+        last_inserted_id = None if rebuild else self.get_last_inserted_id()
+        floor = None
+        if rebuild:
+            horizon = self.get_retention_horizon()
+            # Days before the horizon are only left as summaries
+            floor = _day(horizon) if horizon is not None else None
+            self.daily.delete_many({} if floor is None else {"day": {"$gte": floor}})
+            self.coverage.delete_many({})
+            self.gpu_ram_stats.delete_many({})
+
+        # ObjectIds hold whole seconds, ids of the current second are left for the next run
+        inserted_before = ObjectId.from_datetime(now - timedelta(seconds=self.lag_seconds))
+        query = {"_id": {"$lt": inserted_before}}
+        if last_inserted_id is not None:
+            query["_id"]["$gt"] = last_inserted_id
+        if last_inserted_id is not None and watermark is not None:
+            seen_since = watermark - self.extension_lookback
+            if self.time_bounded:
+                # Buckets are pruned by the time field, _id only filters what they hold
+                query["scraped_at"] = {"$gt": seen_since}
+            query = {"$or": [
+                query,
+                {"_id": {"$lte": last_inserted_id}, "last_seen_at": {"$gt": seen_since}}
+            ]}
+        records = self.prices.find(
+            query, {"product_id": 1, "price": 1, "scraped_at": 1, "last_seen_at": 1}
+        ).batch_size(self.batch_size)
+
+        product_ids = set()
+        gpu_rams = set()
+        records_read = 0
+        days_written = 0
+        for batch in _batched(records, self.batch_size):
+            records_read += len(batch)
+            batch_last_id = max(record["_id"] for record in batch)
+            if last_inserted_id is None or batch_last_id > last_inserted_id:
+                last_inserted_id = batch_last_id
+            touched, batch_gpu_rams, written = self._merge_daily(batch, floor)
+            product_ids.update(touched)
+            gpu_rams.update(batch_gpu_rams)
+            days_written += written
+
+        # Windows of products not seen today still move with the calendar
+        for doc in self.products.find({"price_stats.updated_at": {"$lt": _day(now)}}, {"_id": 1}):
+            product_ids.add(doc["_id"])
+
+        products_updated = self._refresh_product_stats(list(product_ids), now)
+        gpu_rams_updated = self._refresh_gpu_ram_stats(gpu_rams, now)
+
+        self.state.update_one(
+            {"_id": self.state_id},
+            {"$set": {"watermark": now, "last_inserted_id": last_inserted_id, "updated_at": now}},
+            upsert=True
+        )
+        logger.info(
+            "Price rollup read %s records, wrote %s daily summaries, updated %s products and %s gpu_ram groups",
+            records_read, days_written, products_updated, gpu_rams_updated
+        )
+        return {
+            "records": records_read,
+            "daily_summaries": days_written,
+            "products": products_updated,
+            "gpu_rams": gpu_rams_updated
+        }
+
+    @staticmethod
+    def _observations(record: Dict, counted_through: Optional[datetime] = None,
+                      floor: Optional[datetime] = None) -> Iterator[Tuple[datetime, datetime, bool]]:
+        """(day, observed_at, counted) of a record, one per day it was seen after counted_through
+
+        The last day already counted is yielded again uncounted, so a later observation on
+        that day still updates the day's last price.
+        """
+        first = _as_utc(record["scraped_at"])
+        last = _as_utc(record.get("last_seen_at") or record["scraped_at"])
+        last_day = _day(last)
+
+        day = _day(first)
+        if floor is not None:
+            day = max(day, floor)
+        if counted_through is not None:
+            if counted_through == last_day:
+                yield last_day, last, False
+            day = max(day, counted_through + timedelta(days=1))
+
+        while day <= last_day:
+            if day == last_day:
+                yield day, last, True
+            elif day == _day(first):
+                yield day, first, True
+            else:
+                yield day, day.replace(tzinfo=UTC), True
+            day += timedelta(days=1)
+
+    def _merge_daily(self, records: List[Dict], floor: Optional[datetime] = None) -> Tuple[set, set, int]:
+        product_ids = {record["product_id"] for record in records}
+        gpu_rams = {
+            doc["_id"]: doc.get("specifications", {}).get("gpu_ram")
+            for doc in self.products.find({"_id": {"$in": list(product_ids)}}, {"specifications.gpu_ram": 1})
+        }
+        change_only = [record["_id"] for record in records if record.get("last_seen_at") is not None]
+        counted_through = {
+            doc["_id"]: doc["through"] for doc in self.coverage.find({"_id": {"$in": change_only}})
+        } if change_only else {}
+
+        days: Dict[Tuple[ObjectId, datetime], Dict] = {}
+        for record in records:
+            price = record["price"]
+            for day, observed_at, counted in self._observations(record, counted_through.get(record["_id"]), floor):
+                summary = days.get((record["product_id"], day))
+                if summary is None:
+                    summary = days[(record["product_id"], day)] = {
+                        "min": price, "max": price, "sum": 0.0, "count": 0,
+                        "last": {"at": observed_at, "price": price}
+                    }
+                summary["min"] = min(summary["min"], price)
+                summary["max"] = max(summary["max"], price)
+                if counted:
+                    summary["sum"] += price
+                    summary["count"] += 1
+                if observed_at >= summary["last"]["at"]:
+                    summary["last"] = {"at": observed_at, "price": price}
+
+        # Embedded documents compare field by field, so $max on {at, price} keeps the latest price
+        operations = [
+            UpdateOne(
+                {"_id": {"product_id": product_id, "day": day}},
+                {
+                    "$set": {"product_id": product_id, "day": day, "gpu_ram": gpu_rams.get(product_id)},
+                    "$min": {"min": summary["min"]},
+                    "$max": {"max": summary["max"], "last": summary["last"]},
+                    "$inc": {"sum": summary["sum"], "count": summary["count"]}
+                },
+                upsert=True
+            )
+            for (product_id, day), summary in days.items()
+        ]
+        if operations:
+            self.daily.bulk_write(operations, ordered=False)
+
+        # Coverage is written after the summaries, a crash in between recounts rather than loses days
+        coverage = [
+            UpdateOne(
+                {"_id": record["_id"]},
+                {"$max": {"through": _day(_as_utc(record["last_seen_at"]))}},
+                upsert=True
+            )
+            for record in records if record.get("last_seen_at") is not None
+        ]
+        if coverage:
+            self.coverage.bulk_write(coverage, ordered=False)
+
+        touched_gpu_rams = {gpu_rams.get(product_id) for product_id in product_ids} - {None}
+        return product_ids, touched_gpu_rams, len(operations)
+
+    @staticmethod
+    def _window_stats(summaries: List[Dict]) -> Optional[Dict]:
+        if not summaries:
+            return None
+        count = sum(summary["count"] for summary in summaries)
+        last = max((summary["last"] for summary in summaries), key=lambda last: _as_utc(last["at"]))
+        return {
+            "min": min(summary["min"] for summary in summaries),
+            "max": max(summary["max"] for summary in summaries),
+            "avg": round(sum(summary["sum"] for summary in summaries) / count, 2),
+            "last": last["price"],
+            "last_seen_at": last["at"],
+            "count": count
+        }
+
+    def _stats(self, summaries: List[Dict], now: datetime) -> Dict:
+        today = _day(now)
+        stats = {"all_time": self._window_stats(summaries)}
+        for days in ROLLUP_WINDOWS_DAYS:
+            start = today - timedelta(days=days - 1)
+            stats[f"{days}d"] = self._window_stats([s for s in summaries if s["day"] >= start])
+        stats["updated_at"] = now
+        return stats
+
+    def _refresh_product_stats(self, product_ids: List[ObjectId], now: datetime) -> int:
+        updated = 0
+        for start in range(0, len(product_ids), self.batch_size):
+            batch = product_ids[start:start + self.batch_size]
+            summaries: Dict[ObjectId, List[Dict]] = {}
+            for summary in self.daily.find({"product_id": {"$in": batch}}):
+                summaries.setdefault(summary["product_id"], []).append(summary)
+
+            operations = [
+                UpdateOne({"_id": product_id}, {"$set": {"price_stats": self._stats(product_summaries, now)}})
+                for product_id, product_summaries in summaries.items()
+            ]
+            if operations:
+                updated += self.products.bulk_write(operations, ordered=False).matched_count
+        return updated
+
+    def _refresh_gpu_ram_stats(self, gpu_rams: set, now: datetime) -> int:
+        """Recompute gpu_ram windows with one $group per window over the daily summaries"""
+        if not gpu_rams:
+            return 0
+
+        today = _day(now)
+        windows = [("all_time", None)] + [
+            (f"{days}d", today - timedelta(days=days - 1)) for days in ROLLUP_WINDOWS_DAYS
+        ]
+        stats = {gpu_ram: {"updated_at": now} for gpu_ram in gpu_rams}
+        for name, start in windows:
+            match = {"gpu_ram": {"$in": list(gpu_rams)}}
+            if start is not None:
+                match["day"] = {"$gte": start}
+            for group in self.daily.aggregate([
+                {"$match": match},
+                {"$sort": {"day": 1}},
+                {"$group": {
+                    "_id": "$gpu_ram",
+                    "min": {"$min": "$min"},
+                    "max": {"$max": "$max"},
+                    "sum": {"$sum": "$sum"},
+                    "count": {"$sum": "$count"},
+                    "last_day": {"$last": "$day"},
+                    "products": {"$addToSet": "$product_id"}
+                }}
+            ]):
+                stats[group["_id"]][name] = {
+                    "min": group["min"],
+                    "max": group["max"],
+                    "avg": round(group["sum"] / group["count"], 2),
+                    "last_day": group["last_day"],
+                    "products": len(group["products"]),
+                    "count": group["count"]
+                }
+
+        # last is the cheapest price still offered on the most recent day of each group
+        for gpu_ram, gpu_ram_stats in stats.items():
+            last_day = (gpu_ram_stats.get("all_time") or {}).get("last_day")
+            if last_day is None:
+                continue
+            cheapest = self.daily.find_one({"gpu_ram": gpu_ram, "day": last_day}, sort=[("last.price", 1)])
+            for name, _ in windows:
+                window_stats = gpu_ram_stats.get(name)
+                if window_stats is not None:
+                    window_stats["last"] = cheapest["last"]["price"]
+
+        self.gpu_ram_stats.bulk_write([
+            UpdateOne({"_id": gpu_ram}, {"$set": gpu_ram_stats}, upsert=True)
+            for gpu_ram, gpu_ram_stats in stats.items()
+        ], ordered=False)
+        return len(stats)
+
+
+def _batched(cursor, size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,55 @@
+from bson import ObjectId
+from collections import OrderedDict
+from typing import Dict, Optional
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SlugCache:
+    """Bounded LRU map of product slug -> product ObjectId, safe to share between threads"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, ObjectId]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, slug: str) -> Optional[ObjectId]:
+        with self._lock:
+            product_id = self._entries.get(slug)
+            if product_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(slug)
+            self.hits += 1
+            return product_id
+
+    def put(self, slug: str, product_id: ObjectId):
+        with self._lock:
+            self._put(slug, product_id)
+
+    def put_many(self, entries: Dict[str, ObjectId]):
+        with self._lock:
+            for slug, product_id in entries.items():
+                self._put(slug, product_id)
+
+    def _put(self, slug: str, product_id: ObjectId):
+        self._entries[slug] = ObjectId(product_id)
+        self._entries.move_to_end(slug)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def warm(self, products) -> int:
+        """Load the most recently updated products' ids with a projection-only query, returns entries loaded"""
+        # Walks the updated_at index (core migration 6) instead of sorting every product
+        docs = list(products.find({}, {"slug": 1}).sort("updated_at", -1).limit(self.max_size))
+        # Oldest first so the most recently updated products end up most recently used
+        self.put_many({doc["slug"]: doc["_id"] for doc in reversed(docs) if "slug" in doc})
+        logger.info("Slug cache warmed with %s products", len(docs))
+        return len(docs)
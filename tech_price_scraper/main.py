@@ -4,12 +4,24 @@ Tech Price Scraper - Main Application
 Scrapes GPU prices from various websites and stores them in MongoDB
 """
 
+import argparse
+import logging
+import os
 import sys
 from datetime import datetime, UTC
 
+from config import (
+    DEFAULT_PARSE_WORKERS, DEFAULT_ARCHIVE_PATH, DEFAULT_DATABASE_NAME, DEFAULT_METRICS_PATH, DEFAULT_SPANS_PATH,
+    DEFAULT_EXPORT_DIR, DEFAULT_EXPORT_BATCH_SIZE, DEFAULT_RETENTION_DAYS, DEFAULT_RETENTION_DOWNSAMPLE,
+    DEFAULT_RETENTION_BATCH_SIZE, DEFAULT_RETENTION_PAUSE_SECONDS
+)
 from utils.logging import setup_logging
-from database import DatabaseManager, DatabaseOperations
-from scrapers import TopAchatScraper
+from utils.metrics import METRICS
+from database import (
+    DatabaseManager, DatabaseOperations, PriceRollup, PriceExporter, PriceRetention, get_client, apply_migrations,
+    get_price_backend, migrate_prices
+)
+from scrapers import ScrapeScheduler, PageArchive, ArchiveReplayer
 
 
 def main():
@@ -24,55 +36,99 @@ def main():
         db_ops = DatabaseOperations(db_manager)
         logger.info("Database connection established")
         
-        # Initialize and run scraper
-        scraper = TopAchatScraper(db_ops)
+        # Run every active website concurrently
+        scheduler = ScrapeScheduler(db_ops, parse_workers=DEFAULT_PARSE_WORKERS)
         
-        logger.info("Starting TopAchat GPU scraping")
-        result = scraper.scrape_listings(max_pages=3)
+        logger.info("Starting GPU scraping")
+        report = scheduler.run()
+        
+        # Refresh price statistics with the prices of this run
+        try:
+            PriceRollup(db_manager).run()
+        except Exception as e:
+            logger.exception("Price rollup failed: %s", e)
+        
+        # Trim the raw price history, an interrupted cleanup resumes on the next run
+        if DEFAULT_RETENTION_DAYS is not None:
+            try:
+                PriceRetention(db_manager, downsample=DEFAULT_RETENTION_DOWNSAMPLE).run(DEFAULT_RETENTION_DAYS)
+            except Exception as e:
+                logger.exception("Price retention failed: %s", e)
         
         # Display results
-        display_results(result, db_manager)
+        display_results(report, db_manager)
         
     except Exception as e:
-        logger.exception(f"Main execution failed: {e}")
+        logger.exception("Main execution failed: %s", e)
         sys.exit(1)
     
     finally:
+        write_metrics()
         if db_manager:
             db_manager.close()
             logger.info("Database connection closed")
 
 
-def display_results(result, db_manager):
+def write_metrics(metrics_path: str = DEFAULT_METRICS_PATH, spans_path: str = DEFAULT_SPANS_PATH):
+    """Export the stage timings of the run, a failed export never fails the run"""
+    logger = logging.getLogger(__name__)
+    try:
+        METRICS.write_prometheus(metrics_path)
+        spans = METRICS.write_spans(spans_path)
+        logger.info("Wrote metrics to %s and %s spans to %s", metrics_path, spans, spans_path)
+    except OSError as e:
+        logger.exception("Writing metrics failed: %s", e)
+
+
+def display_results(report, db_manager):
     """Display scraping results"""
-    logger = setup_logging()
+    logger = logging.getLogger(__name__)
     
     # Log results
     logger.info("Scraping completed")
-    logger.info(f"Success: {result.success}")
-    logger.info(f"Products found: {result.products_found}")
-    logger.info(f"Products processed: {result.products_processed}")
-    logger.info(f"Products created: {result.products_created}")
-    logger.info(f"Products updated: {result.products_updated}")
-    logger.info(f"Duration: {result.duration_seconds:.2f} seconds")
-    
-    if result.errors:
-        logger.warning(f"Errors encountered: {len(result.errors)}")
-        for error in result.errors[:5]:  # Show first 5 errors
-            logger.warning(f"Error: {error}")
+    for result in report.results:
+        logger.info("[%s] Success: %s", result.website, result.success)
+        logger.info("[%s] Products found: %s", result.website, result.products_found)
+        logger.info("[%s] Products processed: %s", result.website, result.products_processed)
+        logger.info("[%s] Products created: %s", result.website, result.products_created)
+        logger.info("[%s] Products updated: %s", result.website, result.products_updated)
+        logger.info("[%s] Duration: %.2f seconds", result.website, result.duration_seconds)
+        
+        if result.errors:
+            logger.warning("[%s] Errors encountered: %s", result.website, len(result.errors))
+            for error in result.errors[:5]:  # Show first 5 errors
+                logger.warning("[%s] Error: %s", result.website, error)
+    logger.info("Run duration: %.2f seconds", report.duration_seconds)
     
     # Console output
     print("\n" + "="*60)
     print("TECH PRICE SCRAPER RESULTS")
     print("="*60)
-    print(f"Website: {result.website}")
-    print(f"Success: {result.success}")
-    print(f"Products found: {result.products_found}")
-    print(f"Products processed: {result.products_processed}")
-    print(f"Products created: {result.products_created}")
-    print(f"Products updated: {result.products_updated}")
-    print(f"Duration: {result.duration_seconds:.2f}s")
-    print(f"Errors: {len(result.errors)}")
+    for result in report.results:
+        print(f"Website: {result.website}")
+        print(f"Success: {result.success}")
+        print(f"Products found: {result.products_found}")
+        print(f"Products processed: {result.products_processed}")
+        print(f"Products created: {result.products_created}")
+        print(f"Products updated: {result.products_updated}")
+        print(f"Duration: {result.duration_seconds:.2f}s")
+        print(f"Errors: {len(result.errors)}")
+        print("-" * 40)
+    print(f"Websites: {len(report.results)} | Success: {report.success}")
+    print(f"Products processed: {report.total('products_processed')}")
+    print(f"Run duration: {report.duration_seconds:.2f}s")
+    
+    # Show where the time went
+    stage_totals = METRICS.stage_totals()
+    if stage_totals:
+        # Self time leaves out nested stages (db inside store), total time includes them
+        print("\nStage Timings (self / total):")
+        print("-" * 40)
+        for stage, (count, seconds, self_seconds) in sorted(stage_totals.items(), key=lambda item: -item[1][2]):
+            print(f"{stage:<18} {count:>7} calls {self_seconds:>9.2f}s / {seconds:.2f}s")
+        for name, value in sorted(METRICS.counter_totals().items()):
+            print(f"{name}: {value:g}")
+        print()
     
     # Show recent products
     recent_products = list(db_manager.products.find().sort("created_at", -1).limit(5))
@@ -105,7 +161,9 @@ def test_database():
     logger.info("Testing database connection...")
     
     try:
-        db_manager = DatabaseManager()
+        client = get_client()
+        client.admin.command("ping")
+        db = client[DEFAULT_DATABASE_NAME]
         
         # Test basic operations
         test_product = {
@@ -117,35 +175,304 @@ def test_database():
             "updated_at": datetime.now(UTC)
         }
         
-        result = db_manager.products.insert_one(test_product)
-        logger.info(f"Test insert successful: {result.inserted_id}")
+        result = db.products.insert_one(test_product)
+        logger.info("Test insert successful: %s", result.inserted_id)
         
         # Clean up test data
-        db_manager.products.delete_one({"_id": result.inserted_id})
+        db.products.delete_one({"_id": result.inserted_id})
         logger.info("Test cleanup successful")
         
-        db_manager.close()
         print("Database connection test passed!")
         return True
         
     except Exception as e:
-        logger.exception(f"Database test failed: {e}")
+        logger.exception("Database test failed: %s", e)
         print(f"Database connection test failed: {e}")
         return False
 
 
+def recompute_best_prices():
+    """Backfill latest_prices and current_best_price for every product"""
+    logger = setup_logging()
+    logger.info("Recomputing best prices from price history...")
+
+    db_manager = None
+    try:
+        db_manager = DatabaseManager()
+        db_ops = DatabaseOperations(db_manager)
+        updated = db_ops.recompute_best_prices()
+        print(f"Best prices recomputed for {updated} products")
+        return True
+
+    except Exception as e:
+        logger.exception("Best price recompute failed: %s", e)
+        return False
+
+    finally:
+        if db_manager:
+            db_manager.close()
+
+
+def rebuild_price_facets():
+    """Backfill gpu_ram, brand and model on price records and rebuild the price facets"""
+    logger = setup_logging()
+    logger.info("Rebuilding price facets...")
+
+    db_manager = None
+    try:
+        db_manager = DatabaseManager()
+        db_ops = DatabaseOperations(db_manager)
+        facets = db_ops.rebuild_price_facets()
+        print(f"Rebuilt {facets} price facets")
+        return True
+
+    except Exception as e:
+        logger.exception("Price facet rebuild failed: %s", e)
+        return False
+
+    finally:
+        if db_manager:
+            db_manager.close()
+
+
+def migrate_schema():
+    """Apply pending collection and index migrations"""
+    logger = setup_logging()
+    logger.info("Applying schema migrations...")
+
+    try:
+        db_manager = DatabaseManager()
+        applied = apply_migrations(db_manager)
+        print(f"Applied {applied} schema migrations")
+        return True
+
+    except Exception as e:
+        logger.exception("Schema migration failed: %s", e)
+        return False
+
+
+def rollup_prices(rebuild: bool = False):
+    """Refresh product and gpu_ram price statistics"""
+    logger = setup_logging()
+    logger.info("Rebuilding price statistics..." if rebuild else "Rolling up new prices...")
+
+    db_manager = None
+    try:
+        db_manager = DatabaseManager()
+        counters = PriceRollup(db_manager).run(rebuild=rebuild)
+        print(f"Rolled up {counters['records']} price records into {counters['daily_summaries']} daily summaries")
+        print(f"Price stats updated for {counters['products']} products and {counters['gpu_rams']} gpu_ram groups")
+        return True
+
+    except Exception as e:
+        logger.exception("Price rollup failed: %s", e)
+        return False
+
+    finally:
+        if db_manager:
+            db_manager.close()
+
+
+def migrate_price_history(target_backend: str = "timeseries", batch_size: int = 1000):
+    """Copy the price history into another price backend"""
+    logger = setup_logging()
+
+    db_manager = None
+    try:
+        db_manager = DatabaseManager()
+        source = db_manager.price_backend
+        target = get_price_backend(target_backend, db_manager.db)
+        if source.collection_name == target.collection_name:
+            print(f"Price history already uses the {target_backend} backend")
+            return True
+
+        logger.info("Migrating price history from %s to %s...", source.name, target.name)
+        copied = migrate_prices(source, target, batch_size=batch_size)
+        print(f"Copied {copied} prices into {target.collection_name}")
+        print(f"Set DEFAULT_PRICE_BACKEND = \"{target.name}\" to start using it, "
+              f"{source.collection_name} is left untouched")
+        return True
+
+    except Exception as e:
+        logger.exception("Price history migration failed: %s", e)
+        return False
+
+    finally:
+        if db_manager:
+            db_manager.close()
+
+
+def _utc_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed.replace(tzinfo=UTC) if parsed.tzinfo is None else parsed
+
+
+def parse_export_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py --export", description="Export price history")
+    parser.add_argument("path", nargs="?", help="output file, .csv, .csv.gz or .parquet")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="defaults to the file extension")
+    parser.add_argument("--since", type=_utc_datetime, help="first scraped_at, ISO date, inclusive")
+    parser.add_argument("--until", type=_utc_datetime, help="last scraped_at, ISO date, exclusive")
+    parser.add_argument("--website", help="website name")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only prices inserted or seen again since the last export")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    if args.incremental and args.until is not None:
+        parser.error("--until cannot be combined with --incremental")
+    return args
+
+
+def export_prices(args):
+    """Stream the price history with product metadata to a CSV or Parquet file"""
+    logger = setup_logging()
+
+    path = args.path
+    if path is None:
+        extension = "parquet" if args.format == "parquet" else "csv"
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(DEFAULT_EXPORT_DIR, f"prices-{args.website or 'all'}-{stamp}.{extension}")
+
+    db_manager = None
+    try:
+        db_manager = DatabaseManager()
+        exporter = PriceExporter(db_manager, batch_size=args.batch_size)
+        counters = exporter.export(path, export_format=args.format, since=args.since, until=args.until,
+                                   website=args.website, incremental=args.incremental)
+        print(f"Exported {counters['rows']} prices to {path}")
+        return True
+
+    except Exception as e:
+        logger.exception("Price export failed: %s", e)
+        return False
+
+    finally:
+        if db_manager:
+            db_manager.close()
+
+
+def parse_retention_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py --retention", description="Delete old price history")
+    parser.add_argument("days", nargs="?", type=int, default=DEFAULT_RETENTION_DAYS, help="days of prices kept")
+    parser.add_argument("--no-downsample", dest="downsample", action="store_false",
+                        default=DEFAULT_RETENTION_DOWNSAMPLE, help="do not roll up prices before deleting them")
+    parser.add_argument("--ttl", action="store_true", help="let MongoDB expire raw prices instead, 0 days turns it off")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_RETENTION_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=DEFAULT_RETENTION_PAUSE_SECONDS, help="seconds between chunks")
+    args = parser.parse_args(argv)
+    if args.days is None:
+        parser.error("days is required when DEFAULT_RETENTION_DAYS is not set")
+    return args
+
+
+def apply_retention(args):
+    """Delete prices older than the retention period, or configure their expiry"""
+    logger = setup_logging()
+
+    db_manager = None
+    try:
+        db_manager = DatabaseManager()
+        retention = PriceRetention(db_manager, batch_size=args.batch_size, pause_seconds=args.pause,
+                                   downsample=args.downsample)
+        if args.ttl:
+            retention.configure_ttl(args.days or None)
+            print(f"Price expiry set to {args.days} days" if args.days else "Price expiry turned off")
+            return True
+
+        logger.info("Deleting prices older than %s days...", args.days)
+        counters = retention.run(args.days)
+        print(f"Deleted {counters['deleted']} prices observed before {counters['cutoff']:%Y-%m-%d}")
+        return True
+
+    except Exception as e:
+        logger.exception("Price retention failed: %s", e)
+        return False
+
+    finally:
+        if db_manager:
+            db_manager.close()
+
+
+def replay_archive(archive_path: str = DEFAULT_ARCHIVE_PATH, database_name: str = None):
+    """Re-parse archived pages into a database without fetching anything"""
+    logger = setup_logging()
+    logger.info("Replaying archived pages from %s", archive_path)
+
+    db_manager = None
+    try:
+        db_manager = DatabaseManager(database_name=database_name) if database_name else DatabaseManager()
+        db_ops = DatabaseOperations(db_manager)
+        replayer = ArchiveReplayer(PageArchive(archive_path), db_ops)
+        report = replayer.run()
+        display_results(report, db_manager)
+        return report.success
+
+    except Exception as e:
+        logger.exception("Archive replay failed: %s", e)
+        return False
+
+    finally:
+        if db_manager:
+            db_manager.close()
+
+
 if __name__ == "__main__":
+    # Options shared by every command, logging is configured once before the command runs
+    if "--log-json" in sys.argv:
+        sys.argv.remove("--log-json")
+        setup_logging(log_format="json")
+
     # Check command line arguments
     if len(sys.argv) > 1:
         if sys.argv[1] == "--test-db":
             success = test_database()
             sys.exit(0 if success else 1)
+        elif sys.argv[1] == "--recompute-best-prices":
+            success = recompute_best_prices()
+            sys.exit(0 if success else 1)
+        elif sys.argv[1] == "--rebuild-facets":
+            success = rebuild_price_facets()
+            sys.exit(0 if success else 1)
+        elif sys.argv[1] == "--migrate":
+            success = migrate_schema()
+            sys.exit(0 if success else 1)
+        elif sys.argv[1] == "--rollup":
+            success = rollup_prices(rebuild="--rebuild" in sys.argv[2:])
+            sys.exit(0 if success else 1)
+        elif sys.argv[1] == "--migrate-prices":
+            target_backend = sys.argv[2] if len(sys.argv) > 2 else "timeseries"
+            batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+            success = migrate_price_history(target_backend, batch_size)
+            sys.exit(0 if success else 1)
+        elif sys.argv[1] == "--export":
+            success = export_prices(parse_export_args(sys.argv[2:]))
+            sys.exit(0 if success else 1)
+        elif sys.argv[1] == "--retention":
+            success = apply_retention(parse_retention_args(sys.argv[2:]))
+            sys.exit(0 if success else 1)
+        elif sys.argv[1] == "--replay":
+            archive_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_ARCHIVE_PATH
+            database_name = sys.argv[3] if len(sys.argv) > 3 else None
+            success = replay_archive(archive_path, database_name)
+            sys.exit(0 if success else 1)
         elif sys.argv[1] == "--help":
             print("Tech Price Scraper")
             print("Usage:")
             print("  python main.py           # Run the scraper")
             print("  python main.py --test-db # Test database connection")
+            print("  python main.py --recompute-best-prices # Rebuild best prices from price history")
+            print("  python main.py --rebuild-facets # Denormalize older prices and rebuild price facets")
+            print("  python main.py --migrate # Apply pending collection and index migrations")
+            print("  python main.py --rollup [--rebuild] # Refresh price statistics from new prices")
+            print("  python main.py --migrate-prices [backend] [batch_size] # Copy price history to another backend")
+            print("  python main.py --export [path] [--format csv|parquet] [--since DATE] [--until DATE] "
+                  "[--website NAME] [--incremental] [--batch-size N] # Export price history")
+            print("  python main.py --retention [days] [--no-downsample] [--ttl] [--batch-size N] [--pause S] "
+                  "# Delete old price history in chunks")
+            print("  python main.py --replay [archive] [database] # Re-parse archived pages into a database")
             print("  python main.py --help    # Show this help")
+            print("Options:")
+            print("  --log-json               # Write logs as JSON lines")
             sys.exit(0)
     
     # Run main scraper
@@ -1,11 +1,15 @@
 from models.website import Website
 from models.product import Product
 from models.price import Price
-from models.scrap import ScrapingResult
+from models.scrap import ScrapingResult, RunReport
+from models.records import ProductRecord, PriceRecord
 
 __all__ = [
     'Website', 
     'Product', 
     'Price', 
-    'ScrapingResult'
+    'ScrapingResult',
+    'RunReport',
+    'ProductRecord',
+    'PriceRecord'
 ]
@@ -17,6 +17,11 @@ class Price(BaseModel):
     shipping_cost: Optional[float] = None
     seller: Optional[str] = None
     scraped_at: datetime
+    last_seen_at: Optional[datetime] = None  # last observation of an unchanged price, change-only mode
+    # Copied from the product so price queries need no $lookup
+    gpu_ram: Optional[str] = None
+    brand: Optional[str] = None
+    model: Optional[str] = None
 
     class Config:
         populate_by_name = True
@@ -14,6 +14,7 @@ class Product(BaseModel):
     model: str
     specifications: Dict[str, Any] = Field(default_factory=dict)
     current_best_price: Optional[Dict[str, Any]] = None
+    latest_prices: Dict[str, Dict[str, Any]] = Field(default_factory=dict)  # website_id -> latest price
     price_stats: Optional[Dict[str, Any]] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
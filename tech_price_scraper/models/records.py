@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+
+
+class ProductRecord:
+    """Lightweight product for bulk ingestion, builds its BSON document without pydantic"""
+
+    __slots__ = ("name", "slug", "category", "brand", "model", "specifications")
+
+    def __init__(self, name: str, slug: str, category: str, brand: str, model: str,
+                 specifications: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.slug = slug
+        self.category = category
+        self.brand = brand
+        self.model = model
+        self.specifications = specifications if specifications is not None else {}
+
+    def to_document(self) -> Dict[str, Any]:
+        """Fields set by the scraper, same as Product.dict(by_alias=True, exclude_unset=True)"""
+        return {
+            "name": self.name,
+            "slug": self.slug,
+            "category": self.category,
+            "brand": self.brand,
+            "model": self.model,
+            "specifications": self.specifications,
+        }
+
+
+class PriceRecord:
+    """Lightweight price observation for bulk ingestion, builds its BSON document without pydantic
+
+    gpu_ram, brand and model are copied from the product so price queries can filter and
+    facet on them without a $lookup into products.
+    """
+
+    __slots__ = ("product_id", "website_id", "price", "currency", "product_url", "availability",
+                 "scraped_at", "last_seen_at", "gpu_ram", "brand", "model")
+
+    def __init__(self, product_id: str, website_id: str, price: float, currency: str, product_url: str,
+                 availability: str, scraped_at: datetime, last_seen_at: Optional[datetime] = None,
+                 gpu_ram: Optional[str] = None, brand: Optional[str] = None, model: Optional[str] = None):
+        self.product_id = str(product_id)
+        self.website_id = str(website_id)
+        self.price = float(price)
+        self.currency = currency
+        self.product_url = product_url
+        self.availability = availability
+        self.scraped_at = scraped_at
+        self.last_seen_at = last_seen_at
+        self.gpu_ram = gpu_ram
+        self.brand = brand
+        self.model = model
+
+    def to_document(self) -> Dict[str, Any]:
+        """BSON-ready price document with ObjectId references"""
+        doc = {
+            "product_id": ObjectId(self.product_id),
+            "website_id": ObjectId(self.website_id),
+            "price": self.price,
+            "currency": self.currency,
+            "product_url": self.product_url,
+            "availability": self.availability,
+            "scraped_at": self.scraped_at,
+        }
+        if self.last_seen_at is not None:
+            doc["last_seen_at"] = self.last_seen_at
+        for field in ("gpu_ram", "brand", "model"):
+            value = getattr(self, field)
+            if value is not None:
+                doc[field] = value
+        return doc
@@ -11,5 +11,21 @@ class ScrapingResult(BaseModel):
     products_processed: int
     products_updated: int
     products_created: int
+    pages_unchanged: int = 0
     errors: List[str] = Field(default_factory=list)
     duration_seconds: float = 0.0
+
+
+class RunReport(BaseModel):
+    """Aggregated results of a scheduler run over several websites"""
+    started_at: datetime
+    results: List[ScrapingResult] = Field(default_factory=list)
+    duration_seconds: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return bool(self.results) and all(result.success for result in self.results)
+
+    def total(self, field: str) -> int:
+        """Sum a ScrapingResult counter over all websites"""
+        return sum(getattr(result, field) for result in self.results)
@@ -15,6 +15,7 @@ class Website(BaseModel):
     scraping_config: Dict[str, Any] = Field(default_factory=dict)
     active: bool = True
     last_scraped: Optional[datetime] = None
+    cache_generation: int = 0  # bumped after every run writing prices, read API caches key on it
     error_count: int = 0
     created_at: datetime
 
@@ -1,13 +1,28 @@
-from scrapers.base_scraper import BaseScraper
+from scrapers.base_scraper import BaseScraper, scrape_many_async
 from scrapers.web_client import WebClient
+from scrapers.async_web_client import AsyncWebClient
+from scrapers.rate_limit import AdaptiveRateController
 from scrapers.parser import ProductParser
 from scrapers.storage import DataStorage
 from scrapers.topachat import TopAchatScraper
+from scrapers.registry import register_scraper, get_scraper_class, registered_scrapers
+from scrapers.scheduler import ScrapeScheduler
+from scrapers.archive import PageArchive
+from scrapers.replay import ArchiveReplayer
 
 __all__ = [
     'BaseScraper', 
+    'scrape_many_async',
     'WebClient', 
+    'AsyncWebClient',
+    'AdaptiveRateController',
     'ProductParser', 
     'DataStorage', 
-    'TopAchatScraper'
+    'TopAchatScraper',
+    'register_scraper',
+    'get_scraper_class',
+    'registered_scrapers',
+    'ScrapeScheduler',
+    'PageArchive',
+    'ArchiveReplayer'
 ]
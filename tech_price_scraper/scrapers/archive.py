@@ -0,0 +1,117 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, UTC
+from typing import Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, gzip is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Index appends from every archive instance of the process go through one lock
+_index_lock = threading.Lock()
+
+_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+
+class PageArchive:
+    """Content-addressed local archive of fetched pages
+
+    Page bodies are stored compressed once per SHA-256 under objects/, and index.jsonl
+    records every fetch (URL, timestamp, website, hash) so pages can be replayed later.
+    """
+
+    def __init__(self, root: str, website_name: Optional[str] = None, compression: Optional[str] = None):
+        self.root = root
+        self.website_name = website_name
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd archive compression requires the zstandard package")
+        self.compression = compression
+        self.index_path = os.path.join(root, "index.jsonl")
+
+    def _object_path(self, digest: str, compression: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}{_EXTENSIONS[compression]}")
+
+    def _compress(self, content: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor().compress(content)
+        return gzip.compress(content)
+
+    @staticmethod
+    def _decompress(data: bytes, compression: str) -> bytes:
+        if compression == "zstd":
+            if zstandard is None:
+                raise ValueError("Reading zstd archive objects requires the zstandard package")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def store(self, url: str, content: bytes, encoding: Optional[str] = None,
+              fetched_at: Optional[datetime] = None, website_name: Optional[str] = None) -> str:
+        """Archive a fetched page body, returns its content hash"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest, self.compression)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self._compress(content))
+            os.replace(tmp_path, path)
+
+        entry = {
+            "url": url,
+            "fetched_at": (fetched_at or datetime.now(UTC)).isoformat(),
+            "website": website_name or self.website_name,
+            "sha256": digest,
+            "compression": self.compression,
+            "encoding": encoding,
+        }
+        with _index_lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def entries(self, website_name: Optional[str] = None, since: Optional[datetime] = None,
+                until: Optional[datetime] = None) -> Iterator[Dict]:
+        """Archived fetches in fetch order, optionally filtered by website and time range"""
+        if not os.path.exists(self.index_path):
+            return
+
+        with open(self.index_path, encoding="utf-8") as f:
+            entries = []
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash while appending can leave a truncated last line
+                    logger.warning("Skipping malformed archive index line %s", line_number)
+                    continue
+                entry["fetched_at"] = datetime.fromisoformat(entry["fetched_at"])
+                if website_name and entry.get("website") != website_name:
+                    continue
+                if since and entry["fetched_at"] < since:
+                    continue
+                if until and entry["fetched_at"] >= until:
+                    continue
+                entries.append(entry)
+
+        entries.sort(key=lambda entry: entry["fetched_at"])
+        yield from entries
+
+    def load(self, entry: Dict) -> str:
+        """Decompressed and decoded body of an archived fetch"""
+        with open(self._object_path(entry["sha256"], entry["compression"]), "rb") as f:
+            content = self._decompress(f.read(), entry["compression"])
+        return content.decode(entry.get("encoding") or "utf-8", errors="replace")
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from datetime import datetime, UTC
+from typing import List, Mapping, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from scrapers.archive import PageArchive
+from scrapers.http_cache import ValidatorCache
+from scrapers.rate_limit import AdaptiveRateController, THROTTLE_STATUSES, parse_retry_after
+from scrapers.web_client import DEFAULT_HEADERS
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncResponse:
+    """Fully read HTTP response returned by AsyncWebClient, fetched_at is also the archived fetch time"""
+
+    def __init__(self, url: str, status_code: int, text: str, headers: Mapping[str, str], unchanged: bool = False,
+                 fetched_at: Optional[datetime] = None):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.unchanged = unchanged
+        self.fetched_at = fetched_at or datetime.now(UTC)
+
+
+class AsyncWebClient:
+    """Asyncio HTTP client with adaptive per-host rate limiting and retries"""
+
+    def __init__(self, rate_limit_ms: int = 5000, max_retries: int = 3, max_concurrency: int = 4,
+                 timeout_seconds: float = 10, rate_controller: Optional[AdaptiveRateController] = None,
+                 validator_cache: Optional[ValidatorCache] = None, archive: Optional[PageArchive] = None):
+        self.rate_limit_ms = rate_limit_ms
+        self.max_retries = max_retries
+        self.validator_cache = validator_cache
+        self.archive = archive
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        self.rate_controller = rate_controller or AdaptiveRateController(rate_limit_ms)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session must be created inside the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(headers=DEFAULT_HEADERS, timeout=self.timeout)
+        return self._session
+
+    async def get(self, url: str, **kwargs) -> Optional[AsyncResponse]:
+        """Make GET request with per-host rate limiting and retries, conditional when a validator cache is set"""
+        session = self._get_session()
+        if self.validator_cache is not None:
+            kwargs['headers'] = {**self.validator_cache.conditional_headers(url), **kwargs.get('headers', {})}
+
+        host = urlparse(url).netloc
+        for attempt in range(self.max_retries):
+            try:
+                async with self._semaphore:
+                    # Apply rate limiting, this also waits out the backoff of a failed attempt
+                    METRICS.observe("rate_limit_sleep", await self._apply_rate_limit(url), host=host)
+
+                    started = asyncio.get_running_loop().time()
+                    with METRICS.timer("fetch", attributes={"url": url, "attempt": attempt + 1}, host=host):
+                        async with session.get(url, **kwargs) as response:
+                            response.raise_for_status()
+                            content = await response.read()
+                            text = await response.text()
+                            encoding = response.get_encoding() if content else None
+                    self.rate_controller.record_response(url, asyncio.get_running_loop().time() - started)
+
+                fetched_at = datetime.now(UTC)
+                headers = response.headers.copy()  # case-insensitive
+                unchanged = self._check_unchanged(url, response.status, headers, content)
+                if self.archive is not None and response.status != 304:
+                    await asyncio.to_thread(self._archive, url, content, encoding, fetched_at)
+
+                logger.debug("Successfully fetched: %s", url)
+                return AsyncResponse(str(response.url), response.status, text, headers, unchanged, fetched_at)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # ClientResponseError carries the status and headers, network errors and timeouts do not
+                status = getattr(e, 'status', None)
+                headers = getattr(e, 'headers', None) or {}
+                delay = self.rate_controller.record_failure(url, status, parse_retry_after(headers.get('Retry-After')))
+                if status in THROTTLE_STATUSES:
+                    METRICS.inc("scraper_throttled_total", host=host, status=status)
+                logger.warning("Request failed (attempt %s/%s): %s - %s, next request in %.1fs",
+                               attempt + 1, self.max_retries, url, e, delay)
+                if attempt < self.max_retries - 1:
+                    METRICS.inc("scraper_retries_total", host=host)
+                else:
+                    METRICS.inc("scraper_fetch_failures_total", host=host)
+                    logger.exception("All retries failed for: %s", url)
+                    return None
+
+        return None
+
+    async def _apply_rate_limit(self, url: str) -> float:
+        """Wait for the next request slot of the host, returns the time waited in seconds"""
+        waited = 0.0
+        wait_time = self.rate_controller.reserve(url)
+        while wait_time > 0:
+            await asyncio.sleep(wait_time)
+            waited += wait_time
+            # Another request may have been throttled while this one waited
+            wait_time = self.rate_controller.recheck(url)
+        return waited
+
+    def _check_unchanged(self, url: str, status: int, headers: Mapping[str, str], content: bytes) -> bool:
+        if self.validator_cache is None:
+            return False
+        if status == 304:
+            logger.debug("Not modified: %s", url)
+            return True
+
+        return self.validator_cache.update(
+            url, headers.get('ETag'), headers.get('Last-Modified'), ValidatorCache.body_hash(content)
+        )
+
+    def _archive(self, url: str, content: bytes, encoding: Optional[str], fetched_at: datetime):
+        try:
+            self.archive.store(url, content, encoding, fetched_at=fetched_at)
+        except OSError as e:
+            logger.warning("Failed to archive %s: %s", url, e)
+
+    async def get_many(self, urls: List[str], **kwargs) -> List[Optional[AsyncResponse]]:
+        """Fetch several URLs concurrently, results are returned in the order of urls"""
+        return await asyncio.gather(*(self.get(url, **kwargs) for url in urls))
+
+    async def close(self):
+        """Close the session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
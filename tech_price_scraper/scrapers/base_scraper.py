@@ -1,5 +1,7 @@
+import asyncio
 from abc import ABC, abstractmethod
-from models import ScrapingResult
+from typing import List, Optional
+from models import ScrapingResult, Website
 
 class BaseScraper(ABC):
     """Base class for all scrapers"""
@@ -12,7 +14,24 @@ class BaseScraper(ABC):
         """Scrape product listings from the website"""
         pass
     
+    async def scrape_listings_async(self, max_pages: int = 5, pipeline=None) -> ScrapingResult:
+        """Async variant of scrape_listings, runs the blocking scraper in a thread by default
+
+        Scrapers supporting it parse and store pages through the given ScrapePipeline.
+        """
+        return await asyncio.to_thread(self.scrape_listings, max_pages)
+    
+    @classmethod
+    def default_website(cls) -> Optional[Website]:
+        """Default configuration of the scraped website, seeded into the websites collection"""
+        return None
+
     @abstractmethod
     def setup_website_config(self):
         """Setup website configuration in database"""
         pass
+
+
+async def scrape_many_async(scrapers: List[BaseScraper], max_pages: int = 5) -> List[ScrapingResult]:
+    """Run several scrapers concurrently, results are returned in the order of scrapers"""
+    return await asyncio.gather(*(scraper.scrape_listings_async(max_pages) for scraper in scrapers))
@@ -0,0 +1,107 @@
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_GPU_KEYWORDS = [
+    'geforce', 'rtx', 'gtx', 'radeon', 'rx', 'carte graphique',
+    'nvidia', 'amd', 'gpu', 'graphics card'
+]
+
+# Brand keywords in priority order, the first brand with a keyword in the name wins
+BRAND_KEYWORDS = [
+    ('nvidia', ('nvidia', 'geforce')),
+    ('amd', ('amd', 'radeon')),
+    ('intel', ('intel',)),
+]
+
+# Model patterns in priority order, a match of an earlier pattern anywhere in the name wins.
+# Each pattern is paired with a literal it requires, a cheap substring check skips most searches.
+MODEL_PATTERNS = [
+    ('rtx', re.compile(r'rtx\s*(\d+(?:\s*ti)?(?:\s*super)?)')),
+    ('gtx', re.compile(r'gtx\s*(\d+(?:\s*ti)?)')),
+    ('rx', re.compile(r'rx\s*(\d+(?:\s*xt)?)')),
+    ('', re.compile(r'(\d{4}(?:\s*xt)?)')),
+]
+
+_MEMORY_RE = re.compile(r"(\d+)\s*(gb|go)", re.IGNORECASE)
+_SLUG_STRIP_RE = re.compile(r"[^\w\s-]")
+_SLUG_SEPARATOR_RE = re.compile(r"[\s_-]+")
+
+
+class Classification(NamedTuple):
+    """Classification of a product name"""
+    brand: str
+    model: str
+    gpu_ram: Optional[str]
+    is_gpu: bool
+
+
+class ProductClassifier:
+    """Precompiled matchers for GPU detection, brand/model parsing and memory extraction
+
+    GPU keywords are folded into a single alternation. Model patterns stay separate because
+    their priority order matters, and a combined lookahead alternation measured slower than
+    prefiltered searches with CPython's re engine.
+    """
+
+    def __init__(self, gpu_keywords: Optional[List[str]] = None):
+        self.gpu_keywords = list(gpu_keywords if gpu_keywords is not None else DEFAULT_GPU_KEYWORDS)
+        self._gpu_re = None
+        if self.gpu_keywords:
+            self._gpu_re = re.compile('|'.join(re.escape(keyword) for keyword in self.gpu_keywords))
+
+    def is_gpu(self, name: str) -> bool:
+        """Check if product name indicates it's a GPU"""
+        return self._is_gpu_lower(name.lower())
+
+    def _is_gpu_lower(self, name_lower: str) -> bool:
+        return self._gpu_re is not None and self._gpu_re.search(name_lower) is not None
+
+    def parse_brand_model(self, name: str) -> Tuple[str, str]:
+        """Parse brand and model from product name"""
+        return self._parse_brand_model_lower(name.lower())
+
+    def _parse_brand_model_lower(self, name_lower: str) -> Tuple[str, str]:
+        brand = 'unknown'
+        for candidate, keywords in BRAND_KEYWORDS:
+            if any(keyword in name_lower for keyword in keywords):
+                brand = candidate
+                break
+
+        model = 'unknown'
+        for literal, pattern in MODEL_PATTERNS:
+            if literal in name_lower:
+                match = pattern.search(name_lower)
+                if match:
+                    model = match.group(1).replace(' ', '-')
+                    break
+
+        return brand, model
+
+    def extract_memory(self, text: str) -> Optional[str]:
+        """
+        Extract memory size like '16 Go', '8GB', '12 gb' etc. from product label.
+        Returns the normalized size (e.g. '16GB') or None if not found.
+        """
+        match = _MEMORY_RE.search(text)
+        if match:
+            return f"{match.group(1)}GB"
+        return None
+
+    def classify(self, name: str, sublabel: Optional[str] = None) -> Classification:
+        """Classify a product name, memory is read from the sublabel when given"""
+        name_lower = name.lower()
+        brand, model = self._parse_brand_model_lower(name_lower)
+        gpu_ram = self.extract_memory(sublabel if sublabel is not None else name)
+        return Classification(brand, model, gpu_ram, self._is_gpu_lower(name_lower))
+
+    def classify_many(self, names: Iterable[str]) -> List[Classification]:
+        """Classify a batch of product names"""
+        classify = self.classify
+        return [classify(name) for name in names]
+
+
+def make_slug(name: str, gpu_ram: str) -> str:
+    """Build the product slug from its name and memory size"""
+    slug = _SLUG_STRIP_RE.sub("", name.lower())
+    slug = f"{slug}-{gpu_ram.lower()}"
+    return _SLUG_SEPARATOR_RE.sub("-", slug).strip("-")
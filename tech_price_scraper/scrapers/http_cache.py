@@ -0,0 +1,90 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ValidatorCache:
+    """On-disk cache of HTTP validators (ETag/Last-Modified) and body hashes per URL"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable HTTP cache %s: %s", self.path, e)
+            self.entries = {}
+
+    @staticmethod
+    def body_hash(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def get(self, url: str) -> Optional[Dict]:
+        return self.entries.get(url)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Validators to send for url, only once the cached version of the page has been processed"""
+        entry = self.entries.get(url)
+        if not entry or entry.get("product_ids") is None:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, etag: Optional[str], last_modified: Optional[str], body_hash: str) -> bool:
+        """Record the validators of a fetched page, returns True if the body is unchanged"""
+        entry = self.entries.get(url) or {}
+        unchanged = entry.get("body_hash") == body_hash and entry.get("product_ids") is not None
+
+        if not unchanged:
+            # A new body must be processed again before it can short-circuit anything
+            entry = {"body_hash": body_hash, "product_ids": None}
+        entry["etag"] = etag
+        entry["last_modified"] = last_modified
+        self.entries[url] = entry
+        return unchanged
+
+    def processed_product_ids(self, url: str) -> Optional[List[str]]:
+        entry = self.entries.get(url)
+        return entry.get("product_ids") if entry else None
+
+    def mark_processed(self, url: str, product_ids: List[str]):
+        """Remember the products stored from the current version of the page"""
+        entry = self.entries.get(url)
+        if entry is not None:
+            entry["product_ids"] = list(product_ids)
+
+    def pagination(self, url: str) -> Optional[Dict]:
+        """Pagination metadata parsed from the current version of the page"""
+        entry = self.entries.get(url)
+        return entry.get("pagination") if entry else None
+
+    def set_pagination(self, url: str, last_page: Optional[int], items_per_page: int):
+        """Remember the pagination of the page, a changed body drops it with the rest of the entry"""
+        entry = self.entries.get(url)
+        if entry is not None:
+            entry["pagination"] = {"last_page": last_page, "items_per_page": items_per_page}
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
@@ -1,89 +1,121 @@
 import re
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional
 import logging
 from urllib.parse import urljoin
 
+from scrapers.classification import ProductClassifier, DEFAULT_GPU_KEYWORDS
+from scrapers.parser_engines import get_parser_engine, TOPACHAT_SELECTORS
+from utils.metrics import timed
+
 logger = logging.getLogger(__name__)
 
+_PRICE_RE = re.compile(r'(\d+[.,]\d+)')
+_PAGINATION_RE = re.compile(r'<nav[^>]*\bclass="[^"]*\bpagination\b[^"]*"[^>]*>(.*?)</nav>', re.DOTALL)
+_TOPACHAT_PAGE_RE = re.compile(r'_puis_page_est_(\d+)\.html')
+
+
+class Pagination(NamedTuple):
+    """Pagination metadata of a listing page"""
+    last_page: Optional[int]  # None when the page has no pagination links
+    items_per_page: int
+
+
+class ListingPage(NamedTuple):
+    """Products and pagination metadata parsed from a listing page"""
+    products: List[Dict]
+    pagination: Pagination
+
 
 class ProductParser:
     """Parser for extracting product information from HTML"""
     
-    def __init__(self):
-        self.gpu_keywords = [
-            'geforce', 'rtx', 'gtx', 'radeon', 'rx', 'carte graphique',
-            'nvidia', 'amd', 'gpu', 'graphics card'
-        ]
+    def __init__(self, engine: str = 'lxml'):
+        self.gpu_keywords = list(DEFAULT_GPU_KEYWORDS)
+        self.classifier = ProductClassifier(self.gpu_keywords)
+        self.engine_name = engine
+        # Selectors are compiled once per site when the engine is built
+        self.topachat_engine = get_parser_engine(engine, TOPACHAT_SELECTORS)
     
+    def parse_listings(self, website_name: str, html: str, page_url: str) -> List[Dict]:
+        """Parse product listings with the parser of a website"""
+        parse = getattr(self, f"parse_{website_name}_listings", None)
+        if parse is None:
+            raise ValueError(f"No listing parser for website: {website_name}")
+        return parse(html, page_url)
+    
+    def parse_page(self, website_name: str, html: str, page_url: str) -> ListingPage:
+        """Parse product listings and pagination metadata with the parser of a website"""
+        parse = getattr(self, f"parse_{website_name}_page", None)
+        if parse is None:
+            raise ValueError(f"No listing page parser for website: {website_name}")
+        return parse(html, page_url)
+    
+    @timed("parse", website="topachat")
     def parse_topachat_listings(self, html: str, page_url: str) -> List[Dict]:
         """Parse product listings from TopAchat HTML"""
-        #logger.info(html)
-        soup = BeautifulSoup(html, 'html.parser')
+        return self._topachat_products(self.topachat_engine.extract_cards(html), page_url)
+    
+    @timed("parse", website="topachat")
+    def parse_topachat_page(self, html: str, page_url: str) -> ListingPage:
+        """Parse product listings and pagination metadata from TopAchat HTML"""
+        cards = self.topachat_engine.extract_cards(html)
+        pagination = Pagination(self._last_page(html, _TOPACHAT_PAGE_RE), len(cards))
+        return ListingPage(self._topachat_products(cards, page_url), pagination)
+    
+    @staticmethod
+    def _last_page(html: str, page_re: re.Pattern) -> Optional[int]:
+        """Highest page number linked from the pagination navigation"""
+        match = _PAGINATION_RE.search(html)
+        if match is None:
+            return None
+        pages = [int(page) for page in page_re.findall(match.group(1))]
+        # The navigation of page 1 only links to the other pages
+        return max(pages + [1])
+    
+    def _topachat_products(self, cards: List[Dict[str, Optional[str]]], page_url: str) -> List[Dict]:
         products = []
-        # Try different selectors for product containers
-        selectors_to_try = [
-            '.product-list__product-wrapper'
-        ]
-
-        product_elements = []
-        for selector in selectors_to_try:
-            product_elements = soup.select(selector)
-            if product_elements:
-                logger.debug(f"Found {len(product_elements)} products using selector: {selector}")
-                break
-        
-        if not product_elements:
+        if not cards:
             logger.warning("No products found with standard selectors")
             return products
         
-        for element in product_elements:
+        for card in cards:
             try:
-                product_data = self._extract_product_data(element, page_url)
+                product_data = self._extract_product_data(card, page_url)
                 if product_data and self._is_gpu_product(product_data['name']):
                     products.append(product_data)
             except Exception as e:
-                logger.warning(f"Error parsing product element: {e}")
+                logger.warning("Error parsing product element: %s", e)
                 continue
         
         return products
     
-    def _extract_product_data(self, element, base_url: str) -> Optional[Dict]:
-        """Extract product data from a product element"""
+    def _extract_product_data(self, card: Dict[str, Optional[str]], base_url: str) -> Optional[Dict]:
+        """Build product data from the raw fields of a product card"""
         try:
             # Extract name
-            name_elem = element.select_one('.product__label')
-            if not name_elem:
-                return None
-            
-            name = name_elem.get_text(strip=True)
+            name = card['name']
             if not name:
                 return None
 
-            # Extract specs from sublabel
-            sublabel_elem = element.select_one('.product__sublabel')
-            sublabel = None
-            if sublabel_elem:
-                sublabel_text = sublabel_elem.get_text(strip=True)
-                gpu_ram = self.extract_memory(sublabel_text)
+            # Extract specs from sublabel, gpu_ram is part of the product slug
+            if card['sublabel'] is None:
+                return None
+            gpu_ram = self.extract_memory(card['sublabel'])
             
             # Extract price
-            price_elem = element.select_one('.product__price')
             price = None
-            if price_elem:
-                price_text = price_elem.get_text(strip=True)
-                price_match = re.search(r'(\d+[.,]\d+)', price_text)
+            if card['price'] is not None:
+                price_match = _PRICE_RE.search(card['price'])
                 if price_match:
                     price = float(price_match.group(1).replace(',', '.'))
             
             # Extract URL
-            link_elem = element.select_one('a')
             product_url = ''
-            if link_elem and link_elem.get('href'):
-                product_url = urljoin(base_url, link_elem.get('href'))
+            if card['link']:
+                product_url = urljoin(base_url, card['link'])
             
             # Extract availability
-            availability = self._extract_availability(element)
+            availability = self._extract_availability(card['availability'])
             
             return {
                 'name': name,
@@ -94,14 +126,13 @@ class ProductParser:
             }
             
         except Exception as e:
-            logger.warning(f"Error extracting product data: {e}")
+            logger.warning("Error extracting product data: %s", e)
             return None
     
-    def _extract_availability(self, element) -> str:
-        """Extract availability from product element"""
-        availability_elem = element.select_one('.dispo, .stock, .availability')
-        if availability_elem:
-            avail_text = availability_elem.get_text(strip=True).lower()
+    def _extract_availability(self, avail_text: Optional[str]) -> str:
+        """Extract availability from the availability text of a product card"""
+        if avail_text is not None:
+            avail_text = avail_text.lower()
             if 'disponible' in avail_text or 'en stock' in avail_text:
                 return 'in_stock'
             elif 'rupture' in avail_text or 'épuisé' in avail_text:
@@ -113,51 +144,15 @@ class ProductParser:
     
     def _is_gpu_product(self, name: str) -> bool:
         """Check if product name indicates it's a GPU"""
-        name_lower = name.lower()
-        return any(keyword in name_lower for keyword in self.gpu_keywords)
+        return self.classifier.is_gpu(name)
     
     def parse_brand_model(self, name: str) -> tuple:
         """Parse brand and model from product name"""
-        name_lower = name.lower()
-        
-        # Brand detection
-        if 'nvidia' in name_lower or 'geforce' in name_lower:
-            brand = 'nvidia'
-        elif 'amd' in name_lower or 'radeon' in name_lower:
-            brand = 'amd'
-        elif 'intel' in name_lower:
-            brand = 'intel'
-        else:
-            brand = 'unknown'
-        
-        # Model extraction
-        model_patterns = [
-            r'rtx\s*(\d+(?:\s*ti)?(?:\s*super)?)',
-            r'gtx\s*(\d+(?:\s*ti)?)',
-            r'rx\s*(\d+(?:\s*xt)?)',
-            r'(\d{4}(?:\s*xt)?)'
-        ]
-        
-        model = 'unknown'
-        for pattern in model_patterns:
-            match = re.search(pattern, name_lower)
-            if match:
-                model = match.group(1).replace(' ', '-')
-                break
-        
-        return brand, model
+        return self.classifier.parse_brand_model(name)
 
     def extract_memory(self, text: str) -> str | None:
         """
         Extract memory size like '16 Go', '8GB', '12 gb' etc. from product label.
         Returns the matched string or None if not found.
         """
-        pattern = re.compile(r"(\d+)\s*(gb|go)", re.IGNORECASE)
-        match = pattern.search(text)
-        if match:
-            # Normalize: number + GB
-            number = match.group(1)
-            unit = match.group(2).upper()
-            return f"{number}GB"
-        return None
-
+        return self.classifier.extract_memory(text)
@@ -0,0 +1,163 @@
+import logging
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Tags whose content BeautifulSoup's get_text() ignores
+_NON_TEXT_TAGS = {'script', 'style', 'template'}
+
+
+class SiteSelectors:
+    """CSS class based selectors describing the product cards of a listing page"""
+
+    def __init__(self, container: str, name: str, sublabel: str, price: str,
+                 availability: List[str], link_tag: str = 'a'):
+        self.container = container
+        self.name = name
+        self.sublabel = sublabel
+        self.price = price
+        self.availability = availability
+        self.link_tag = link_tag
+
+
+TOPACHAT_SELECTORS = SiteSelectors(
+    container='product-list__product-wrapper',
+    name='product__label',
+    sublabel='product__sublabel',
+    price='product__price',
+    availability=['dispo', 'stock', 'availability']
+)
+
+
+class SoupEngine:
+    """BeautifulSoup engine running one CSS query per field and product card"""
+
+    name = 'soup'
+
+    def __init__(self, selectors: SiteSelectors):
+        self.selectors = selectors
+        self.container_selector = f'.{selectors.container}'
+        self.availability_selector = ', '.join(f'.{cls}' for cls in selectors.availability)
+
+    def extract_cards(self, html: str) -> List[Dict[str, Optional[str]]]:
+        """Return the raw text fields of every product card on the page"""
+        soup = BeautifulSoup(html, 'html.parser')
+        elements = soup.select(self.container_selector)
+        if elements:
+            logger.debug("Found %s products using selector: %s", len(elements), self.container_selector)
+        return [self._extract_card(element) for element in elements]
+
+    def _extract_card(self, element) -> Dict[str, Optional[str]]:
+        selectors = self.selectors
+        name_elem = element.select_one(f'.{selectors.name}')
+        sublabel_elem = element.select_one(f'.{selectors.sublabel}')
+        price_elem = element.select_one(f'.{selectors.price}')
+        link_elem = element.select_one(selectors.link_tag)
+        availability_elem = element.select_one(self.availability_selector)
+
+        return {
+            'name': name_elem.get_text(strip=True) if name_elem else None,
+            'sublabel': sublabel_elem.get_text(strip=True) if sublabel_elem else None,
+            'price': price_elem.get_text(strip=True) if price_elem else None,
+            'link': link_elem.get('href') if link_elem else None,
+            'availability': availability_elem.get_text(strip=True) if availability_elem else None
+        }
+
+
+class LxmlEngine:
+    """lxml engine with a precompiled container XPath and a single traversal per product card"""
+
+    name = 'lxml'
+
+    def __init__(self, selectors: SiteSelectors):
+        self.selectors = selectors
+        self.container_xpath = etree.XPath(
+            f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {selectors.container} ')]"
+        )
+        # class -> field, availability classes share one field
+        self.class_fields = {
+            selectors.name: 'name',
+            selectors.sublabel: 'sublabel',
+            selectors.price: 'price',
+        }
+        for cls in selectors.availability:
+            self.class_fields[cls] = 'availability'
+
+    def extract_cards(self, html: str) -> List[Dict[str, Optional[str]]]:
+        """Return the raw text fields of every product card on the page"""
+        if not html or not html.strip():
+            return []
+        try:
+            root = lxml.html.fromstring(html)
+        except ValueError:
+            # lxml refuses str input carrying an XML encoding declaration
+            root = lxml.html.fromstring(html.encode('utf-8'))
+        elements = self.container_xpath(root)
+        if elements:
+            logger.debug("Found %s products using selector: .%s", len(elements), self.selectors.container)
+        return [self._extract_card(element) for element in elements]
+
+    def _extract_card(self, element) -> Dict[str, Optional[str]]:
+        found = {}
+        link = None
+        link_tag = self.selectors.link_tag
+        class_fields = self.class_fields
+
+        for node in element.iterdescendants():
+            if not isinstance(node.tag, str):
+                continue
+            if link is None and node.tag == link_tag:
+                link = node
+            classes = node.get('class')
+            if classes:
+                for cls in classes.split():
+                    field = class_fields.get(cls)
+                    # First match in document order wins, like select_one
+                    if field is not None and field not in found:
+                        found[field] = node
+
+        return {
+            'name': _get_text(found['name']) if 'name' in found else None,
+            'sublabel': _get_text(found['sublabel']) if 'sublabel' in found else None,
+            'price': _get_text(found['price']) if 'price' in found else None,
+            'link': link.get('href') if link is not None else None,
+            'availability': _get_text(found['availability']) if 'availability' in found else None
+        }
+
+
+def _collect_text(element, parts: List[str]):
+    if element.tag in _NON_TEXT_TAGS:
+        return
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        # Comments and processing instructions only contribute their tail
+        if isinstance(child.tag, str):
+            _collect_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+
+def _get_text(element) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True)"""
+    parts = []
+    _collect_text(element, parts)
+    return ''.join(part.strip() for part in parts)
+
+
+PARSER_ENGINES = {
+    SoupEngine.name: SoupEngine,
+    LxmlEngine.name: LxmlEngine,
+}
+
+
+def get_parser_engine(name: str, selectors: SiteSelectors):
+    """Build the parser engine registered under name for a site's selectors"""
+    try:
+        return PARSER_ENGINES[name](selectors)
+    except KeyError:
+        raise ValueError(f"Unknown parser engine: {name}")
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config import DEFAULT_PARSE_WORKERS, DEFAULT_PIPELINE_QUEUE_SIZE
+from models import ScrapingResult
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# One parser per engine in each worker process, built on first use
+_worker_parsers: Dict[str, object] = {}
+
+
+def parse_listing_page(engine: str, website_name: str, html: str, page_url: str) -> List[Dict]:
+    """Parse a listing page in a parser worker process"""
+    parser = _worker_parsers.get(engine)
+    if parser is None:
+        from scrapers.parser import ProductParser
+        parser = ProductParser(engine=engine)
+        _worker_parsers[engine] = parser
+    return parser.parse_listings(website_name, html, page_url)
+
+
+def timed_parse_listing_page(engine: str, website_name: str, html: str, page_url: str) -> Tuple[List[Dict], float]:
+    """Parse a listing page in a parser worker process, with the seconds spent parsing"""
+    started = time.perf_counter()
+    products = parse_listing_page(engine, website_name, html, page_url)
+    return products, time.perf_counter() - started
+
+
+class ScrapePipeline:
+    """Producer/consumer scrape pipeline
+
+    Fetchers push raw pages onto a bounded queue, a process pool turns them into
+    product dicts and a single storage consumer writes each page as one batch.
+    Bounded queues apply backpressure to the fetchers when parsing or storage lags.
+    A cancelled run, or one where a stage failed, cancels its fetchers, parsers and storer
+    without draining the queues, a page being stored in a worker thread still completes.
+    """
+
+    def __init__(self, parse_workers: int = DEFAULT_PARSE_WORKERS, queue_size: int = DEFAULT_PIPELINE_QUEUE_SIZE,
+                 executor: Optional[Executor] = None):
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            # spawn keeps open MongoDB sockets and event loop state out of the workers
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def run(self, scraper, page_urls: List[str], result: ScrapingResult, first_page: int = 1):
+        """Fetch, parse and store the listing pages of a scraper, in page order for storage
+
+        page_urls are the URLs of pages first_page, first_page + 1 and so on.
+        """
+        loop = asyncio.get_running_loop()
+        fetched: asyncio.Queue = asyncio.Queue(self.queue_size)
+        parsed: asyncio.Queue = asyncio.Queue(self.queue_size)
+        pages = iter(enumerate(page_urls, start=first_page))
+        stop = asyncio.Event()
+
+        async def fetcher():
+            # Fetchers share the page iterator, the client enforces the site's rate limit
+            for page, page_url in pages:
+                if stop.is_set():
+                    return
+                response = await scraper.async_web_client.get(page_url)
+                await fetched.put((page, page_url, response))
+
+        async def parser():
+            while True:
+                item = await fetched.get()
+                if item is None:
+                    return
+                page, page_url, response = item
+                products, error = None, None
+                if response and not response.unchanged and not stop.is_set():
+                    start = time.time()
+                    started = time.perf_counter()
+                    try:
+                        products, seconds = await loop.run_in_executor(
+                            self.executor, timed_parse_listing_page,
+                            scraper.parser.engine_name, scraper.website_name, response.text, page_url
+                        )
+                    except Exception as e:
+                        error = e
+                    else:
+                        # Worker processes keep their own metrics: parse is the time in the worker,
+                        # parse_wait the time the page waited for a free worker
+                        waited = max(0.0, time.perf_counter() - started - seconds)
+                        METRICS.observe("parse_wait", waited, start=start, website=scraper.website_name)
+                        METRICS.observe("parse", seconds, {"url": page_url}, start=start + waited,
+                                        website=scraper.website_name, operation="parse_listing_page")
+                await parsed.put((page, page_url, response, products, error))
+
+        async def storer():
+            # Pages are stored in order so that an empty page still ends the listing
+            pending: Dict[int, Tuple] = {}
+            next_page = first_page
+            while True:
+                item = await parsed.get()
+                if item is None:
+                    return
+                if stop.is_set():
+                    continue
+                pending[item[0]] = item
+                while next_page in pending and not stop.is_set():
+                    page, page_url, response, products, error = pending.pop(next_page)
+                    next_page += 1
+                    if not await asyncio.to_thread(self._store, scraper, page, page_url, response,
+                                                   products, error, result):
+                        stop.set()
+
+        async def drain():
+            await asyncio.gather(*fetcher_tasks)
+            for _ in parser_tasks:
+                await fetched.put(None)
+            await asyncio.gather(*parser_tasks)
+            await parsed.put(None)
+
+        fetcher_count = max(1, min(len(page_urls), getattr(scraper.async_web_client, "max_concurrency", 1)))
+        parser_count = max(1, self.parse_workers)
+
+        storer_task = asyncio.create_task(storer())
+        parser_tasks = [asyncio.create_task(parser()) for _ in range(parser_count)]
+        fetcher_tasks = [asyncio.create_task(fetcher()) for _ in range(fetcher_count)]
+        drain_task = asyncio.create_task(drain())
+        tasks = fetcher_tasks + parser_tasks + [drain_task, storer_task]
+        try:
+            # A failed stage ends the wait, the others would block on its full or empty queue
+            done, _ = await asyncio.wait([drain_task, storer_task], return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            if pending:
+                # Cancelled, e.g. by the site timeout, or a stage failed: queued pages are dropped
+                stop.set()
+                for task in pending:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _store(scraper, page: int, page_url: str, response, products: Optional[List[Dict]],
+               error: Optional[Exception], result: ScrapingResult) -> bool:
+        try:
+            return ScrapePipeline._store_page(scraper, page, page_url, response, products, error, result)
+        except Exception as e:
+            # e.g. the validator cache failed to record the page, the next pages are still stored
+            error_msg = f"Failed to store page {page}: {e}"
+            logger.exception(error_msg)
+            result.errors.append(error_msg)
+            return True
+
+    @staticmethod
+    def _store_page(scraper, page: int, page_url: str, response, products: Optional[List[Dict]],
+                    error: Optional[Exception], result: ScrapingResult) -> bool:
+        if not response:
+            error_msg = f"Failed to fetch page {page}"
+            logger.error(error_msg)
+            result.errors.append(error_msg)
+            return True
+
+        if response.unchanged:
+            return scraper.store_unchanged_page(page, page_url, result, response.fetched_at)
+
+        if error is not None:
+            error_msg = f"Failed to parse page {page}: {error}"
+            logger.error(error_msg)
+            result.errors.append(error_msg)
+            return True
+
+        return scraper.store_page(page, page_url, products, result, response.fetched_at)
@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+from datetime import datetime, UTC
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from config import (
+    DEFAULT_RATE_LIMIT_MS, DEFAULT_MIN_RATE_LIMIT_MS, DEFAULT_MAX_RATE_LIMIT_MS, DEFAULT_FAST_RESPONSE_MS,
+    DEFAULT_SLOW_RESPONSE_MS, DEFAULT_MAX_RETRY_AFTER_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuses telling the client to slow down, answered with a backoff and a retry
+THROTTLE_STATUSES = (429, 503)
+
+# Backoff from a zero interval still has to wait
+_MIN_BACKOFF_SECONDS = 1.0
+
+
+class HostRateState:
+    """Request interval and next free request slot of a single host"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_slot = 0.0
+        # End of the last backoff, slots reserved before it was set are pushed past it
+        self.held_until = 0.0
+        self.healthy_streak = 0
+
+
+class AdaptiveRateController:
+    """Per-host request pacing that adapts to how the host responds
+
+    Requests to a host are spaced by its current interval. The interval shrinks by
+    speedup_factor after healthy_streak consecutive fast responses, grows a little on
+    slow ones, and is multiplied by backoff_factor on throttling (429/503), server and
+    network errors, always within [min_interval, max_interval]. A Retry-After delay
+    holds every request to the host until it has passed. Waiting is left to the caller
+    so the same controller paces both the blocking and the asyncio client: sleep for
+    reserve(), then for recheck() until it returns 0, so a request whose slot was
+    reserved before a concurrent backoff does not fire during it.
+    """
+
+    def __init__(self, rate_limit_ms: int = DEFAULT_RATE_LIMIT_MS, min_rate_limit_ms: Optional[int] = None,
+                 max_rate_limit_ms: Optional[int] = None, fast_response_ms: int = DEFAULT_FAST_RESPONSE_MS,
+                 slow_response_ms: int = DEFAULT_SLOW_RESPONSE_MS, speedup_factor: float = 0.9,
+                 slowdown_factor: float = 1.25, backoff_factor: float = 2.0, healthy_streak: int = 5,
+                 max_retry_after_seconds: float = DEFAULT_MAX_RETRY_AFTER_SECONDS):
+        # Without explicit bounds the interval never drops below the configured rate limit
+        min_rate_limit_ms = rate_limit_ms if min_rate_limit_ms is None else min_rate_limit_ms
+        max_rate_limit_ms = max(rate_limit_ms, DEFAULT_MAX_RATE_LIMIT_MS) if max_rate_limit_ms is None else max_rate_limit_ms
+        if not 0 <= min_rate_limit_ms <= max_rate_limit_ms:
+            raise ValueError(f"Invalid rate limit bounds: {min_rate_limit_ms}-{max_rate_limit_ms} ms")
+
+        self.min_interval = min_rate_limit_ms / 1000
+        self.max_interval = max_rate_limit_ms / 1000
+        self.initial_interval = min(max(rate_limit_ms / 1000, self.min_interval), self.max_interval)
+        self.fast_response = fast_response_ms / 1000
+        self.slow_response = slow_response_ms / 1000
+        self.speedup_factor = speedup_factor
+        self.slowdown_factor = slowdown_factor
+        self.backoff_factor = backoff_factor
+        self.healthy_streak = healthy_streak
+        self.max_retry_after = max_retry_after_seconds
+        self.hosts: Dict[str, HostRateState] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_scraping_config(cls, config: Dict) -> "AdaptiveRateController":
+        """Build a controller from the bounds stored in Website.scraping_config"""
+        return cls(
+            rate_limit_ms=config.get("rate_limit_ms", DEFAULT_RATE_LIMIT_MS),
+            min_rate_limit_ms=config.get("min_rate_limit_ms", DEFAULT_MIN_RATE_LIMIT_MS),
+            max_rate_limit_ms=config.get("max_rate_limit_ms", DEFAULT_MAX_RATE_LIMIT_MS),
+            fast_response_ms=config.get("fast_response_ms", DEFAULT_FAST_RESPONSE_MS),
+            slow_response_ms=config.get("slow_response_ms", DEFAULT_SLOW_RESPONSE_MS),
+            max_retry_after_seconds=config.get("max_retry_after_seconds", DEFAULT_MAX_RETRY_AFTER_SECONDS)
+        )
+
+    def _state(self, url: str) -> HostRateState:
+        host = urlparse(url).netloc
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostRateState(self.initial_interval)
+        return state
+
+    def interval_for(self, url: str) -> float:
+        """Current request interval of the host of url in seconds"""
+        with self._lock:
+            return self._state(url).interval
+
+    def reserve(self, url: str) -> float:
+        """Claim the next request slot of the host, returns how long to wait before sending"""
+        with self._lock:
+            state = self._state(url)
+            now = time.monotonic()
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + state.interval
+            return slot - now
+
+    def recheck(self, url: str) -> float:
+        """Wait left after sleeping out a reserved slot, 0 unless a backoff started meanwhile
+
+        A request still held by a backoff takes a new slot after it, so the requests
+        released together at the end of a Retry-After stay spaced by the interval.
+        """
+        with self._lock:
+            state = self._state(url)
+            now = time.monotonic()
+            if now >= state.held_until:
+                return 0.0
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + state.interval
+            return slot - now
+
+    def record_response(self, url: str, elapsed: float):
+        """Adapt the interval to the latency of a successful response"""
+        with self._lock:
+            state = self._state(url)
+            if elapsed > self.slow_response:
+                state.healthy_streak = 0
+                self._set_interval(url, state, state.interval * self.slowdown_factor)
+            elif elapsed <= self.fast_response:
+                state.healthy_streak += 1
+                if state.healthy_streak >= self.healthy_streak:
+                    state.healthy_streak = 0
+                    self._set_interval(url, state, state.interval * self.speedup_factor)
+            else:
+                state.healthy_streak = 0
+
+    def record_failure(self, url: str, status: Optional[int] = None, retry_after: Optional[float] = None) -> float:
+        """Back off after a failed request, returns the delay before the host's next request
+
+        status is None for network errors and timeouts. Client errors other than 429 say
+        nothing about the host's load and leave the interval alone.
+        """
+        with self._lock:
+            state = self._state(url)
+            state.healthy_streak = 0
+            if status is not None and status < 500 and status not in THROTTLE_STATUSES:
+                return max(0.0, state.next_slot - time.monotonic())
+            self._set_interval(url, state, max(state.interval * self.backoff_factor, _MIN_BACKOFF_SECONDS))
+
+            delay = state.interval
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_retry_after))
+            now = time.monotonic()
+            state.held_until = max(state.held_until, now + delay)
+            state.next_slot = max(state.next_slot, state.held_until)
+            return state.next_slot - now
+
+    def _set_interval(self, url: str, state: HostRateState, interval: float):
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        if interval != state.interval:
+            logger.debug("Request interval for %s: %.2fs -> %.2fs", urlparse(url).netloc, state.interval, interval)
+            state.interval = interval
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given as delay-seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
@@ -0,0 +1,26 @@
+from typing import Dict, Type
+
+from scrapers.base_scraper import BaseScraper
+
+SCRAPER_REGISTRY: Dict[str, Type[BaseScraper]] = {}
+
+
+def register_scraper(website_name: str):
+    """Class decorator registering a scraper for a website name"""
+    def decorator(scraper_class: Type[BaseScraper]) -> Type[BaseScraper]:
+        if website_name in SCRAPER_REGISTRY:
+            raise ValueError(f"A scraper is already registered for website: {website_name}")
+        SCRAPER_REGISTRY[website_name] = scraper_class
+        return scraper_class
+    return decorator
+
+
+def get_scraper_class(website_name: str) -> Type[BaseScraper]:
+    try:
+        return SCRAPER_REGISTRY[website_name]
+    except KeyError:
+        raise KeyError(f"No scraper registered for website: {website_name}")
+
+
+def registered_scrapers() -> Dict[str, Type[BaseScraper]]:
+    return dict(SCRAPER_REGISTRY)
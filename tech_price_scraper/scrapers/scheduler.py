@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, UTC
+from typing import Dict, Optional, Type
+
+from config import DEFAULT_MAX_PAGES, DEFAULT_SITE_TIMEOUT_SECONDS, DEFAULT_PIPELINE_QUEUE_SIZE
+from database.operations import DatabaseOperations
+from models import RunReport, ScrapingResult
+from scrapers.base_scraper import BaseScraper
+from scrapers.pipeline import ScrapePipeline
+from scrapers.registry import registered_scrapers
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeScheduler:
+    """Runs the scrapers of every active website concurrently and aggregates their results"""
+
+    def __init__(self, db_operations: DatabaseOperations, max_pages: int = DEFAULT_MAX_PAGES,
+                 site_timeout_seconds: float = DEFAULT_SITE_TIMEOUT_SECONDS,
+                 max_concurrent_sites: Optional[int] = None, parse_workers: int = 0,
+                 queue_size: int = DEFAULT_PIPELINE_QUEUE_SIZE):
+        self.db_ops = db_operations
+        self.max_pages = max_pages
+        self.site_timeout_seconds = site_timeout_seconds
+        self.max_concurrent_sites = max_concurrent_sites
+        # With parse workers, all sites share one pipeline process pool for parsing
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.pipeline: Optional[ScrapePipeline] = None
+
+    def select_scrapers(self) -> Dict[str, Type[BaseScraper]]:
+        """Registered scrapers whose website is active, websites never scraped before are bootstrapped"""
+        registry = registered_scrapers()
+        selected = {}
+
+        for website in self.db_ops.get_active_websites():
+            if website.name in registry:
+                selected[website.name] = registry[website.name]
+            else:
+                logger.warning("Active website %s has no registered scraper, skipping", website.name)
+
+        for name, scraper_class in registry.items():
+            if name not in selected and self.db_ops.get_website_by_name(name) is None:
+                # The scraper registers its website configuration on first run
+                selected[name] = scraper_class
+
+        return selected
+
+    def run(self) -> RunReport:
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> RunReport:
+        start_time = time.time()
+        report = RunReport(started_at=datetime.now(UTC))
+
+        scrapers = await asyncio.to_thread(self.select_scrapers)
+        await asyncio.to_thread(self.db_ops.warm_slug_cache)
+        logger.info("Scheduling %s websites: %s", len(scrapers), ', '.join(scrapers))
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_sites) if self.max_concurrent_sites else None
+
+        async def run_limited(name: str, scraper_class: Type[BaseScraper]) -> ScrapingResult:
+            if semaphore is None:
+                return await self._run_site(name, scraper_class)
+            async with semaphore:
+                return await self._run_site(name, scraper_class)
+
+        if self.parse_workers > 0:
+            self.pipeline = ScrapePipeline(parse_workers=self.parse_workers, queue_size=self.queue_size)
+        try:
+            report.results = list(await asyncio.gather(
+                *(run_limited(name, scraper_class) for name, scraper_class in scrapers.items())
+            ))
+        finally:
+            if self.pipeline is not None:
+                self.pipeline.close()
+                self.pipeline = None
+        report.duration_seconds = time.time() - start_time
+        return report
+
+    async def _run_site(self, name: str, scraper_class: Type[BaseScraper]) -> ScrapingResult:
+        start_time = time.time()
+        timeout = self.site_timeout_seconds
+        try:
+            # Scraper construction registers the website configuration, which is blocking
+            scraper = await asyncio.to_thread(scraper_class, self.db_ops)
+            config = scraper.website.scraping_config
+            timeout = config.get("timeout_seconds", self.site_timeout_seconds)
+            max_pages = config.get("max_pages", self.max_pages)
+
+            logger.info("Starting %s scraping (max_pages=%s, timeout=%ss)", name, max_pages, timeout)
+            return await asyncio.wait_for(scraper.scrape_listings_async(max_pages, pipeline=self.pipeline), timeout)
+
+        except asyncio.TimeoutError:
+            error_msg = f"Scraping {name} timed out after {timeout}s"
+            logger.error(error_msg)
+            return self._failed_result(name, error_msg, start_time)
+
+        except Exception as e:
+            error_msg = f"Scraping {name} failed: {e}"
+            logger.exception(error_msg)
+            return self._failed_result(name, error_msg, start_time)
+
+    @staticmethod
+    def _failed_result(name: str, error_msg: str, start_time: float) -> ScrapingResult:
+        return ScrapingResult(
+            website=name,
+            success=False,
+            products_found=0,
+            products_processed=0,
+            products_updated=0,
+            products_created=0,
+            errors=[error_msg],
+            duration_seconds=time.time() - start_time
+        )
@@ -1,9 +1,11 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
-import re
 from datetime import datetime, UTC
-from models import Product, Price
+from config import DEFAULT_CHANGE_ONLY_PRICES
+from models import ProductRecord, PriceRecord
 from database.operations import DatabaseOperations
+from scrapers.classification import make_slug
+from utils.metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -11,56 +13,83 @@ logger = logging.getLogger(__name__)
 class DataStorage:
     """Handles storage of scraped data"""
 
-    def __init__(self, db_operations: DatabaseOperations):
+    def __init__(self, db_operations: DatabaseOperations, change_only_prices: bool = DEFAULT_CHANGE_ONLY_PRICES):
         self.db_ops = db_operations
+        self.change_only_prices = change_only_prices
 
-    def store_product_data(self, product_data: Dict, website_id: str, parser) -> Optional[Dict]:
+    def prepare_product_data(self, product_data: Dict, parser) -> Optional[Tuple[ProductRecord, Dict]]:
+        """Build the product record for parsed product data, returns None if it must be skipped"""
+        # Skip if no price
+        if not product_data.get("price"):
+            logger.warning("Skipping product %s - no price found", product_data.get('name', 'UNKNOWN'))
+            return None
+
+        # Cards without a memory size have no slug, skipping them lets the page short-circuit later runs
+        if not product_data.get("gpu_ram"):
+            logger.warning("Skipping product %s - no gpu_ram found", product_data.get('name', 'UNKNOWN'))
+            return None
+
+        # Parse brand and model
+        brand, model = parser.parse_brand_model(product_data["name"])
+
+        # Generate slug
+        slug = make_slug(product_data["name"], product_data["gpu_ram"])
+
+        # Build product record, validation is left to the API boundary
+        product = ProductRecord(
+            name=product_data["name"],
+            slug=slug,
+            category="gpu",
+            brand=brand,
+            model=model,
+            specifications={
+                'gpu_ram': product_data["gpu_ram"]
+            }
+        )
+
+        return product, product_data
+
+    def _build_price(self, product: ProductRecord, product_data: Dict, product_id: str, website_id: str,
+                     scraped_at: datetime) -> PriceRecord:
+        return PriceRecord(
+            product_id=product_id,
+            website_id=website_id,
+            price=float(product_data["price"]),
+            currency="EUR",
+            product_url=product_data.get("url", ""),
+            availability=product_data.get("availability", "unknown"),
+            scraped_at=scraped_at,
+            gpu_ram=product.specifications.get("gpu_ram"),
+            brand=product.brand,
+            model=product.model
+        )
+
+    def _store_prices(self, prices: List[PriceRecord]) -> List[str]:
+        if self.change_only_prices:
+            return self.db_ops.record_price_changes(prices)
+        return self.db_ops.insert_prices(prices)
+
+    @timed("store")
+    def store_product_data(self, product_data: Dict, website_id: str, parser,
+                           scraped_at: Optional[datetime] = None) -> Optional[Dict]:
         try:
-            # Skip if no price
-            if not product_data.get("price"):
-                logger.warning(f"Skipping product {product_data.get('name', 'UNKNOWN')} - no price found")
+            prepared = self.prepare_product_data(product_data, parser)
+            if prepared is None:
                 return None
-
-            # Parse brand and model
-            brand, model = parser.parse_brand_model(product_data["name"])
-
-            # Generate slug
-            slug = re.sub(r"[^\w\s-]", "", product_data["name"].lower())
-            slug = f"{slug}-{product_data["gpu_ram"].lower()}"
-            slug = re.sub(r"[\s_-]+", "-", slug).strip("-")
-
-            # Build product model
-            product = Product(
-                name=product_data["name"],
-                slug=slug,
-                category="gpu",
-                brand=brand,
-                model=model,
-                specifications={
-                    'gpu_ram': product_data["gpu_ram"]
-                }
-            )
+            product, _ = prepared
 
             # Insert or update product
-            existing_product = self.db_ops.get_product_by_slug(product.slug)
-            is_new_product = existing_product is None
+            is_new_product = self.db_ops.get_product_id_by_slug(product.slug) is None
             product_id: str = self.db_ops.insert_or_update_product(product)
 
             # Create price record
-            price = Price(
-                product_id=product_id,
-                website_id=website_id,
-                price=float(product_data["price"]),
-                currency="EUR",
-                product_url=product_data.get("url", ""),
-                availability=product_data.get("availability", "unknown"),
-                scraped_at=datetime.now(UTC)
-            )
+            price = self._build_price(product, product_data, product_id, website_id, scraped_at or datetime.now(UTC))
 
-            price_id: str = self.db_ops.insert_price(price)
+            price_id: str = self._store_prices([price])[0]
 
-            # Update best price cache
-            #self.db_ops.update_product_best_price(product_id)
+            # Update best price cache and the price facets
+            self.db_ops.record_latest_price(price, price_id)
+            self.db_ops.record_price_facets([price], [product_id] if is_new_product else [])
 
             return {
                 "product_id": product_id,
@@ -69,5 +98,63 @@ class DataStorage:
             }
 
         except Exception as e:
-            logger.exception(f"Error storing product {product_data.get('name', 'UNKNOWN')}: {e}")
+            logger.exception("Error storing product %s: %s", product_data.get('name', 'UNKNOWN'), e)
+            raise
+
+    @timed("store")
+    def store_prepared_batch(self, prepared: List[Tuple[ProductRecord, Dict]], website_id: str,
+                             scraped_at: Optional[datetime] = None) -> List[Dict]:
+        """Flush prepared products with one products bulk_write and one prices insert_many"""
+        if not prepared:
+            return []
+
+        try:
+            upserted = self.db_ops.bulk_upsert_products([product for product, _ in prepared])
+
+            scraped_at = scraped_at or datetime.now(UTC)
+            prices = [
+                self._build_price(product, product_data, product_id, website_id, scraped_at)
+                for (product, product_data), (product_id, _) in zip(prepared, upserted)
+            ]
+            price_ids = self._store_prices(prices)
+
+            # Update best price cache and the price facets
+            self.db_ops.record_latest_prices(prices, price_ids)
+            self.db_ops.record_price_facets(
+                prices, [product_id for product_id, is_new_product in upserted if is_new_product]
+            )
+
+            return [
+                {
+                    "product_id": product_id,
+                    "is_new": is_new_product,
+                    "price_id": price_id
+                }
+                for (product_id, is_new_product), price_id in zip(upserted, price_ids)
+            ]
+
+        except Exception as e:
+            logger.exception("Error storing batch of %s products: %s", len(prepared), e)
+            raise
+
+    def store_products_batch(self, products_data: List[Dict], website_id: str, parser,
+                             scraped_at: Optional[datetime] = None) -> List[Dict]:
+        """Prepare and store a page of parsed products in a single batch"""
+        prepared = []
+        for product_data in products_data:
+            entry = self.prepare_product_data(product_data, parser)
+            if entry is not None:
+                prepared.append(entry)
+        return self.store_prepared_batch(prepared, website_id, scraped_at)
+
+    @timed("store")
+    def store_unchanged_prices(self, product_ids: List[str], website_id: str,
+                               scraped_at: Optional[datetime] = None) -> int:
+        """Record a new observation of the latest known price for products of an unchanged page"""
+        try:
+            return len(self.db_ops.record_unchanged_prices(
+                product_ids, website_id, scraped_at or datetime.now(UTC), change_only=self.change_only_prices
+            ))
+        except Exception as e:
+            logger.exception("Error storing unchanged prices for %s products: %s", len(product_ids), e)
             raise
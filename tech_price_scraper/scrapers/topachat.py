@@ -1,35 +1,68 @@
+import asyncio
 import time
 import logging
+from typing import Dict, List, Optional
 from datetime import datetime, UTC
+from config import (
+    DEFAULT_HTTP_CACHE_PATH, DEFAULT_ARCHIVE_PATH, DEFAULT_RATE_LIMIT_MS, DEFAULT_MAX_RETRIES, DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_LISTING_PAGES
+)
 from models import Website, ScrapingResult
 from database.operations import DatabaseOperations
 from scrapers.base_scraper import BaseScraper
+from scrapers.registry import register_scraper
 from scrapers.web_client import WebClient
+from scrapers.async_web_client import AsyncWebClient
+from scrapers.http_cache import ValidatorCache
+from scrapers.rate_limit import AdaptiveRateController
+from scrapers.archive import PageArchive
 from scrapers.parser import ProductParser
+from scrapers.pipeline import ScrapePipeline
 from scrapers.storage import DataStorage
 
 logger = logging.getLogger(__name__)
 
 
+@register_scraper("topachat")
 class TopAchatScraper(BaseScraper):
     """Scraper for TopAchat GPU prices"""
     
-    def __init__(self, db_operations: DatabaseOperations):
+    def __init__(self, db_operations: DatabaseOperations, batch_storage: bool = True):
         super().__init__()
         self.website_name = "topachat"
         self.db_ops = db_operations
-        
-        # Initialize components
-        self.web_client = WebClient(rate_limit_ms=5000, max_retries=3)
-        self.parser = ProductParser()
-        self.storage = DataStorage(db_operations)
+        self.batch_storage = batch_storage
         
         # Setup website configuration
         self.website = self.setup_website_config()
+        config = self.website.scraping_config
+        
+        # Initialize components, each site gets its own rate controller and worker pool,
+        # shared by both clients so they pace the same host together
+        rate_limit_ms = config.get("rate_limit_ms", DEFAULT_RATE_LIMIT_MS)
+        max_retries = config.get("max_retries", DEFAULT_MAX_RETRIES)
+        self.rate_controller = AdaptiveRateController.from_scraping_config(config)
+        self.validator_cache = ValidatorCache(DEFAULT_HTTP_CACHE_PATH)
+        self.archive = PageArchive(DEFAULT_ARCHIVE_PATH, website_name=self.website_name)
+        self.web_client = WebClient(rate_limit_ms=rate_limit_ms, max_retries=max_retries,
+                                    validator_cache=self.validator_cache, archive=self.archive,
+                                    rate_controller=self.rate_controller)
+        self.async_web_client = AsyncWebClient(rate_limit_ms=rate_limit_ms, max_retries=max_retries,
+                                               max_concurrency=config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+                                               rate_controller=self.rate_controller,
+                                               validator_cache=self.validator_cache, archive=self.archive)
+        self.parser = ProductParser()
+        self.storage = DataStorage(db_operations)
+
+        # Page 1's pagination links decide how many pages are fetched, max_pages is only the
+        # fallback for listings without them. Optionally an unchanged page ends the scrape.
+        self.follow_pagination = config.get("follow_pagination", True)
+        self.max_listing_pages = config.get("max_listing_pages", DEFAULT_MAX_LISTING_PAGES)
+        self.stop_when_unchanged = config.get("stop_when_unchanged", False)
     
-    def setup_website_config(self) -> Website:
-        """Setup website configuration in database"""
-        website_config = Website(
+    @classmethod
+    def default_website(cls) -> Website:
+        return Website(
             name="topachat",
             display_name="TopAchat",
             base_url="https://www.topachat.com",
@@ -38,7 +71,14 @@ class TopAchatScraper(BaseScraper):
             scraping_config={
                 "base_gpu_url": "https://www.topachat.com/pages/produits_cat_est_micro_puis_rubrique_est_wgfx_pcie.html",
                 "rate_limit_ms": 5000,
+                "min_rate_limit_ms": 2000,
+                "max_rate_limit_ms": 60000,
                 "max_retries": 3,
+                "max_concurrency": 2,
+                "timeout_seconds": 600,
+                "follow_pagination": True,
+                "max_listing_pages": 50,
+                "stop_when_unchanged": False,
                 "selectors": {
                     "product_container": ".product-item, .article",
                     "name": ".product-title, .art-name, h3",
@@ -49,15 +89,22 @@ class TopAchatScraper(BaseScraper):
             },
             created_at=datetime.now(UTC)
         )
-        
-        website_id = self.db_ops.insert_website(website_config)
-        website_config.id = website_id
-        return website_config
+
+    def setup_website_config(self) -> Website:
+        """Seed the default website configuration and return the stored one, edits in the database win"""
+        return self.db_ops.ensure_website(self.default_website())
     
-    def scrape_listings(self, max_pages: int = 5) -> ScrapingResult:
-        """Scrape GPU listings from TopAchat"""
-        start_time = time.time()
-        result = ScrapingResult(
+    def _build_page_url(self, page: int) -> str:
+        """Build the URL of a listing page"""
+        base_url = self.website.scraping_config["base_gpu_url"]
+        if page == 1:
+            return base_url
+
+        base_url_nohtml = base_url.rstrip(".html")
+        return f"{base_url_nohtml}_puis_page_est_{page}.html"
+
+    def _new_result(self) -> ScrapingResult:
+        return ScrapingResult(
             website="topachat",
             success=False,
             products_found=0,
@@ -65,77 +112,255 @@ class TopAchatScraper(BaseScraper):
             products_updated=0,
             products_created=0
         )
-        
+
+    def _count_stored(self, stored_result: Optional[Dict], result: ScrapingResult):
+        if stored_result:
+            result.products_processed += 1
+            if stored_result['is_new']:
+                result.products_created += 1
+            else:
+                result.products_updated += 1
+
+    def _process_products(self, products: List[dict], result: ScrapingResult,
+                          scraped_at: Optional[datetime] = None) -> List[str]:
+        """Store the parsed products of a page, update the result counters and return the stored product ids"""
+        result.products_found += len(products)
+
+        if self.batch_storage:
+            return self._process_products_batch(products, result, scraped_at)
+
+        product_ids = []
+        for product_data in products:
+            try:
+                stored_result = self.storage.store_product_data(
+                    product_data,
+                    self.website.id,
+                    self.parser,
+                    scraped_at
+                )
+                self._count_stored(stored_result, result)
+                if stored_result:
+                    product_ids.append(stored_result['product_id'])
+
+            except Exception as e:
+                error_msg = f"Error processing product {product_data.get('name', 'unknown')}: {e}"
+                logger.exception(error_msg)
+                result.errors.append(error_msg)
+
+        return product_ids
+
+    def _process_products_batch(self, products: List[dict], result: ScrapingResult,
+                                scraped_at: Optional[datetime] = None) -> List[str]:
+        """Collect the page's products and flush them in a single batch"""
+        prepared = []
+        for product_data in products:
+            try:
+                entry = self.storage.prepare_product_data(product_data, self.parser)
+                if entry is not None:
+                    prepared.append(entry)
+            except Exception as e:
+                error_msg = f"Error processing product {product_data.get('name', 'unknown')}: {e}"
+                logger.exception(error_msg)
+                result.errors.append(error_msg)
+
+        product_ids = []
+        try:
+            for stored_result in self.storage.store_prepared_batch(prepared, self.website.id, scraped_at):
+                self._count_stored(stored_result, result)
+                product_ids.append(stored_result['product_id'])
+        except Exception as e:
+            error_msg = f"Error storing batch of {len(prepared)} products: {e}"
+            logger.exception(error_msg)
+            result.errors.append(error_msg)
+
+        return product_ids
+
+    def store_unchanged_page(self, page: int, page_url: str, result: ScrapingResult,
+                             scraped_at: Optional[datetime] = None) -> bool:
+        """Record price unchanged observations for a page whose content did not change
+
+        Returns False when the scrape should stop here because of stop_when_unchanged.
+        """
+        product_ids = self.validator_cache.processed_product_ids(page_url) or []
+        logger.info("Page %s unchanged since last run, recording %s unchanged prices", page, len(product_ids))
+
+        result.pages_unchanged += 1
+        result.products_found += len(product_ids)
+        try:
+            recorded = self.storage.store_unchanged_prices(product_ids, self.website.id, scraped_at)
+            result.products_processed += recorded
+            result.products_updated += recorded
+        except Exception as e:
+            error_msg = f"Error recording unchanged prices for page {page}: {e}"
+            logger.exception(error_msg)
+            result.errors.append(error_msg)
+
+        if self.stop_when_unchanged:
+            logger.info("Stopping at page %s, unchanged since last run", page)
+            return False
+        return True
+
+    def _process_page(self, page: int, page_url: str, response, result: ScrapingResult) -> bool:
+        """Parse and store a fetched page, returns False when the scrape should stop"""
+        if response.unchanged:
+            return self.store_unchanged_page(page, page_url, result, response.fetched_at)
+
+        # Parse products, page 1 also tells how many pages the listing has
+        if page == 1:
+            products, pagination = self.parser.parse_topachat_page(response.text, page_url)
+            self.validator_cache.set_pagination(page_url, pagination.last_page, pagination.items_per_page)
+        else:
+            products = self.parser.parse_topachat_listings(response.text, page_url)
+        return self.store_page(page, page_url, products, result, response.fetched_at)
+
+    def _last_page(self, max_pages: int) -> int:
+        """Last listing page to fetch, from the pagination of page 1 when it has any"""
+        pagination = self.validator_cache.pagination(self._build_page_url(1))
+        if not self.follow_pagination or not pagination or pagination["last_page"] is None:
+            return max_pages
+
+        last_page = min(pagination["last_page"], self.max_listing_pages)
+        logger.info("TopAchat listing has %s pages of %s items, fetching up to page %s",
+                    pagination['last_page'], pagination['items_per_page'], last_page)
+        return last_page
+
+    def store_page(self, page: int, page_url: str, products: List[dict], result: ScrapingResult,
+                   scraped_at: Optional[datetime] = None) -> bool:
+        """Store the parsed products of a page, returns False when the listing has no more products
+
+        Prices are stamped with scraped_at, the fetch time of the page, so a replay of the
+        archived page recognises them.
+        """
+        if not products:
+            logger.info("No products found on page %s, stopping", page)
+            return False
+
+        # Process each product
+        error_count = len(result.errors)
+        product_ids = self._process_products(products, result, scraped_at)
+
+        # Only a fully stored page may short-circuit the next run
+        if len(result.errors) == error_count:
+            self.validator_cache.mark_processed(page_url, product_ids)
+        return True
+
+    def _mark_scraped(self, completed: bool = True):
+        """Update website last_scraped and invalidate read caches over its prices
+
+        An interrupted run only invalidates the caches, the pages it stored are not a scrape.
+        """
+        self.db_ops.bump_cache_generation(
+            self.website.id, last_scraped=datetime.now(UTC) if completed else None
+        )
+
+    def scrape_listings(self, max_pages: int = 5) -> ScrapingResult:
+        """Scrape GPU listings from TopAchat"""
+        start_time = time.time()
+        result = self._new_result()
+
         try:
-            base_url = self.website.scraping_config["base_gpu_url"]
-            
-            for page in range(1, max_pages + 1):
-                logger.info(f"Scraping TopAchat GPU page {page}")
+            page = 0
+            last_page = max_pages
+            while page < last_page:
+                page += 1
+                logger.info("Scraping TopAchat GPU page %s", page)
 
-                base_url_nohtml = base_url.rstrip(".html")
-                
                 # Build page URL
-                if page == 1:
-                    page_url = base_url
-                else:
-                    page_url = f"{base_url_nohtml}_puis_page_est_{page}.html"
-                
+                page_url = self._build_page_url(page)
+
                 # Fetch page
                 response = self.web_client.get(page_url)
                 if not response:
                     error_msg = f"Failed to fetch page {page}"
                     logger.exception(error_msg)
                     result.errors.append(error_msg)
-                    continue
-                
-                # Parse products
-                products = self.parser.parse_topachat_listings(response.text, page_url)
-                
-                if not products:
-                    logger.info(f"No products found on page {page}, stopping")
+                elif not self._process_page(page, page_url, response, result):
                     break
-                
-                result.products_found += len(products)
-                
-                # Process each product
-                for product_data in products:
-                    try:
-                        stored_result = self.storage.store_product_data(
-                            product_data, 
-                            self.website.id, 
-                            self.parser
-                        )
-                        
-                        if stored_result:
-                            result.products_processed += 1
-                            if stored_result['is_new']:
-                                result.products_created += 1
-                            else:
-                                result.products_updated += 1
-                    
-                    except Exception as e:
-                        error_msg = f"Error processing product {product_data.get('name', 'unknown')}: {e}"
-                        logger.exception(error_msg)
-                        result.errors.append(error_msg)
-            
+
+                if page == 1:
+                    last_page = self._last_page(max_pages)
+
             result.success = True
-            
+
         except Exception as e:
             error_msg = f"Scraping failed: {e}"
             logger.exception(error_msg)
             result.errors.append(error_msg)
-        
+
         finally:
             result.duration_seconds = time.time() - start_time
-            
-            # Update website last_scraped
-            self.db_ops.websites.update_one(
-                {"_id": self.website.id},
-                {"$set": {"last_scraped": datetime.now(UTC)}}
-            )
-            
+            self._mark_scraped()
+            self.validator_cache.save()
+
             # Close web client
             self.web_client.close()
-        
+
         return result
 
+    async def scrape_listings_async(self, max_pages: int = 5,
+                                    pipeline: Optional[ScrapePipeline] = None) -> ScrapingResult:
+        """Scrape GPU listings from TopAchat, fetching page 1 then all remaining pages concurrently
+
+        With a pipeline, parsing runs in its process pool while pages are still being fetched.
+        """
+        start_time = time.time()
+        result = self._new_result()
+        cancelled = False
+
+        try:
+            first_url = self._build_page_url(1)
+            logger.info("Scraping TopAchat GPU page 1")
+            response = await self.async_web_client.get(first_url)
+            stopped = False
+            if response:
+                # Parsing and storage are blocking, keep them off the event loop
+                stopped = not await asyncio.to_thread(self._process_page, 1, first_url, response, result)
+            else:
+                error_msg = "Failed to fetch page 1"
+                logger.error(error_msg)
+                result.errors.append(error_msg)
+
+            # Without a fresh page 1 the pagination cached from the last run is used
+            last_page = 1 if stopped else self._last_page(max_pages)
+            page_urls = [self._build_page_url(page) for page in range(2, last_page + 1)]
+            if page_urls:
+                logger.info("Fetching %s more TopAchat GPU pages concurrently", len(page_urls))
+
+            if pipeline is not None:
+                await pipeline.run(self, page_urls, result, first_page=2)
+            else:
+                responses = await self.async_web_client.get_many(page_urls)
+
+                # Pages are processed in order so that an empty page still ends the listing
+                for page, (page_url, response) in enumerate(zip(page_urls, responses), start=2):
+                    if not response:
+                        error_msg = f"Failed to fetch page {page}"
+                        logger.error(error_msg)
+                        result.errors.append(error_msg)
+                        continue
+
+                    # Parsing and storage are blocking, keep them off the event loop
+                    if not await asyncio.to_thread(self._process_page, page, page_url, response, result):
+                        break
+
+            result.success = True
+
+        except Exception as e:
+            error_msg = f"Scraping failed: {e}"
+            logger.exception(error_msg)
+            result.errors.append(error_msg)
+
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+        finally:
+            result.duration_seconds = time.time() - start_time
+            # A run cancelled by the scheduler's site timeout is not recorded as scraped
+            await asyncio.to_thread(self._mark_scraped, not cancelled)
+            self.validator_cache.save()
+
+            # Close web client
+            await self.async_web_client.close()
+
+        return result
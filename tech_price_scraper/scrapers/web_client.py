@@ -1,63 +1,121 @@
 import requests
 import time
 import logging
+from datetime import datetime, UTC
 from typing import Optional
+from urllib.parse import urlparse
+
+from scrapers.archive import PageArchive
+from scrapers.http_cache import ValidatorCache
+from scrapers.rate_limit import AdaptiveRateController, THROTTLE_STATUSES, parse_retry_after
+from utils.metrics import METRICS
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
 
 class WebClient:
-    """HTTP client for web scraping with rate limiting and error handling"""
+    """HTTP client for web scraping with adaptive per-host rate limiting and error handling"""
     
-    def __init__(self, rate_limit_ms: int = 5000, max_retries: int = 3):
+    def __init__(self, rate_limit_ms: int = 5000, max_retries: int = 3,
+                 validator_cache: Optional[ValidatorCache] = None, archive: Optional[PageArchive] = None,
+                 rate_controller: Optional[AdaptiveRateController] = None):
         self.session = requests.Session()
         self.rate_limit_ms = rate_limit_ms
         self.max_retries = max_retries
-        self.last_request_time = 0
+        self.validator_cache = validator_cache
+        self.archive = archive
+        self.rate_controller = rate_controller or AdaptiveRateController(rate_limit_ms)
         
         # Set default headers
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        })
+        self.session.headers.update(DEFAULT_HEADERS)
     
     def get(self, url: str, **kwargs) -> Optional[requests.Response]:
-        """Make GET request with rate limiting and retries"""
+        """Make GET request with rate limiting and retries
+
+        With a validator cache the request is conditional, response.unchanged is True
+        when the server answers 304 or the body hash matches the cached one. Prices of the
+        page are stamped with response.fetched_at, the time it is archived with.
+        """
+        if self.validator_cache is not None:
+            kwargs['headers'] = {**self.validator_cache.conditional_headers(url), **kwargs.get('headers', {})}
+
+        host = urlparse(url).netloc
         for attempt in range(self.max_retries):
             try:
-                # Apply rate limiting
-                self._apply_rate_limit()
+                # Apply rate limiting, this also waits out the backoff of a failed attempt
+                METRICS.observe("rate_limit_sleep", self._apply_rate_limit(url), host=host)
                 
-                response = self.session.get(url, timeout=10, **kwargs)
-                response.raise_for_status()
+                started = time.perf_counter()
+                with METRICS.timer("fetch", attributes={"url": url, "attempt": attempt + 1}, host=host):
+                    response = self.session.get(url, timeout=10, **kwargs)
+                    response.raise_for_status()
+                self.rate_controller.record_response(url, time.perf_counter() - started)
+                response.fetched_at = datetime.now(UTC)
+                response.unchanged = self._check_unchanged(url, response)
+                self._archive(url, response)
                 
-                logger.debug(f"Successfully fetched: {url}")
+                logger.debug("Successfully fetched: %s", url)
                 return response
                 
             except requests.exceptions.RequestException as e:
-                logger.warning(f"Request failed (attempt {attempt + 1}/{self.max_retries}): {url} - {e}")
+                status = e.response.status_code if e.response is not None else None
+                retry_after = parse_retry_after(e.response.headers.get('Retry-After')) if e.response is not None else None
+                delay = self.rate_controller.record_failure(url, status, retry_after)
+                if status in THROTTLE_STATUSES:
+                    METRICS.inc("scraper_throttled_total", host=host, status=status)
+                logger.warning("Request failed (attempt %s/%s): %s - %s, next request in %.1fs",
+                               attempt + 1, self.max_retries, url, e, delay)
                 if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
+                    METRICS.inc("scraper_retries_total", host=host)
                 else:
-                    logger.exception(f"All retries failed for: {url}")
+                    METRICS.inc("scraper_fetch_failures_total", host=host)
+                    logger.exception("All retries failed for: %s", url)
                     return None
         
         return None
     
-    def _apply_rate_limit(self):
-        """Apply rate limiting between requests"""
-        current_time = time.time()
-        time_since_last = (current_time - self.last_request_time) * 1000
-        
-        if time_since_last < self.rate_limit_ms:
-            sleep_time = (self.rate_limit_ms - time_since_last) / 1000
+    def _check_unchanged(self, url: str, response: requests.Response) -> bool:
+        if self.validator_cache is None:
+            return False
+        if response.status_code == 304:
+            logger.debug("Not modified: %s", url)
+            return True
+
+        return self.validator_cache.update(
+            url,
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            ValidatorCache.body_hash(response.content)
+        )
+
+    def _archive(self, url: str, response: requests.Response):
+        if self.archive is None or response.status_code == 304:
+            return
+        try:
+            self.archive.store(url, response.content, response.encoding or response.apparent_encoding,
+                               fetched_at=response.fetched_at)
+        except OSError as e:
+            logger.warning("Failed to archive %s: %s", url, e)
+
+    def _apply_rate_limit(self, url: str) -> float:
+        """Wait for the next request slot of the host, returns the time slept in seconds"""
+        slept = 0.0
+        sleep_time = self.rate_controller.reserve(url)
+        while sleep_time > 0:
             time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+            slept += sleep_time
+            # Another thread may have been throttled while this one slept
+            sleep_time = self.rate_controller.recheck(url)
+        return slept
     
     def close(self):
         """Close the session"""
@@ -0,0 +1,58 @@
+import pytest
+
+from tests import TEST_DATABASE_NAME
+
+
+def _max_updater(doc, field_name, value):
+    # MongoDB compares embedded documents field by field, mongomock cannot compare dicts
+    current = doc.get(field_name, value)
+    key = (lambda v: list(v.values()) if isinstance(v, dict) else v)
+    doc[field_name] = current if key(current) >= key(value) else value
+
+
+def _reduce_operator(handle_array_operator):
+    # mongomock does not implement $reduce, used by the latest price update pipeline
+    def handle(parser, operator, value):
+        if operator != '$reduce':
+            return handle_array_operator(parser, operator, value)
+        from mongomock.aggregate import _Parser
+        accumulated = parser.parse(value['initialValue'])
+        for item in parser.parse(value['input']) or []:
+            user_vars = dict(parser._user_vars, value=accumulated, this=item)
+            accumulated = _Parser(parser._doc_dict, user_vars, parser._ignore_missing_keys).parse(value['in'])
+        return accumulated
+    return handle
+
+
+class MongomockManager:
+    """DatabaseManager shaped object on a mongomock client, with the schema migrations applied"""
+
+    def __init__(self, price_backend: str = "documents"):
+        import mongomock
+        from database.migrations import apply_migrations
+        from database.price_backends import get_price_backend
+
+        self.client = mongomock.MongoClient()
+        self.db = self.client[TEST_DATABASE_NAME]
+        self.products = self.db.products
+        self.websites = self.db.websites
+        self.price_backend = get_price_backend(price_backend, self.db)
+        self.prices = self.price_backend.collection
+        apply_migrations(self)
+
+    def close(self):
+        self.client.close()
+
+
+@pytest.fixture
+def mongomock_db_manager(monkeypatch):
+    """Fresh mongomock database, skipped when mongomock is not installed"""
+    mongomock = pytest.importorskip("mongomock")
+    monkeypatch.setattr(mongomock.collection, "_max_updater", _max_updater)
+    monkeypatch.setitem(mongomock.collection._updaters, "$max", _max_updater)
+    parser = mongomock.aggregate._Parser
+    monkeypatch.setattr(parser, "_handle_array_operator", _reduce_operator(parser._handle_array_operator))
+
+    manager = MongomockManager()
+    yield manager
+    manager.close()
@@ -0,0 +1,93 @@
+import random
+import re
+
+import pytest
+
+from scrapers.classification import ProductClassifier, Classification, DEFAULT_GPU_KEYWORDS, make_slug
+
+
+def reference_brand_model(name):
+    """Previous ProductParser.parse_brand_model implementation"""
+    name_lower = name.lower()
+    if 'nvidia' in name_lower or 'geforce' in name_lower:
+        brand = 'nvidia'
+    elif 'amd' in name_lower or 'radeon' in name_lower:
+        brand = 'amd'
+    elif 'intel' in name_lower:
+        brand = 'intel'
+    else:
+        brand = 'unknown'
+
+    model = 'unknown'
+    for pattern in [r'rtx\s*(\d+(?:\s*ti)?(?:\s*super)?)', r'gtx\s*(\d+(?:\s*ti)?)',
+                    r'rx\s*(\d+(?:\s*xt)?)', r'(\d{4}(?:\s*xt)?)']:
+        match = re.search(pattern, name_lower)
+        if match:
+            model = match.group(1).replace(' ', '-')
+            break
+    return brand, model
+
+
+def reference_is_gpu(name):
+    return any(keyword in name.lower() for keyword in DEFAULT_GPU_KEYWORDS)
+
+
+NAMES = [
+    'MSI GeForce RTX 4070 VENTUS 2X E 12G OC',
+    'ASUS Radeon RX 7800 XT TUF Gaming OC',
+    'Gigabyte GeForce RTX 4060 Ti EAGLE 8G',
+    'Zotac GAMING GeForce RTX 4080 SUPER Trinity',
+    'PNY GeForce GTX 1650 Ti Dual Fan',
+    'Sapphire PULSE AMD Radeon RX 7600',
+    'XFX Speedster MERC 310 7900XTX',
+    'Intel Arc A770 Limited Edition 16 Go',
+    'Carte graphique 2048 XT',
+    "Câble d'alimentation 12VHPWR 600W",
+    'radeonvidia rx580',
+    'gtx1080 rtx3090ti super',
+    'RTX A4000 2060',
+    '',
+]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return ProductClassifier()
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_matches_previous_implementation(classifier, name):
+    assert classifier.parse_brand_model(name) == reference_brand_model(name)
+    assert classifier.is_gpu(name) == reference_is_gpu(name)
+
+
+def test_matches_previous_implementation_on_random_names(classifier):
+    rng = random.Random(1234)
+    tokens = ['rtx', 'gtx', 'rx', 'xt', 'ti', 'super', ' ', '  ', '40', '4070', '12345', 'radeon',
+              'nvidia', 'amd', 'intel', 'geforce', 'gpu', 'go', 'gb', 'carte graphique', 'a', 'n']
+    for _ in range(5000):
+        name = ''.join(rng.choice(tokens) for _ in range(rng.randint(1, 8)))
+        assert classifier.parse_brand_model(name) == reference_brand_model(name), name
+        assert classifier.is_gpu(name) == reference_is_gpu(name), name
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('12 Go GDDR6X - PCI-Express 4.0', '12GB'),
+    ('8GB GDDR6', '8GB'),
+    ('16 gb', '16GB'),
+    ('Longueur 60 cm', None),
+])
+def test_extract_memory(classifier, text, expected):
+    assert classifier.extract_memory(text) == expected
+
+
+def test_classify_many(classifier):
+    assert classifier.classify_many(['MSI GeForce RTX 4070 12 Go', 'Longueur 60 cm']) == [
+        Classification('nvidia', '4070', '12GB', True),
+        Classification('unknown', 'unknown', None, False),
+    ]
+    assert classifier.classify('ASUS Radeon RX 7800 XT', '16 Go GDDR6') == Classification('amd', '7800-xt', '16GB', True)
+
+
+def test_make_slug():
+    assert make_slug('MSI GeForce RTX 4070 (VENTUS) 2X_OC', '12GB') == 'msi-geforce-rtx-4070-ventus-2x-oc-12gb'
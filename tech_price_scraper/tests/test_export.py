@@ -0,0 +1,99 @@
+import csv
+import time
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from bson import ObjectId
+
+from database.export import PriceExporter
+
+NOW = datetime(2025, 6, 1, 12, tzinfo=UTC)
+
+
+@pytest.fixture
+def db_manager(mongomock_db_manager):
+    manager = mongomock_db_manager
+    topachat = manager.websites.insert_one({"name": "topachat"}).inserted_id
+    ldlc = manager.websites.insert_one({"name": "ldlc"}).inserted_id
+    product_id = manager.products.insert_one({
+        "name": "MSI GeForce RTX 4070 VENTUS 2X", "slug": "msi-4070-12gb", "brand": "nvidia", "model": "4070",
+        "specifications": {"gpu_ram": "12GB"}
+    }).inserted_id
+    for days, website_id, price in [(3, topachat, 599.9), (2, ldlc, 589.0), (1, topachat, 579.9)]:
+        manager.prices.insert_one({
+            # Inserted when scraped, incremental exports follow the _id order
+            "_id": ObjectId.from_datetime(NOW - timedelta(days=days)),
+            "product_id": product_id, "website_id": website_id, "price": price, "currency": "EUR",
+            "product_url": "https://example.com", "availability": "in_stock",
+            "scraped_at": NOW - timedelta(days=days)
+        })
+    return manager
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_export_joins_product_metadata(db_manager, tmp_path):
+    path = tmp_path / "prices.csv"
+    counters = PriceExporter(db_manager, batch_size=2).export(str(path))
+
+    rows = read_csv(path)
+    assert counters["rows"] == len(rows) == 3
+    assert {row["website"] for row in rows} == {"topachat", "ldlc"}
+    assert rows[0]["product_name"] == "MSI GeForce RTX 4070 VENTUS 2X"
+    assert rows[0]["gpu_ram"] == "12GB"
+    assert rows[0]["last_seen_at"] == ""
+    assert not (tmp_path / "prices.csv.tmp").exists()
+
+
+def test_date_range_and_website_filters(db_manager, tmp_path):
+    path = tmp_path / "prices.csv"
+    PriceExporter(db_manager).export(str(path), since=NOW - timedelta(days=3), until=NOW - timedelta(days=1),
+                                     website="topachat")
+    assert [row["price"] for row in read_csv(path)] == ["599.9"]
+
+    with pytest.raises(ValueError):
+        PriceExporter(db_manager).export(str(path), website="unknown")
+
+
+def test_incremental_export_follows_insertion_order(db_manager, tmp_path):
+    exporter = PriceExporter(db_manager, lag_seconds=0)
+    first = tmp_path / "first.csv"
+    exporter.export(str(first), incremental=True, since=NOW - timedelta(days=2, hours=12))
+    assert [row["price"] for row in read_csv(first)] == ["589.0", "579.9"]
+    assert exporter.get_last_id() == ObjectId.from_datetime(NOW - timedelta(days=1))
+
+    # A change-only record seen again and a replayed record stored late with an older timestamp,
+    # a millisecond after the watermark as stored datetimes keep milliseconds
+    time.sleep(0.002)
+    db_manager.prices.update_one({"price": 589.0}, {"$set": {"last_seen_at": datetime.now(UTC)}})
+    time.sleep(0.002)
+    replayed = db_manager.prices.find_one({"price": 599.9}, {"_id": 0})
+    db_manager.prices.insert_one({**replayed, "_id": ObjectId.from_datetime(NOW), "price": 609.9})
+    second = tmp_path / "second.csv"
+    exporter.export(str(second), incremental=True)
+    assert sorted(row["price"] for row in read_csv(second)) == ["589.0", "609.9"]
+
+    third = tmp_path / "third.csv"
+    assert exporter.export(str(third), incremental=True)["rows"] == 0
+    with pytest.raises(ValueError):
+        exporter.export(str(third), incremental=True, until=NOW)
+
+
+def test_incremental_export_waits_for_recent_inserts(db_manager, tmp_path):
+    db_manager.prices.insert_one({**db_manager.prices.find_one({}, {"_id": 0}), "price": 619.9})
+    path = tmp_path / "prices.csv"
+    assert PriceExporter(db_manager, lag_seconds=60).export(str(path), incremental=True)["rows"] == 3
+
+
+def test_parquet_export(db_manager, tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "prices.parquet"
+    PriceExporter(db_manager, batch_size=2).export(str(path))
+
+    table = parquet.read_table(str(path))
+    assert table.num_rows == 3
+    assert parquet.ParquetFile(str(path)).metadata.num_row_groups == 2
+    assert table.column("price").to_pylist() == [599.9, 589.0, 579.9]
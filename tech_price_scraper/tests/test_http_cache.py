@@ -0,0 +1,71 @@
+import pytest
+
+from database.operations import DatabaseOperations
+from models import ScrapingResult
+from scrapers import topachat
+from scrapers.http_cache import ValidatorCache
+
+URL = "https://www.topachat.com/pages/produits_cat_est_micro_puis_rubrique_est_wgfx_pcie.html"
+
+
+def test_unchanged_only_after_the_page_was_processed(tmp_path):
+    cache = ValidatorCache(str(tmp_path / "http_cache.json"))
+    digest = ValidatorCache.body_hash(b"<html>v1</html>")
+    assert not cache.update(URL, '"v1"', None, digest)
+    # Validators are only sent once the products of this version were stored
+    assert cache.conditional_headers(URL) == {}
+    assert not cache.update(URL, '"v1"', None, digest)
+
+    cache.mark_processed(URL, ["p1", "p2"])
+    assert cache.conditional_headers(URL) == {"If-None-Match": '"v1"'}
+    assert cache.update(URL, '"v1"', "Sun, 01 Jun 2025 12:00:00 GMT", digest)
+    assert cache.conditional_headers(URL)["If-Modified-Since"] == "Sun, 01 Jun 2025 12:00:00 GMT"
+    assert cache.processed_product_ids(URL) == ["p1", "p2"]
+
+
+def test_changed_body_drops_products_and_pagination(tmp_path):
+    cache = ValidatorCache(str(tmp_path / "http_cache.json"))
+    cache.update(URL, None, None, ValidatorCache.body_hash(b"v1"))
+    cache.set_pagination(URL, 12, 20)
+    cache.mark_processed(URL, ["p1"])
+
+    assert not cache.update(URL, None, None, ValidatorCache.body_hash(b"v2"))
+    assert cache.processed_product_ids(URL) is None
+    assert cache.pagination(URL) is None
+
+
+def test_save_and_reload(tmp_path):
+    path = tmp_path / "cache" / "http_cache.json"
+    cache = ValidatorCache(str(path))
+    cache.update(URL, '"v1"', None, ValidatorCache.body_hash(b"v1"))
+    cache.mark_processed(URL, ["p1"])
+    cache.save()
+
+    assert ValidatorCache(str(path)).processed_product_ids(URL) == ["p1"]
+    path.write_text("{not json", encoding="utf-8")
+    assert ValidatorCache(str(path)).entries == {}
+
+
+@pytest.fixture
+def scraper(mongomock_db_manager, monkeypatch, tmp_path):
+    monkeypatch.setattr(topachat, "DEFAULT_HTTP_CACHE_PATH", str(tmp_path / "http_cache.json"))
+    monkeypatch.setattr(topachat, "DEFAULT_ARCHIVE_PATH", str(tmp_path / "archive"))
+    db_ops = DatabaseOperations(mongomock_db_manager)
+    return topachat.TopAchatScraper(db_ops)
+
+
+def test_page_with_unparseable_cards_is_marked_processed(scraper):
+    scraper.validator_cache.update(URL, '"v1"', None, ValidatorCache.body_hash(b"v1"))
+    products = [
+        {"name": "MSI GeForce RTX 4070 VENTUS 2X 12G", "price": 599.9, "gpu_ram": "12GB",
+         "url": URL, "availability": "in_stock"},
+        {"name": "Carte graphique sans memoire", "price": 99.9, "gpu_ram": None, "url": URL,
+         "availability": "in_stock"},
+    ]
+    result = ScrapingResult(website="topachat", success=False, products_found=0, products_processed=0,
+                            products_updated=0, products_created=0, duration_seconds=0)
+
+    assert scraper.store_page(2, URL, products, result)
+    assert result.errors == []
+    assert len(scraper.validator_cache.processed_product_ids(URL)) == 1
+    assert scraper.db_ops.products.count_documents({}) == 1
@@ -0,0 +1,66 @@
+import json
+import logging
+
+import pytest
+
+from utils.logging import setup_logging, shutdown_logging, _QueueHandler
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    shutdown_logging()
+    yield tmp_path / "logs" / "scraper.log"
+    shutdown_logging()
+
+
+def queue_handlers():
+    return [handler for handler in logging.getLogger().handlers if isinstance(handler, _QueueHandler)]
+
+
+def test_setup_logging_is_idempotent(log_file):
+    setup_logging(log_file=str(log_file))
+    setup_logging(log_file=str(log_file))
+    setup_logging()
+
+    assert len(queue_handlers()) == 1
+    logging.getLogger("tests").warning("Fetched %s pages", 3)
+    shutdown_logging()
+
+    lines = log_file.read_text(encoding="utf-8").splitlines()
+    assert sum("Logging initialized" in line for line in lines) == 1
+    assert lines[-1].endswith("tests - WARNING - Fetched 3 pages")
+    assert queue_handlers() == []
+
+
+def test_json_format_includes_extra_fields_and_exceptions(log_file):
+    setup_logging(log_file=str(log_file), log_format="json")
+    logger = logging.getLogger("tests")
+    logger.info("Scraped %s", "topachat", extra={"website": "topachat"})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Scrape failed")
+    shutdown_logging()
+
+    entries = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert entries[-2]["message"] == "Scraped topachat"
+    assert entries[-2]["website"] == "topachat"
+    assert entries[-2]["logger"] == "tests"
+    assert entries[-1]["level"] == "ERROR"
+    assert "ValueError: boom" in entries[-1]["exception"]
+
+
+def test_arguments_are_rendered_when_queued(log_file):
+    setup_logging(log_file=str(log_file))
+    pages = [1]
+    logging.getLogger("tests").info("Pages %s", pages)
+    pages.append(2)
+    shutdown_logging()
+
+    assert log_file.read_text(encoding="utf-8").splitlines()[-1].endswith("Pages [1]")
+
+
+def test_unknown_format_is_rejected(log_file):
+    with pytest.raises(ValueError):
+        setup_logging(log_file=str(log_file), log_format="xml")
+    assert queue_handlers() == []
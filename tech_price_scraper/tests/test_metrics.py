@@ -0,0 +1,85 @@
+import json
+import time
+
+from utils.metrics import StageMetrics, STAGE_BUCKETS
+
+
+def test_observe_fills_cumulative_buckets():
+    metrics = StageMetrics()
+    metrics.observe("fetch", 0.02, host="www.topachat.com")
+    metrics.observe("fetch", 0.3, host="www.topachat.com")
+
+    text = metrics.to_prometheus()
+    assert 'scraper_stage_seconds_bucket{host="www.topachat.com",stage="fetch",le="0.01"} 0' in text
+    assert 'scraper_stage_seconds_bucket{host="www.topachat.com",stage="fetch",le="0.05"} 1' in text
+    assert 'scraper_stage_seconds_bucket{host="www.topachat.com",stage="fetch",le="0.5"} 2' in text
+    assert 'scraper_stage_seconds_bucket{host="www.topachat.com",stage="fetch",le="+Inf"} 2' in text
+    assert 'scraper_stage_seconds_count{host="www.topachat.com",stage="fetch"} 2' in text
+    assert sum(1 for line in text.splitlines() if line.startswith("scraper_stage_seconds_bucket")) == len(STAGE_BUCKETS) + 1
+
+
+def test_counters_and_totals():
+    metrics = StageMetrics()
+    metrics.inc("scraper_retries_total", host="a")
+    metrics.inc("scraper_retries_total", host="b", amount=2)
+    with metrics.timer("db", operation="insert_prices"):
+        pass
+    with metrics.timer("db", operation="bulk_upsert_products"):
+        pass
+
+    assert metrics.counter_totals() == {"scraper_retries_total": 3}
+    assert metrics.stage_totals()["db"][0] == 2
+    assert metrics.stage_totals()["db"][1] == metrics.stage_totals()["db"][2]
+    text = metrics.to_prometheus()
+    assert "# TYPE scraper_retries_total counter" in text
+    assert 'scraper_retries_total{host="b"} 2' in text
+
+
+def test_nested_stages_are_left_out_of_self_time():
+    metrics = StageMetrics()
+    with metrics.timer("store", operation="store_prepared_batch"):
+        time.sleep(0.02)
+        with metrics.timer("db", operation="bulk_upsert_products"):
+            time.sleep(0.05)
+        with metrics.timer("db", operation="insert_prices"):
+            time.sleep(0.05)
+
+    totals = metrics.stage_totals()
+    store_count, store_seconds, store_self = totals["store"]
+    db_count, db_seconds, db_self = totals["db"]
+    assert (store_count, db_count) == (1, 2)
+    # The total time of store includes both db calls, its self time does not
+    assert store_seconds >= db_seconds >= 0.1
+    assert db_self == db_seconds
+    assert 0.02 <= store_self < 0.05
+    assert abs(store_self + db_self - store_seconds) < 1e-6
+    assert 'scraper_stage_self_seconds{operation="store_prepared_batch",stage="store"} ' in metrics.to_prometheus()
+
+
+def test_label_values_are_escaped():
+    metrics = StageMetrics()
+    metrics.observe("parse", 0.1, website='say "hi"\\')
+    assert 'website="say \\"hi\\"\\\\"' in metrics.to_prometheus()
+
+
+def test_spans_carry_attributes_and_are_written_once(tmp_path):
+    metrics = StageMetrics(record_spans=True)
+    with metrics.timer("fetch", attributes={"url": "https://example.com/?page=2"}, host="example.com"):
+        pass
+
+    path = tmp_path / "spans.jsonl"
+    assert metrics.write_spans(str(path)) == 1
+    assert metrics.write_spans(str(path)) == 0
+
+    span = json.loads(path.read_text().strip())
+    assert span["name"] == "fetch"
+    assert span["attributes"] == {"host": "example.com", "url": "https://example.com/?page=2"}
+    assert span["end_time_unix_nano"] >= span["start_time_unix_nano"]
+
+
+def test_write_prometheus_creates_directory(tmp_path):
+    metrics = StageMetrics()
+    metrics.observe("store", 0.5, operation="store_prepared_batch")
+    path = tmp_path / "metrics" / "scraper.prom"
+    metrics.write_prometheus(str(path))
+    assert path.read_text() == metrics.to_prometheus()
@@ -0,0 +1,96 @@
+import pytest
+
+from database import connection, migrations
+from database.migrations import CORE_MIGRATIONS, apply_migrations, ensure_schema
+from tests import TEST_DATABASE_NAME
+
+
+def applied_versions(db_manager, scope: str = "core"):
+    state = db_manager.db.schema_migrations.find_one({"_id": scope})
+    return [entry["version"] for entry in state["applied"]]
+
+
+def test_every_scope_is_applied_once_in_version_order(mongomock_db_manager):
+    assert applied_versions(mongomock_db_manager) == [version for version, _, _ in CORE_MIGRATIONS]
+    assert applied_versions(mongomock_db_manager, "prices:documents") == [1, 2, 3]
+    assert apply_migrations(mongomock_db_manager) == 0
+    assert applied_versions(mongomock_db_manager) == [version for version, _, _ in CORE_MIGRATIONS]
+
+
+def test_only_migrations_after_the_stored_version_run(mongomock_db_manager, monkeypatch):
+    calls = []
+    appended = [
+        (len(CORE_MIGRATIONS) + 1, "first", lambda db_manager: calls.append("first")),
+        (len(CORE_MIGRATIONS) + 2, "second", lambda db_manager: calls.append("second")),
+    ]
+    monkeypatch.setattr(migrations, "CORE_MIGRATIONS", CORE_MIGRATIONS + appended)
+
+    assert apply_migrations(mongomock_db_manager) == 2
+    assert calls == ["first", "second"]
+    assert apply_migrations(mongomock_db_manager) == 0
+    assert calls == ["first", "second"]
+
+
+def test_failed_migration_is_retried_from_its_version(mongomock_db_manager, monkeypatch):
+    calls = []
+
+    def failing(db_manager):
+        calls.append("failing")
+        raise RuntimeError("index build failed")
+
+    version = len(CORE_MIGRATIONS) + 1
+    monkeypatch.setattr(migrations, "CORE_MIGRATIONS", CORE_MIGRATIONS + [
+        (version, "failing", failing), (version + 1, "next", lambda db_manager: calls.append("next"))
+    ])
+    with pytest.raises(RuntimeError):
+        apply_migrations(mongomock_db_manager)
+    # The later migration never ran ahead of the failed one
+    assert calls == ["failing"]
+    assert mongomock_db_manager.db.schema_migrations.find_one({"_id": "core"})["version"] == version - 1
+
+
+def test_ensure_schema_applies_once_per_client_and_database(mongomock_db_manager, monkeypatch):
+    calls = []
+    monkeypatch.setattr(migrations, "_ready", set())
+    monkeypatch.setattr(migrations, "apply_migrations", lambda db_manager: calls.append(db_manager) or 0)
+
+    ensure_schema(mongomock_db_manager)
+    ensure_schema(mongomock_db_manager)
+    assert len(calls) == 1
+
+    mongomock_db_manager.db = mongomock_db_manager.client[f"{TEST_DATABASE_NAME}_other"]
+    ensure_schema(mongomock_db_manager)
+    assert len(calls) == 2
+
+
+def test_ensure_schema_retries_after_a_failure(mongomock_db_manager, monkeypatch):
+    calls = []
+
+    def failing(db_manager):
+        calls.append(db_manager)
+        raise RuntimeError("server selection timeout")
+
+    monkeypatch.setattr(migrations, "_ready", set())
+    monkeypatch.setattr(migrations, "apply_migrations", failing)
+    ensure_schema(mongomock_db_manager)
+    ensure_schema(mongomock_db_manager)
+    assert len(calls) == 2
+
+
+def test_managers_share_one_client_and_migrate_once(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    monkeypatch.setattr(connection, "MongoClient", mongomock.MongoClient)
+    monkeypatch.setattr(connection, "_clients", {})
+    monkeypatch.setattr(migrations, "_ready", set())
+    calls = []
+    monkeypatch.setattr(migrations, "apply_migrations", lambda db_manager: calls.append(db_manager) or 0)
+
+    first = connection.DatabaseManager("mongodb://localhost:27017/", TEST_DATABASE_NAME)
+    second = connection.DatabaseManager("mongodb://localhost:27017/", TEST_DATABASE_NAME)
+    assert first.client is second.client
+    assert len(calls) == 1
+
+    first.close()
+    assert second.client is connection.get_client("mongodb://localhost:27017/")
+    connection.close_clients()
+    assert connection._clients == {}
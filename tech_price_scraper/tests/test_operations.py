@@ -0,0 +1,218 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from bson import ObjectId
+
+from database.operations import DatabaseOperations
+from models import PriceRecord, Website
+
+
+@pytest.fixture
+def db_ops(mongomock_db_manager):
+    return DatabaseOperations(mongomock_db_manager)
+
+
+def make_website(**scraping_config):
+    return Website(name="topachat", display_name="TopAchat", base_url="https://www.topachat.com",
+                   scraping_config=scraping_config, created_at=datetime.now(UTC))
+
+
+def test_website_defaults_do_not_overwrite_stored_config(db_ops):
+    website = db_ops.ensure_website(make_website(rate_limit_ms=5000, timeout_seconds=600))
+    assert website.id is not None
+
+    db_ops.websites.update_one({"name": "topachat"}, {"$set": {"scraping_config.timeout_seconds": 120}})
+    stored = db_ops.ensure_website(make_website(rate_limit_ms=5000, timeout_seconds=600, max_concurrency=2))
+    assert stored.id == website.id
+    # Edited values are kept, keys added to the defaults are seeded
+    assert stored.scraping_config == {"rate_limit_ms": 5000, "timeout_seconds": 120, "max_concurrency": 2}
+    assert db_ops.insert_website(make_website()) == website.id
+
+
+def price_record(product_id, website_id, price: float, scraped_at: datetime) -> PriceRecord:
+    return PriceRecord(product_id=product_id, website_id=website_id, price=price, currency="EUR",
+                       product_url="https://www.topachat.com/p/1", availability="in_stock", scraped_at=scraped_at)
+
+
+def test_change_only_recording_and_recent_prices(db_ops):
+    now = datetime.now(UTC)
+    product_id = str(db_ops.products.insert_one({"name": "RTX 4070", "slug": "rtx-4070"}).inserted_id)
+    website_id = str(ObjectId())
+
+    first = price_record(product_id, website_id, 599.0, now - timedelta(days=40))
+    [first_id] = db_ops.record_price_changes([first])
+    db_ops.record_latest_price(first, first_id)
+
+    # The same price seen again extends the record instead of inserting one
+    seen_again = price_record(product_id, website_id, 599.0, now - timedelta(days=10))
+    assert db_ops.record_price_changes([seen_again]) == [first_id]
+    assert db_ops.prices.count_documents({}) == 1
+
+    changed = price_record(product_id, website_id, 579.0, now - timedelta(days=1))
+    [changed_id] = db_ops.record_price_changes([changed])
+    assert changed_id != first_id
+    stored = db_ops.prices.find_one({"_id": ObjectId(changed_id)})
+    assert stored["last_seen_at"] == stored["scraped_at"]
+
+    # The first record started before the window but was still seen inside it
+    assert [p["price"] for p in db_ops.get_recent_prices(product_id, days=30)] == [579.0, 599.0]
+    assert [p["price"] for p in db_ops.get_recent_prices(product_id, days=5)] == [579.0]
+    assert db_ops.get_recent_prices(product_id, days=30, website_id=str(ObjectId())) == []
+
+
+def test_observation_of_a_deleted_latest_record_starts_a_new_one(db_ops):
+    now = datetime.now(UTC)
+    product_id = str(db_ops.products.insert_one({"name": "RTX 4070", "slug": "rtx-4070"}).inserted_id)
+    website_id = str(ObjectId())
+    first = price_record(product_id, website_id, 599.0, now - timedelta(days=200))
+    [first_id] = db_ops.record_price_changes([first])
+    db_ops.record_latest_price(first, first_id)
+
+    # Absent for longer than retention keeps prices, then back at the same price
+    db_ops.prices.delete_many({})
+    back = price_record(product_id, website_id, 599.0, now)
+    [back_id] = db_ops.record_price_changes([back])
+    assert back_id != first_id
+    stored = db_ops.prices.find_one({"_id": ObjectId(back_id)})
+    assert (stored["price"], stored["last_seen_at"]) == (599.0, stored["scraped_at"])
+
+
+def test_history_indexes_are_created_by_price_backend_migration(mongomock_db_manager):
+    keys = [list(index["key"]) for index in mongomock_db_manager.prices.list_indexes()]
+    assert ["product_id", "last_seen_at"] in keys
+    assert ["product_id", "scraped_at", "_id"] in keys
+
+
+def test_best_price_recompute_invalidates_read_caches(db_ops):
+    website_id = db_ops.websites.insert_one({"name": "topachat", "cache_generation": 0}).inserted_id
+    product_id = db_ops.products.insert_one({"name": "RTX 4070", "slug": "rtx-4070"}).inserted_id
+    now = datetime.now(UTC)
+    db_ops.insert_prices([
+        price_record(product_id, website_id, 599.0, now - timedelta(days=2)),
+        price_record(product_id, website_id, 579.0, now - timedelta(days=1)),
+    ])
+
+    assert db_ops.recompute_best_prices() == 1
+    product = db_ops.products.find_one({"_id": product_id})
+    assert product["current_best_price"]["price"] == 579.0
+    assert product["latest_prices"][str(website_id)]["website_name"] == "topachat"
+    assert db_ops.websites.find_one({"_id": website_id})["cache_generation"] == 1
+
+
+def best_price(db_ops, product_id):
+    return db_ops.products.find_one({"_id": ObjectId(product_id)})["current_best_price"]
+
+
+def test_best_price_follows_the_latest_price_of_each_website(db_ops):
+    topachat = str(db_ops.websites.insert_one({"name": "topachat"}).inserted_id)
+    ldlc = str(db_ops.websites.insert_one({"name": "ldlc"}).inserted_id)
+    product_id = str(db_ops.products.insert_one({"name": "RTX 4070", "slug": "rtx-4070"}).inserted_id)
+    now = datetime(2025, 6, 1, 12)
+
+    prices = [price_record(product_id, topachat, 599.0, now), price_record(product_id, ldlc, 589.0, now)]
+    db_ops.record_latest_prices(prices, db_ops.insert_prices(prices))
+    assert (best_price(db_ops, product_id)["price"], best_price(db_ops, product_id)["website_name"]) == (589.0, "ldlc")
+
+    cheaper = price_record(product_id, topachat, 579.0, now + timedelta(hours=1))
+    db_ops.record_latest_price(cheaper, db_ops.insert_price(cheaper))
+    assert best_price(db_ops, product_id)["website_id"] == topachat
+
+    # A replayed older observation does not replace the website's latest price
+    stale = price_record(product_id, ldlc, 549.0, now - timedelta(days=1))
+    db_ops.record_latest_prices([stale], db_ops.insert_prices([stale]))
+    product = db_ops.products.find_one({"_id": ObjectId(product_id)})
+    assert product["latest_prices"][ldlc]["price"] == 589.0
+    assert best_price(db_ops, product_id)["price"] == 579.0
+
+    # The best price is the cheapest current price, not the cheapest ever seen
+    dearer = price_record(product_id, topachat, 629.0, now + timedelta(hours=2))
+    db_ops.record_latest_prices([dearer], db_ops.insert_prices([dearer]))
+    assert (best_price(db_ops, product_id)["price"], best_price(db_ops, product_id)["website_name"]) == (589.0, "ldlc")
+
+    # Rebuilding from the price history gives the incrementally maintained result
+    incremental = db_ops.products.find_one({"_id": ObjectId(product_id)}, {"latest_prices": 1, "current_best_price": 1})
+    db_ops.products.update_one({"_id": ObjectId(product_id)}, {"$unset": {"latest_prices": 1, "current_best_price": 1}})
+    db_ops.recompute_best_prices([product_id])
+    assert db_ops.products.find_one({"_id": ObjectId(product_id)}, {"latest_prices": 1, "current_best_price": 1}) \
+        == incremental
+
+
+def test_best_price_of_a_product_without_prices_is_unset(db_ops):
+    assert db_ops._best_price({}) is None
+    product_id = db_ops.products.insert_one({"name": "RTX 4070", "slug": "rtx-4070"}).inserted_id
+    assert db_ops.recompute_best_prices([str(product_id)]) == 0
+    assert "current_best_price" not in db_ops.products.find_one({"_id": product_id})
+
+
+def insert_gpu(db_ops, slug: str, model: str = "4070", brand: str = "nvidia") -> str:
+    return str(db_ops.products.insert_one({
+        "name": slug, "slug": slug, "brand": brand, "model": model, "specifications": {"gpu_ram": "12GB"}
+    }).inserted_id)
+
+
+def facet_price(product_id, price: float, model: str = "4070") -> PriceRecord:
+    record = price_record(product_id, ObjectId(), price, datetime.now(UTC))
+    record.gpu_ram, record.model, record.brand = "12GB", model, "nvidia"
+    return record
+
+
+def get_facet(db_ops, model: str = "4070"):
+    return db_ops.price_facets.find_one(
+        {"gpu_ram": "12GB", "model": model, "brand": "nvidia"}, {"_id": 0, "updated_at": 0}
+    )
+
+
+def test_price_facets_follow_products_and_prices(db_ops):
+    msi, asus = insert_gpu(db_ops, "msi-4070"), insert_gpu(db_ops, "asus-4070")
+    prices = [facet_price(msi, 599.0), facet_price(asus, 549.0), facet_price(asus, 579.0)]
+    db_ops.insert_prices(prices)
+    db_ops.record_price_facets(prices, [msi, asus])
+    assert get_facet(db_ops) == {"gpu_ram": "12GB", "model": "4070", "brand": "nvidia",
+                                 "products": 2, "min_price": 549.0, "max_price": 599.0}
+
+    # Later writes widen the range without reading prices, known products are not counted again
+    dearer = facet_price(msi, 619.0)
+    db_ops.insert_prices([dearer])
+    db_ops.record_price_facets([dearer])
+    assert (get_facet(db_ops)["products"], get_facet(db_ops)["max_price"]) == (2, 619.0)
+
+    # A classification change moves a product to another facet at the next refresh
+    db_ops.products.update_one({"_id": ObjectId(asus)}, {"$set": {"model": "4070 super"}})
+    moved = facet_price(asus, 629.0, model="4070 super")
+    db_ops.insert_prices([moved])
+    db_ops.record_price_facets([moved])
+    db_ops.refresh_price_facets()
+    assert get_facet(db_ops)["products"] == 1
+    assert get_facet(db_ops, "4070 super")["products"] == 1
+
+    # Retention deleted the cheapest records
+    db_ops.prices.delete_many({"price": {"$lt": 590}})
+    assert db_ops.refresh_price_facets() == 2
+    assert (get_facet(db_ops)["min_price"], get_facet(db_ops)["max_price"]) == (599.0, 619.0)
+
+    db_ops.products.delete_one({"_id": ObjectId(asus)})
+    db_ops.prices.delete_many({"model": "4070 super"})
+    db_ops.refresh_price_facets()
+    assert get_facet(db_ops, "4070 super") is None
+
+
+def test_storing_a_page_reads_no_prices_for_its_facets(db_ops, monkeypatch):
+    msi = insert_gpu(db_ops, "msi-4070")
+    monkeypatch.setattr(db_ops, "refresh_price_facets", None)
+    monkeypatch.setattr(db_ops.prices, "find_one", None)
+    db_ops.record_price_facets([facet_price(msi, 599.0), facet_price(msi, 579.0)], [msi])
+    assert get_facet(db_ops)["min_price"] == 579.0
+
+
+def test_rebuild_price_facets_denormalizes_older_prices(db_ops):
+    msi = insert_gpu(db_ops, "msi-4070")
+    db_ops.prices.insert_many([
+        {"product_id": ObjectId(msi), "price": price, "scraped_at": datetime.now(UTC)} for price in (599.0, 619.0)
+    ])
+    db_ops.price_facets.insert_one({"gpu_ram": "8GB", "model": "4060", "brand": "nvidia", "products": 3})
+
+    assert db_ops.rebuild_price_facets() == 1
+    assert db_ops.prices.count_documents({"gpu_ram": "12GB", "model": "4070", "brand": "nvidia"}) == 2
+    assert get_facet(db_ops) == {"gpu_ram": "12GB", "model": "4070", "brand": "nvidia",
+                                 "products": 1, "min_price": 599.0, "max_price": 619.0}
+    assert db_ops.price_facets.count_documents({}) == 1
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from scrapers.parser import ProductParser
+from scrapers.parser_engines import get_parser_engine, TOPACHAT_SELECTORS
+from tests import SAMPLE_HTML_SNIPPET
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+PAGE_URL = "https://www.topachat.com/pages/produits_cat_est_micro_puis_rubrique_est_wgfx_pcie.html"
+
+
+@pytest.fixture(scope="module")
+def listing_html():
+    with open(os.path.join(FIXTURES_DIR, 'topachat_listing.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_lxml_cards_match_soup_cards(listing_html):
+    soup_cards = get_parser_engine('soup', TOPACHAT_SELECTORS).extract_cards(listing_html)
+    lxml_cards = get_parser_engine('lxml', TOPACHAT_SELECTORS).extract_cards(listing_html)
+
+    assert len(soup_cards) == 9
+    assert lxml_cards == soup_cards
+
+
+def test_lxml_listings_match_soup_listings(listing_html):
+    soup_products = ProductParser(engine='soup').parse_topachat_listings(listing_html, PAGE_URL)
+    lxml_products = ProductParser(engine='lxml').parse_topachat_listings(listing_html, PAGE_URL)
+
+    assert lxml_products == soup_products
+    assert [product['name'] for product in lxml_products] == [
+        'MSI GeForce RTX 4070 VENTUS 2X E 12G OC',
+        'ASUSRadeonRX 7800 XTTUF Gaming OC',
+        'Gigabyte GeForce RTX 4060 Ti EAGLE 8G',
+        'Sapphire PULSE AMD Radeon RX 7600',
+        'Zotac GAMING GeForce RTX 4090 Trinity OC',
+    ]
+    assert lxml_products[0] == {
+        'name': 'MSI GeForce RTX 4070 VENTUS 2X E 12G OC',
+        'price': 599.95,
+        'url': 'https://www.topachat.com/pages/detail2_cat_est_micro_puis_rubrique_est_wgfx_pcie_puis_ref_est_in20012345.html',
+        'availability': 'in_stock',
+        'gpu_ram': '12GB'
+    }
+
+
+@pytest.mark.parametrize('html', ['', '   ', SAMPLE_HTML_SNIPPET])
+def test_engines_agree_on_pages_without_products(html):
+    for engine in ('soup', 'lxml'):
+        assert ProductParser(engine=engine).parse_topachat_listings(html, PAGE_URL) == []
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        ProductParser(engine='regex')
+
+
+def test_page_parse_reads_pagination(listing_html):
+    parser = ProductParser()
+    products, pagination = parser.parse_topachat_page(listing_html, PAGE_URL)
+
+    assert products == parser.parse_topachat_listings(listing_html, PAGE_URL)
+    assert pagination.last_page == 3
+    assert pagination.items_per_page == 9
+
+
+def test_page_without_pagination_links_has_no_last_page():
+    _, pagination = ProductParser().parse_page('topachat', SAMPLE_HTML_SNIPPET, PAGE_URL)
+    assert pagination.last_page is None
@@ -0,0 +1,198 @@
+import asyncio
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, UTC
+
+import pytest
+
+from models import ScrapingResult
+from scrapers import pipeline as pipeline_module
+from scrapers.parser import ProductParser
+from scrapers.pipeline import ScrapePipeline
+from utils.metrics import METRICS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+PAGE_URL = "https://www.topachat.com/pages/produits_cat_est_micro_puis_rubrique_est_wgfx_pcie.html"
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.unchanged = False
+        self.fetched_at = datetime.now(UTC)
+
+
+class FakeClient:
+    """Async client answering every URL with its own text after a random delay"""
+
+    def __init__(self, max_concurrency: int = 4, max_delay: float = 0.01):
+        self.max_concurrency = max_concurrency
+        self.max_delay = max_delay
+        self.fetched = []
+
+    async def get(self, url: str):
+        await asyncio.sleep(random.uniform(0, self.max_delay))
+        self.fetched.append(url)
+        return FakeResponse(url)
+
+
+class FakeParser:
+    engine_name = "fake"
+
+
+class FakeScraper:
+    website_name = "fake"
+
+    def __init__(self, client: FakeClient, store_delay: float = 0, last_page: int = None, failing_page: int = None):
+        self.async_web_client = client
+        self.parser = FakeParser()
+        self.store_delay = store_delay
+        self.last_page = last_page
+        self.failing_page = failing_page
+        self.stored = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def store_page(self, page, page_url, products, result, scraped_at=None):
+        self.release.wait()
+        time.sleep(self.store_delay)
+        if page == self.failing_page:
+            raise OSError("No space left on device")
+        self.stored.append((page, products))
+        return page != self.last_page
+
+    def store_unchanged_page(self, page, page_url, result, scraped_at=None):
+        return True
+
+
+def fake_parse(engine, website_name, html, page_url):
+    return [{"url": page_url}]
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(pipeline_module, "parse_listing_page", fake_parse)
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield ScrapePipeline(parse_workers=2, queue_size=1, executor=executor)
+    executor.shutdown()
+
+
+def page_urls(count: int):
+    return [f"https://example.com/page/{page}" for page in range(2, count + 2)]
+
+
+def new_result():
+    return ScrapingResult(website="fake", success=False, products_found=0, products_processed=0,
+                          products_updated=0, products_created=0)
+
+
+def test_pages_are_stored_in_order(pipeline):
+    scraper = FakeScraper(FakeClient(max_delay=0.02))
+    asyncio.run(pipeline.run(scraper, page_urls(12), new_result(), first_page=2))
+    assert [page for page, _ in scraper.stored] == list(range(2, 14))
+    assert scraper.stored[0][1] == [{"url": "https://example.com/page/2"}]
+
+
+def test_last_page_stops_the_pipeline(pipeline):
+    scraper = FakeScraper(FakeClient(), last_page=4)
+    asyncio.run(pipeline.run(scraper, page_urls(12), new_result(), first_page=2))
+    assert [page for page, _ in scraper.stored] == [2, 3, 4]
+
+
+def test_bounded_queues_hold_back_fetchers(pipeline):
+    client = FakeClient(max_concurrency=1, max_delay=0)
+    scraper = FakeScraper(client)
+    scraper.release.clear()
+
+    async def run():
+        task = asyncio.create_task(pipeline.run(scraper, page_urls(30), new_result(), first_page=2))
+        await asyncio.sleep(0.2)
+        # Storage is blocked: one page in the storer, one per queue slot and one held by each stage
+        in_flight = len(client.fetched)
+        scraper.release.set()
+        await task
+        return in_flight
+
+    assert asyncio.run(run()) <= 6
+    assert len(scraper.stored) == 30
+
+
+def test_cancelled_run_does_not_drain_the_queues(pipeline):
+    scraper = FakeScraper(FakeClient())
+    scraper.release.clear()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        # Storage would only finish long after the timeout
+        loop.call_later(1.0, scraper.release.set)
+        started = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pipeline.run(scraper, page_urls(30), new_result(), first_page=2), 0.1)
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 0.5
+    # Only the page already in the storer's thread was stored
+    assert [page for page, _ in scraper.stored] == [2]
+
+
+def test_failed_page_store_is_recorded_and_the_run_goes_on(pipeline):
+    scraper = FakeScraper(FakeClient(), failing_page=3)
+    result = new_result()
+    asyncio.run(asyncio.wait_for(pipeline.run(scraper, page_urls(6), result, first_page=2), 2))
+    assert [page for page, _ in scraper.stored] == [2, 4, 5, 6, 7]
+    assert result.errors == ["Failed to store page 3: No space left on device"]
+
+
+def test_failed_storer_cancels_the_other_stages(pipeline, monkeypatch):
+    def broken_store(*args):
+        raise RuntimeError("storer failed")
+
+    monkeypatch.setattr(ScrapePipeline, "_store", staticmethod(broken_store))
+    scraper = FakeScraper(FakeClient())
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(pipeline.run(scraper, page_urls(30), new_result(), first_page=2), 2)
+        # Only this task is left, the parsers blocked on the full queue were cancelled
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+
+
+def test_process_pool_parsing_matches_sequential_parsing():
+    with open(os.path.join(FIXTURES_DIR, 'topachat_listing.html'), encoding='utf-8') as f:
+        html = f.read()
+    expected = ProductParser().parse_listings("topachat", html, PAGE_URL)
+    assert expected
+
+    executor = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [executor.submit(pipeline_module.parse_listing_page, "lxml", "topachat", html, PAGE_URL)
+                   for _ in range(2)]
+        assert [future.result() for future in futures] == [expected, expected]
+    finally:
+        executor.shutdown()
+
+
+def test_parse_time_leaves_out_the_wait_for_a_worker(monkeypatch):
+    def slow_parse(engine, website_name, html, page_url):
+        time.sleep(0.05)
+        return [{"url": page_url}]
+
+    monkeypatch.setattr(pipeline_module, "parse_listing_page", slow_parse)
+    METRICS.reset()
+    # Two parser tasks share one worker, every other page waits for it
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pipeline = ScrapePipeline(parse_workers=2, queue_size=4, executor=executor)
+        asyncio.run(pipeline.run(FakeScraper(FakeClient(max_delay=0)), page_urls(6), new_result(), first_page=2))
+
+    totals = METRICS.stage_totals()
+    METRICS.reset()
+    parse_count, parse_seconds, _ = totals["parse"]
+    assert parse_count == 6
+    assert 0.3 <= parse_seconds < 0.4
+    assert totals["parse_wait"][1] >= 0.1
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from database.price_backends import TimeSeriesPriceBackend, get_price_backend, migrate_prices
+
+NOW = datetime(2025, 6, 1, 12)
+
+
+class InterruptedInserts:
+    """Collection whose nth insert_many stores its first document, then fails"""
+
+    def __init__(self, collection, fail_on: int):
+        self.collection = collection
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            self.collection.insert_one(documents[0])
+            raise ConnectionError("connection reset")
+        return self.collection.insert_many(documents, ordered=ordered)
+
+
+@pytest.fixture
+def backends(mongomock_db_manager):
+    db = mongomock_db_manager.db
+    source = mongomock_db_manager.price_backend
+    source.collection.insert_many([
+        {"_id": ObjectId.from_datetime(NOW - timedelta(hours=hours)), "product_id": ObjectId(),
+         "price": 500.0 + hours, "scraped_at": NOW - timedelta(hours=hours)}
+        for hours in range(10, 0, -1)
+    ])
+    # mongomock has no time-series collections, a plain one stands in for it
+    db.create_collection(TimeSeriesPriceBackend.collection_name)
+    return source, TimeSeriesPriceBackend(db)
+
+
+def test_unknown_backend_is_rejected(mongomock_db_manager):
+    with pytest.raises(ValueError):
+        get_price_backend("buckets", mongomock_db_manager.db)
+
+
+def test_migration_copies_every_price_with_its_id(backends):
+    source, target = backends
+    assert migrate_prices(source, target, batch_size=3) == 10
+    assert list(target.collection.find().sort("_id")) == list(source.collection.find().sort("_id"))
+    # Nothing is left to copy on a second run
+    assert migrate_prices(source, target, batch_size=3) == 0
+    assert target.collection.count_documents({}) == 10
+
+
+def test_interrupted_migration_resumes_without_duplicates(backends):
+    source, target = backends
+    collection = target.collection
+    target.collection = InterruptedInserts(collection, fail_on=2)
+    with pytest.raises(ConnectionError):
+        migrate_prices(source, target, batch_size=3)
+    # The first batch is checkpointed, one document of the second was copied without it
+    assert collection.count_documents({}) == 4
+    assert source.db.price_migrations.find_one()["copied"] == 3
+
+    target.collection = collection
+    assert migrate_prices(source, target, batch_size=3) == 7
+    ids = [doc["_id"] for doc in collection.find()]
+    assert len(ids) == len(set(ids)) == 10
+    assert source.db.price_migrations.find_one()["copied"] == 10
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, UTC
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scrapers.async_web_client import AsyncWebClient
+from scrapers.rate_limit import AdaptiveRateController, parse_retry_after
+from scrapers.web_client import WebClient
+
+URL = "https://www.topachat.com/pages/produits.html"
+OTHER_URL = "https://www.ldlc.com/informatique/cartes-graphiques.html"
+
+
+def make_controller(**options):
+    defaults = dict(rate_limit_ms=2000, min_rate_limit_ms=500, max_rate_limit_ms=10000,
+                    fast_response_ms=1000, slow_response_ms=5000, healthy_streak=3)
+    defaults.update(options)
+    return AdaptiveRateController(**defaults)
+
+
+def test_reserve_spaces_requests_per_host():
+    controller = make_controller()
+    assert controller.reserve(URL) == 0
+    assert controller.reserve(URL) == pytest.approx(2.0, abs=0.05)
+    assert controller.reserve(OTHER_URL) == 0
+
+
+def test_fast_responses_shorten_interval_down_to_min():
+    controller = make_controller()
+    for _ in range(3):
+        controller.record_response(URL, 0.1)
+    assert controller.interval_for(URL) == pytest.approx(1.8)
+
+    for _ in range(300):
+        controller.record_response(URL, 0.1)
+    assert controller.interval_for(URL) == pytest.approx(0.5)
+    assert controller.interval_for(OTHER_URL) == pytest.approx(2.0)
+
+
+def test_slow_responses_lengthen_interval_and_reset_streak():
+    controller = make_controller()
+    controller.record_response(URL, 0.1)
+    controller.record_response(URL, 0.1)
+    controller.record_response(URL, 6.0)
+    assert controller.interval_for(URL) == pytest.approx(2.5)
+    controller.record_response(URL, 0.1)
+    assert controller.interval_for(URL) == pytest.approx(2.5)
+
+
+def test_throttling_backs_off_up_to_max():
+    controller = make_controller()
+    assert controller.record_failure(URL, 429) == pytest.approx(4.0, abs=0.05)
+    for _ in range(10):
+        controller.record_failure(URL, 503)
+    assert controller.interval_for(URL) == pytest.approx(10.0)
+
+
+def test_retry_after_holds_the_host():
+    controller = make_controller()
+    assert controller.record_failure(URL, 429, retry_after=30) == pytest.approx(30, abs=0.05)
+    assert controller.reserve(URL) == pytest.approx(30, abs=0.05)
+
+    capped = make_controller(max_retry_after_seconds=60)
+    assert capped.record_failure(URL, 503, retry_after=3600) == pytest.approx(60, abs=0.05)
+
+
+def test_slot_reserved_before_a_backoff_is_held():
+    controller = make_controller()
+    controller.reserve(URL)
+    assert controller.reserve(URL) == pytest.approx(2.0, abs=0.05)
+    controller.record_failure(URL, 429, retry_after=30)
+    # The second request wakes at its old slot and takes a new one after the Retry-After
+    assert controller.recheck(URL) == pytest.approx(30, abs=0.05)
+    assert controller.recheck(OTHER_URL) == 0
+
+
+def test_client_errors_do_not_back_off():
+    controller = make_controller()
+    assert controller.record_failure(URL, 404) == 0
+    assert controller.interval_for(URL) == pytest.approx(2.0)
+    controller.record_failure(URL, None)
+    assert controller.interval_for(URL) == pytest.approx(4.0)
+
+
+def test_from_scraping_config_reads_bounds():
+    controller = AdaptiveRateController.from_scraping_config(
+        {"rate_limit_ms": 5000, "min_rate_limit_ms": 2000, "max_rate_limit_ms": 30000}
+    )
+    assert (controller.min_interval, controller.initial_interval, controller.max_interval) == (2.0, 5.0, 30.0)
+
+    with pytest.raises(ValueError):
+        AdaptiveRateController(rate_limit_ms=1000, min_rate_limit_ms=5000, max_rate_limit_ms=2000)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    in_a_minute = format_datetime(datetime.now(UTC) + timedelta(seconds=60), usegmt=True)
+    assert parse_retry_after(in_a_minute) == pytest.approx(60, abs=2)
+    assert parse_retry_after(format_datetime(datetime(2000, 1, 1, tzinfo=UTC), usegmt=True)) == 0
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    requests_seen = 0
+
+    def do_GET(self):
+        type(self).requests_seen += 1
+        if type(self).requests_seen == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        body = b"<html></html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_web_client_retries_after_throttling():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottlingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        controller = AdaptiveRateController(rate_limit_ms=10, min_rate_limit_ms=10, max_rate_limit_ms=200)
+        client = WebClient(max_retries=2, rate_controller=controller)
+        url = f"http://127.0.0.1:{server.server_port}/"
+
+        response = client.get(url)
+        assert response is not None and response.status_code == 200
+        assert ThrottlingHandler.requests_seen == 2
+        assert controller.interval_for(url) == pytest.approx(0.2)
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_concurrent_async_request_waits_for_retry_after():
+    web = pytest.importorskip("aiohttp.web")
+    arrivals = []
+
+    async def handler(request):
+        arrivals.append(time.monotonic())
+        if len(arrivals) == 1:
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        return web.Response(text="<html></html>")
+
+    async def fetch_twice():
+        app = web.Application()
+        app.router.add_get("/{page}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        controller = AdaptiveRateController(rate_limit_ms=100, min_rate_limit_ms=100, max_rate_limit_ms=200)
+        client = AsyncWebClient(max_retries=2, max_concurrency=2, rate_controller=controller)
+        try:
+            return await client.get_many([f"http://127.0.0.1:{port}/a", f"http://127.0.0.1:{port}/b"])
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    responses = asyncio.run(fetch_twice())
+    assert [response.status_code for response in responses] == [200, 200]
+    # The second slot was reserved before the 429, it still waits out the Retry-After
+    assert len(arrivals) == 3
+    assert arrivals[1] - arrivals[0] >= 0.95
@@ -0,0 +1,71 @@
+from datetime import datetime, UTC
+
+from bson import ObjectId
+
+from models import Product, Price, ProductRecord, PriceRecord
+
+PRODUCT_FIELDS = dict(
+    name='MSI GeForce RTX 4070 VENTUS 2X E 12G OC',
+    slug='msi-geforce-rtx-4070-ventus-2x-e-12g-oc-12gb',
+    category='gpu',
+    brand='nvidia',
+    model='4070',
+    specifications={'gpu_ram': '12GB'}
+)
+
+
+def price_fields(**overrides):
+    fields = dict(
+        product_id=str(ObjectId()),
+        website_id=str(ObjectId()),
+        price=599.9,
+        currency='EUR',
+        product_url='https://www.topachat.com/pages/detail2_cat_est_micro.html',
+        availability='in_stock',
+        scraped_at=datetime.now(UTC)
+    )
+    fields.update(overrides)
+    return fields
+
+
+def pydantic_price_document(price):
+    """Document DatabaseOperations builds from a pydantic Price"""
+    doc = price.dict(by_alias=True, exclude_unset=True)
+    doc['product_id'] = ObjectId(price.product_id)
+    doc['website_id'] = ObjectId(price.website_id)
+    return doc
+
+
+def test_product_record_matches_pydantic_dict():
+    expected = Product(**PRODUCT_FIELDS).dict(by_alias=True, exclude_unset=True)
+    assert ProductRecord(**PRODUCT_FIELDS).to_document() == expected
+
+
+def test_price_record_matches_pydantic_document():
+    fields = price_fields()
+    assert PriceRecord(**fields).to_document() == pydantic_price_document(Price(**fields))
+
+
+def test_price_record_last_seen_at_matches_pydantic_document():
+    fields = price_fields(last_seen_at=datetime.now(UTC))
+    assert PriceRecord(**fields).to_document() == pydantic_price_document(Price(**fields))
+
+
+def test_price_record_coerces_price_to_float():
+    assert PriceRecord(**price_fields(price='42')).to_document()['price'] == 42.0
+
+
+def test_records_have_no_instance_dict():
+    assert not hasattr(ProductRecord(**PRODUCT_FIELDS), '__dict__')
+    assert not hasattr(PriceRecord(**price_fields()), '__dict__')
+
+
+def test_price_record_facet_fields_match_pydantic_document():
+    fields = price_fields(gpu_ram='12GB', brand='nvidia', model='4070')
+    doc = PriceRecord(**fields).to_document()
+    assert doc == pydantic_price_document(Price(**fields))
+    assert (doc['gpu_ram'], doc['brand'], doc['model']) == ('12GB', 'nvidia', '4070')
+
+
+def test_price_record_omits_unknown_facet_fields():
+    assert 'gpu_ram' not in PriceRecord(**price_fields(brand='amd', model='7800')).to_document()
@@ -0,0 +1,110 @@
+import logging
+import os
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+import main
+from database.operations import DatabaseOperations
+from models import ScrapingResult
+from scrapers import topachat
+from scrapers.archive import PageArchive
+from scrapers.replay import ArchiveReplayer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+PAGE_URL = "https://www.topachat.com/pages/produits_cat_est_micro_puis_rubrique_est_wgfx_pcie.html"
+FETCHED_AT = datetime(2025, 6, 1, 12, tzinfo=UTC)
+
+
+def read_listing() -> bytes:
+    with open(os.path.join(FIXTURES_DIR, 'topachat_listing.html'), 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def replayer(mongomock_db_manager, tmp_path):
+    archive = PageArchive(str(tmp_path / "archive"), website_name="topachat")
+    archive.store(PAGE_URL, read_listing(), "utf-8", fetched_at=FETCHED_AT)
+    return ArchiveReplayer(archive, DatabaseOperations(mongomock_db_manager))
+
+
+def test_replaying_twice_adds_no_duplicate_prices(replayer):
+    prices = replayer.db_ops.prices
+    first = replayer.run()
+    stored = prices.count_documents({})
+    assert first.success and stored > 0
+    # The website was never scraped into this database, its default configuration is seeded
+    assert replayer.db_ops.get_website_by_name("topachat").scraping_config["rate_limit_ms"] == 5000
+    assert first.total("products_processed") == stored
+
+    second = replayer.run()
+    assert second.success
+    assert second.total("products_processed") == 0
+    assert prices.count_documents({}) == stored
+
+    # A later fetch of the same page is a new observation
+    replayer.archive.store(PAGE_URL, replayer.archive.load(next(replayer.archive.entries())).encode("utf-8"),
+                           "utf-8", fetched_at=FETCHED_AT + timedelta(hours=1))
+    assert replayer.run().total("products_processed") == stored
+    assert prices.count_documents({}) == 2 * stored
+
+
+class ArchivedResponse:
+    def __init__(self, text: str, fetched_at: datetime):
+        self.text = text
+        self.unchanged = False
+        self.fetched_at = fetched_at
+
+
+def test_replay_into_the_scraping_database_skips_scraped_prices(replayer, monkeypatch, tmp_path):
+    monkeypatch.setattr(topachat, "DEFAULT_HTTP_CACHE_PATH", str(tmp_path / "http_cache.json"))
+    monkeypatch.setattr(topachat, "DEFAULT_ARCHIVE_PATH", str(tmp_path / "scraper_archive"))
+    scraper = topachat.TopAchatScraper(replayer.db_ops)
+    result = ScrapingResult(website="topachat", success=False, products_found=0, products_processed=0,
+                            products_updated=0, products_created=0)
+
+    # The scrape stamps the page's prices with the fetch time it was archived with
+    response = ArchivedResponse(read_listing().decode("utf-8"), FETCHED_AT)
+    assert scraper._process_page(2, PAGE_URL, response, result)
+    stored = replayer.db_ops.prices.count_documents({})
+    assert stored == result.products_processed > 0
+
+    assert replayer.run().total("products_processed") == 0
+    assert replayer.db_ops.prices.count_documents({}) == stored
+
+
+def test_change_only_record_covers_the_replayed_fetch(replayer):
+    db_ops = replayer.db_ops
+    replayer.run()
+    # Stored by a change-only scrape first seen before the fetch and still seen after it
+    db_ops.prices.update_many({}, {"$set": {"scraped_at": FETCHED_AT - timedelta(days=1),
+                                            "last_seen_at": FETCHED_AT + timedelta(days=1)}})
+    product_ids = [str(doc["product_id"]) for doc in db_ops.prices.find()]
+    website_id = str(db_ops.websites.find_one()["_id"])
+    assert db_ops.get_recorded_product_ids(product_ids, website_id, FETCHED_AT) == set(product_ids)
+    assert db_ops.get_recorded_product_ids(product_ids, website_id, FETCHED_AT + timedelta(days=2)) == set()
+
+
+def test_replay_command_fills_an_empty_database(mongomock_db_manager, monkeypatch, tmp_path):
+    archive_path = str(tmp_path / "archive")
+    PageArchive(archive_path, website_name="topachat").store(PAGE_URL, read_listing(), "utf-8",
+                                                              fetched_at=FETCHED_AT)
+    databases = []
+
+    def database_manager(database_name=None):
+        databases.append(database_name)
+        return mongomock_db_manager
+
+    monkeypatch.setattr(main, "DatabaseManager", database_manager)
+    monkeypatch.setattr(main, "setup_logging", lambda: logging.getLogger(__name__))
+    assert main.replay_archive(archive_path, "tech_prices_replay")
+    assert databases == ["tech_prices_replay"]
+    assert mongomock_db_manager.websites.count_documents({"name": "topachat"}) == 1
+    assert mongomock_db_manager.prices.count_documents({}) > 0
+    assert mongomock_db_manager.products.count_documents({"current_best_price": {"$exists": True}}) > 0
+
+    # Run again, e.g. into the scraping database it was fetched for
+    count = mongomock_db_manager.prices.count_documents({})
+    assert main.replay_archive(archive_path)
+    assert databases == ["tech_prices_replay", None]
+    assert mongomock_db_manager.prices.count_documents({}) == count
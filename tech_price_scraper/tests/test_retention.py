@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from bson import ObjectId
+
+from database.operations import DatabaseOperations, _as_utc
+from database.price_backends import TimeSeriesPriceBackend
+from database.retention import PriceRetention
+from database.rollups import PriceRollup
+
+NOW = datetime(2025, 6, 1, 12, tzinfo=UTC)
+
+
+@pytest.fixture
+def db_manager(mongomock_db_manager):
+    manager = mongomock_db_manager
+    product_id = ObjectId()
+    for days in range(10, 0, -1):
+        manager.prices.insert_one({
+            "product_id": product_id, "price": 500.0 + days, "scraped_at": NOW - timedelta(days=days)
+        })
+    # A change-only record first seen long ago and still current
+    manager.prices.insert_one({
+        "product_id": ObjectId(), "price": 300.0,
+        "scraped_at": NOW - timedelta(days=30), "last_seen_at": NOW - timedelta(hours=1)
+    })
+    return manager
+
+
+def test_deletes_expired_prices_in_chunks(db_manager):
+    db_manager.websites.insert_one({"name": "topachat", "cache_generation": 3})
+    retention = PriceRetention(db_manager, batch_size=2, pause_seconds=0, downsample=False)
+    counters = retention.run(days_to_keep=5, now=NOW)
+
+    # The cutoff is midnight five days ago, the change-only record is still seen
+    assert counters["cutoff"] == datetime(2025, 5, 27, tzinfo=UTC)
+    assert counters["deleted"] == 5
+    assert db_manager.prices.count_documents({}) == 6
+    assert db_manager.prices.count_documents({"price": 300.0}) == 1
+
+    state = db_manager.db.retention_state.find_one()
+    assert (state["status"], state["total"], state["deleted"]) == ("done", 5, 5)
+    # Read API caches over the deleted prices are invalidated
+    assert db_manager.websites.find_one()["cache_generation"] == 4
+
+
+def test_interrupted_run_resumes_with_same_cutoff(db_manager):
+    retention = PriceRetention(db_manager, batch_size=2, pause_seconds=0, downsample=False)
+    state = retention._start(datetime(2025, 5, 27, tzinfo=UTC))
+    first_ids = [doc["_id"] for doc in db_manager.prices.find().sort("_id").limit(2)]
+    db_manager.prices.delete_many({"_id": {"$in": first_ids}})
+    db_manager.db.retention_state.update_one(
+        {"_id": "prices"}, {"$set": {"last_id": first_ids[-1], "deleted": 2}}
+    )
+
+    # A later run resumes the interrupted cleanup instead of computing a new cutoff
+    counters = retention.run(days_to_keep=1, now=NOW)
+    assert state["total"] == 5
+    assert counters == {"deleted": 5, "cutoff": datetime(2025, 5, 27, tzinfo=UTC)}
+    assert db_manager.prices.count_documents({}) == 6
+
+
+def test_second_run_starts_a_new_cleanup(db_manager):
+    retention = PriceRetention(db_manager, batch_size=100, pause_seconds=0, downsample=False)
+    retention.run(days_to_keep=5, now=NOW)
+    assert retention.run(days_to_keep=2, now=NOW)["deleted"] == 3
+    assert _as_utc(db_manager.db.retention_state.find_one()["horizon"]) == datetime(2025, 5, 30, tzinfo=UTC)
+
+
+def test_time_series_history_is_deleted_by_time(mongomock_db_manager):
+    manager = mongomock_db_manager
+    # mongomock has no time-series collections, a plain one stands in for it
+    manager.db.create_collection(TimeSeriesPriceBackend.collection_name)
+    manager.price_backend = TimeSeriesPriceBackend(manager.db)
+    manager.prices = manager.price_backend.collection
+    now = datetime.now(UTC)
+    product_id = ObjectId()
+    for days in range(10, 0, -1):
+        manager.prices.insert_one({"product_id": product_id, "price": 500.0 + days,
+                                   "scraped_at": now - timedelta(days=days)})
+    manager.prices.insert_one({"product_id": ObjectId(), "price": 300.0,
+                               "scraped_at": now - timedelta(days=30), "last_seen_at": now - timedelta(hours=1)})
+
+    deleted = DatabaseOperations(manager).cleanup_old_prices(days_to_keep=5, downsample=False)
+    assert deleted == 5
+    assert manager.prices.count_documents({}) == 6
+    assert manager.prices.count_documents({"price": 300.0}) == 1
+    horizon = _as_utc(manager.db.retention_state.find_one()["horizon"])
+    assert now - timedelta(days=6) < horizon <= now - timedelta(days=5)
+
+
+def test_downsampled_days_survive_a_rollup_rebuild(mongomock_db_manager):
+    manager = mongomock_db_manager
+    product_id = manager.products.insert_one({"name": "RTX 4070", "specifications": {"gpu_ram": "12GB"}}).inserted_id
+    for days in range(10, 0, -1):
+        scraped_at = NOW - timedelta(days=days)
+        # Ids of the scrape time, older than the rollup lag
+        manager.prices.insert_one({
+            "_id": ObjectId.from_datetime(scraped_at), "product_id": product_id, "price": 500.0 + days,
+            "scraped_at": scraped_at
+        })
+
+    counters = PriceRetention(manager, batch_size=2, pause_seconds=0).run(days_to_keep=5, now=NOW)
+    assert counters["deleted"] == 5
+    daily = {doc["day"]: doc["min"] for doc in manager.db.price_daily.find()}
+    assert len(daily) == 10
+
+    PriceRollup(manager, lag_seconds=0).run(rebuild=True, now=NOW)
+    rebuilt = {doc["day"]: (doc["min"], doc["count"]) for doc in manager.db.price_daily.find()}
+    assert {day: price for day, (price, _) in rebuilt.items()} == daily
+    assert all(count == 1 for _, count in rebuilt.values())
+    assert daily[datetime(2025, 5, 22)] == 510.0
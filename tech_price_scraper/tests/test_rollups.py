@@ -0,0 +1,110 @@
+import itertools
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from bson import ObjectId
+
+from database.price_backends import TimeSeriesPriceBackend
+from database.rollups import PriceRollup
+
+DAY = datetime(2025, 6, 1)
+
+
+@pytest.fixture
+def product_id(mongomock_db_manager):
+    return mongomock_db_manager.products.insert_one({
+        "name": "MSI GeForce RTX 4070", "slug": "msi-4070-12gb", "specifications": {"gpu_ram": "12GB"}
+    }).inserted_id
+
+
+_inserted = itertools.count()
+
+
+def insert_price(db_manager, **price) -> ObjectId:
+    """Insert with an _id of the next second after DAY, runs at a later now read it"""
+    price["_id"] = ObjectId.from_datetime(at(0) + timedelta(seconds=next(_inserted)))
+    return db_manager.prices.insert_one(price).inserted_id
+
+
+def at(days: float, hours: float = 0) -> datetime:
+    return (DAY + timedelta(days=days, hours=hours)).replace(tzinfo=UTC)
+
+
+def daily_counts(db_manager):
+    return {doc["day"]: doc["count"] for doc in db_manager.db.price_daily.find().sort("day", 1)}
+
+
+def test_observations_resume_after_the_last_counted_day():
+    record = {"scraped_at": at(0, 9), "last_seen_at": at(2, 10)}
+    assert [(day.day, counted) for day, _, counted in PriceRollup._observations(record)] == [
+        (1, True), (2, True), (3, True)
+    ]
+    resumed = PriceRollup._observations(record, counted_through=datetime(2025, 6, 2))
+    assert [(day.day, counted) for day, _, counted in resumed] == [(3, True)]
+    same_day = PriceRollup._observations(record, counted_through=datetime(2025, 6, 3))
+    assert [(day.day, counted) for day, _, counted in same_day] == [(3, False)]
+
+
+def test_change_only_record_seen_again_counts_each_day_once(mongomock_db_manager, product_id):
+    price_id = insert_price(
+        mongomock_db_manager, product_id=product_id, price=599.0, scraped_at=at(0, 9), last_seen_at=at(1, 10)
+    )
+    rollup = PriceRollup(mongomock_db_manager, lag_seconds=0)
+    rollup.run(now=at(1, 12))
+    assert daily_counts(mongomock_db_manager) == {datetime(2025, 6, 1): 1, datetime(2025, 6, 2): 1}
+
+    # Seen again later on the watermark's day and on the next day
+    mongomock_db_manager.prices.update_one({"_id": price_id}, {"$set": {"last_seen_at": at(1, 18)}})
+    rollup.run(now=at(1, 20))
+    mongomock_db_manager.prices.update_one({"_id": price_id}, {"$set": {"last_seen_at": at(2, 10)}})
+    rollup.run(now=at(2, 12))
+
+    assert daily_counts(mongomock_db_manager) == {
+        datetime(2025, 6, 1): 1, datetime(2025, 6, 2): 1, datetime(2025, 6, 3): 1
+    }
+    june_2 = mongomock_db_manager.db.price_daily.find_one({"day": datetime(2025, 6, 2)})
+    assert june_2["last"]["at"] == datetime(2025, 6, 2, 18)
+
+
+def test_records_inserted_with_older_timestamps_are_rolled_up(mongomock_db_manager, product_id):
+    insert_price(mongomock_db_manager, product_id=product_id, price=599.0, scraped_at=at(1))
+    rollup = PriceRollup(mongomock_db_manager, lag_seconds=0)
+    rollup.run(now=at(1, 12))
+
+    # A replayed page stored after the run, stamped with the time it was fetched
+    insert_price(mongomock_db_manager, product_id=product_id, price=579.0, scraped_at=at(0))
+    assert rollup.run(now=at(1, 13))["records"] == 1
+    assert rollup.run(now=at(1, 14))["records"] == 0
+    assert daily_counts(mongomock_db_manager) == {datetime(2025, 6, 1): 1, datetime(2025, 6, 2): 1}
+
+
+def test_recent_inserts_wait_for_the_lag(mongomock_db_manager, product_id):
+    insert_price(mongomock_db_manager, product_id=product_id, price=599.0, scraped_at=at(0))
+    assert PriceRollup(mongomock_db_manager, lag_seconds=200000).run(now=at(0, 12))["records"] == 0
+    assert PriceRollup(mongomock_db_manager, lag_seconds=0).run(now=at(0, 12))["records"] == 1
+
+
+def test_state_without_insertion_watermark_starts_at_old_watermark(mongomock_db_manager):
+    watermark = datetime(2025, 6, 1, 12)
+    mongomock_db_manager.db.rollup_state.insert_one({"_id": PriceRollup.state_id, "watermark": watermark})
+    assert PriceRollup(mongomock_db_manager).get_last_inserted_id() == ObjectId.from_datetime(watermark)
+
+
+def test_time_series_rollup_is_bounded_by_scrape_time(mongomock_db_manager, product_id):
+    manager = mongomock_db_manager
+    # mongomock has no time-series collections, a plain one stands in for it
+    manager.db.create_collection(TimeSeriesPriceBackend.collection_name)
+    manager.price_backend = TimeSeriesPriceBackend(manager.db)
+    manager.prices = manager.price_backend.collection
+    insert_price(manager, product_id=product_id, price=599.0, scraped_at=at(3))
+    rollup = PriceRollup(manager, lag_seconds=0)
+    assert rollup.run(now=at(3, 12))["records"] == 1
+
+    # Stored after the run, within the lookback of the previous run and before it
+    insert_price(manager, product_id=product_id, price=589.0, scraped_at=at(2, 13))
+    insert_price(manager, product_id=product_id, price=579.0, scraped_at=at(0))
+    assert rollup.run(now=at(3, 13))["records"] == 1
+    assert daily_counts(manager) == {datetime(2025, 6, 3): 1, datetime(2025, 6, 4): 1}
+
+    # A rebuild reads the whole collection
+    assert rollup.run(rebuild=True, now=at(3, 14))["records"] == 3
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from database.slug_cache import SlugCache
+
+
+def test_least_recently_used_slug_is_evicted():
+    cache = SlugCache(max_size=2)
+    first, second, third = ObjectId(), ObjectId(), ObjectId()
+    cache.put("msi-4070-12gb", first)
+    cache.put("asus-4060-8gb", second)
+
+    # Reading a slug makes it the most recently used
+    assert cache.get("msi-4070-12gb") == first
+    cache.put("gigabyte-4080-16gb", third)
+    assert len(cache) == 2
+    assert cache.get("asus-4060-8gb") is None
+    assert cache.get("msi-4070-12gb") == first
+    assert cache.get("gigabyte-4080-16gb") == third
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_put_many_keeps_the_last_entries_and_stores_object_ids():
+    cache = SlugCache(max_size=2)
+    product_id = ObjectId()
+    cache.put_many({"a": ObjectId(), "b": ObjectId(), "c": str(product_id)})
+    assert cache.get("a") is None
+    assert cache.get("c") == product_id
+    assert isinstance(cache.get("c"), ObjectId)
+
+
+def test_warm_loads_the_most_recently_updated_products(mongomock_db_manager):
+    products = mongomock_db_manager.products
+    now = datetime(2025, 6, 1)
+    for index in range(4):
+        products.insert_one({"slug": f"gpu-{index}", "updated_at": now + timedelta(minutes=index)})
+    products.insert_one({"name": "no slug", "updated_at": now - timedelta(days=1)})
+
+    cache = SlugCache(max_size=3)
+    assert cache.warm(products) == 3
+    assert cache.get("gpu-0") is None
+    # The most recently updated product is evicted last
+    cache.put("gpu-new", ObjectId())
+    assert cache.get("gpu-1") is None
+    assert cache.get("gpu-3") is not None
+
+
+def test_warm_query_has_an_index(mongomock_db_manager):
+    keys = [list(index["key"].items()) for index in mongomock_db_manager.products.list_indexes()]
+    assert [("updated_at", -1)] in keys
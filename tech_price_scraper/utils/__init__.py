@@ -1,4 +1,5 @@
 from utils.logging import setup_logging
+from utils.metrics import METRICS, StageMetrics, timed
 
-__all__ = ['setup_logging']
+__all__ = ['setup_logging', 'METRICS', 'StageMetrics', 'timed']
 
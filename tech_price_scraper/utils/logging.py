@@ -1,39 +1,144 @@
+import atexit
+import copy
+import json
 import logging
-import sys
+import logging.handlers
 import os
-from datetime import datetime
-
-
-def setup_logging(log_level: str = "INFO", log_file: str = None):
-    """Setup logging configuration for the application"""
-    
-    # Create logs directory if it doesn't exist
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    # Default log file with timestamp
-    if log_file is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = f'logs/scraper_{timestamp}.log'
-    
-    # Configure logging
-    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format=log_format,
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-    
+import queue
+import sys
+import threading
+from datetime import datetime, UTC
+from typing import Optional
+
+from config import (
+    DEFAULT_LOG_LEVEL, DEFAULT_LOG_FILE, DEFAULT_LOG_FORMAT, DEFAULT_LOG_ROTATION, DEFAULT_LOG_MAX_BYTES,
+    DEFAULT_LOG_ROTATE_WHEN, DEFAULT_LOG_BACKUP_COUNT
+)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecord attributes, anything else on a record was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the record's extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, UTC).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler leaving the formatting of records to the listener thread
+
+    Only the message is merged with its arguments before the record is queued, so that
+    later changes to mutable arguments cannot leak into the log. Timestamps, JSON encoding
+    and tracebacks are formatted by the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _file_handler(log_file: str, rotation: str) -> logging.Handler:
+    if rotation == 'size':
+        return logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=DEFAULT_LOG_MAX_BYTES, backupCount=DEFAULT_LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    if rotation == 'time':
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file, when=DEFAULT_LOG_ROTATE_WHEN, backupCount=DEFAULT_LOG_BACKUP_COUNT, encoding='utf-8', utc=True
+        )
+    raise ValueError(f"Unknown log rotation: {rotation}")
+
+
+def setup_logging(log_level: Optional[str] = None, log_file: Optional[str] = None,
+                  log_format: Optional[str] = None, rotation: Optional[str] = None) -> logging.Logger:
+    """Setup logging configuration for the application
+
+    The root logger only gets a queue handler, a listener thread writes the records to the
+    console and to a size or time rotated log file. The first call configures logging,
+    later calls only change the level when one is given.
+    """
+    global _listener
+
+    logger = logging.getLogger(__name__)
+    with _lock:
+        if _listener is not None:
+            if log_level is not None:
+                logging.getLogger().setLevel(log_level.upper())
+            return logger
+
+        log_level = (log_level or DEFAULT_LOG_LEVEL).upper()
+        log_file = log_file or DEFAULT_LOG_FILE
+        log_format = log_format or DEFAULT_LOG_FORMAT
+        rotation = rotation or DEFAULT_LOG_ROTATION
+
+        # Create logs directory if it doesn't exist
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if log_format == 'json':
+            formatter = JsonFormatter()
+        elif log_format == 'text':
+            formatter = logging.Formatter(TEXT_FORMAT)
+        else:
+            raise ValueError(f"Unknown log format: {log_format}")
+
+        handlers = [_file_handler(log_file, rotation), logging.StreamHandler(sys.stdout)]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.setLevel(log_level)
+        root.addHandler(_QueueHandler(log_queue))
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
     # Set specific loggers to appropriate levels
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     logging.getLogger('requests').setLevel(logging.WARNING)
-    
-    logger = logging.getLogger(__name__)
-    logger.info(f"Logging initialized - Level: {log_level}, File: {log_file}")
-    
+
+    logger.info("Logging initialized - Level: %s, File: %s, Format: %s", log_level, log_file, log_format)
     return logger
 
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread, setup_logging may be called again afterwards"""
+    global _listener
+
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, _QueueHandler):
+                root.removeHandler(handler)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+# Queued records are written before the interpreter exits
+atexit.register(shutdown_logging)
@@ -0,0 +1,195 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import METRICS_RECORD_SPANS
+
+# Upper bounds in seconds of the stage histogram buckets
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Seconds spent in nested stages, one entry per active timer of the thread or task
+_active_timers: ContextVar[Tuple[List[float], ...]] = ContextVar("active_timers", default=())
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class StageMetrics:
+    """Thread-safe per-stage timings and counters of a scrape run
+
+    Timings are aggregated into the scraper_stage_seconds histogram labelled by stage and
+    exported in Prometheus text format. A stage timed inside another one (db inside store)
+    counts in both histograms, the self time of a stage leaves out its nested stages so that
+    self times of different stages can be added up. When span recording is on, every timing
+    is also kept as an OpenTelemetry-style span (name, start, end, attributes) for a JSON lines file.
+    """
+
+    def __init__(self, record_spans: bool = False):
+        self.record_spans = record_spans
+        self._lock = threading.Lock()
+        self._histograms: Dict[Labels, List] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._spans: List[Dict] = []
+
+    def observe(self, stage: str, seconds: float, attributes: Optional[Dict] = None,
+                start: Optional[float] = None, self_seconds: Optional[float] = None, **labels):
+        """Record the duration of a stage, attributes only go to the span
+
+        self_seconds is the part not spent in nested stages, the whole duration by default.
+        """
+        key = _labels({"stage": stage, **labels})
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts, sum, count, self sum
+                histogram = self._histograms[key] = [[0] * len(STAGE_BUCKETS), 0.0, 0, 0.0]
+            for index, bound in enumerate(STAGE_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            histogram[3] += seconds if self_seconds is None else self_seconds
+
+            if self.record_spans:
+                start = start if start is not None else time.time() - seconds
+                self._spans.append({
+                    "name": stage,
+                    "start_time_unix_nano": int(start * 1e9),
+                    "end_time_unix_nano": int((start + seconds) * 1e9),
+                    "attributes": {**labels, **(attributes or {})}
+                })
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Increase a counter"""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, stage: str, attributes: Optional[Dict] = None, **labels) -> Iterator[None]:
+        """Time the enclosed block as a stage, nested timers are left out of its self time"""
+        parents = _active_timers.get()
+        nested = [0.0]
+        token = _active_timers.set(parents + (nested,))
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            _active_timers.reset(token)
+            if parents:
+                parents[-1][0] += seconds
+            # Tasks started inside the block may overlap, never report a negative self time
+            self.observe(stage, seconds, attributes, start=start, self_seconds=max(0.0, seconds - nested[0]),
+                         **labels)
+
+    def stage_totals(self) -> Dict[str, Tuple[int, float, float]]:
+        """(count, total seconds, self seconds) per stage, all other labels merged
+
+        Total seconds include nested stages, only self seconds add up across stages.
+        """
+        totals: Dict[str, Tuple[int, float, float]] = {}
+        with self._lock:
+            for key, (_, seconds, count, self_seconds) in self._histograms.items():
+                stage = dict(key)["stage"]
+                previous_count, previous_seconds, previous_self = totals.get(stage, (0, 0.0, 0.0))
+                totals[stage] = (previous_count + count, previous_seconds + seconds, previous_self + self_seconds)
+        return totals
+
+    def counter_totals(self) -> Dict[str, float]:
+        """Counter values per name, labels merged"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for (name, _), value in self._counters.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP scraper_stage_seconds Time spent in each scrape stage",
+            "# TYPE scraper_stage_seconds histogram",
+        ]
+        with self._lock:
+            for labels, (buckets, seconds, count, _) in sorted(self._histograms.items()):
+                for bound, bucket_count in zip(STAGE_BUCKETS, buckets):
+                    lines.append(f"scraper_stage_seconds_bucket{_format_labels(labels, ('le', str(bound)))} {bucket_count}")
+                lines.append(f"scraper_stage_seconds_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+                lines.append(f"scraper_stage_seconds_sum{_format_labels(labels)} {seconds}")
+                lines.append(f"scraper_stage_seconds_count{_format_labels(labels)} {count}")
+
+            lines.append("# HELP scraper_stage_self_seconds Time spent in each scrape stage outside nested stages")
+            lines.append("# TYPE scraper_stage_self_seconds counter")
+            for labels, (_, _, _, self_seconds) in sorted(self._histograms.items()):
+                lines.append(f"scraper_stage_self_seconds{_format_labels(labels)} {self_seconds}")
+
+            names = sorted({name for name, _ in self._counters})
+            for name in names:
+                lines.append(f"# TYPE {name} counter")
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the metrics atomically, suitable for the node_exporter textfile collector"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def write_spans(self, path: str) -> int:
+        """Append the recorded spans to a JSON lines file and forget them, returns spans written"""
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span) + "\n")
+        return len(spans)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._spans.clear()
+
+
+# Process-wide metrics shared by every instrumented component
+METRICS = StageMetrics(record_spans=METRICS_RECORD_SPANS)
+
+
+def timed(stage: str, **labels):
+    """Decorator timing every call of a function as a stage, labelled with the function name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.timer(stage, operation=func.__name__, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator